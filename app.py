@@ -20,6 +20,7 @@ from meditation_tts.models.enums import (
     SoundscapeType
 )
 from meditation_tts.workflow.runner import run_meditation_generation
+from meditation_tts.workflow.nodes.audio_mixing import prewarm_soundscapes
 from meditation_tts.utils.logging_utils import logger
 from meditation_tts.config.constants import WORKFLOW_STEPS
 
@@ -31,6 +32,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# With the numpy mix engine, decode the soundscapes in the background once per
+# server process so the first meditation with each one doesn't wait for it
+# (logged and skipped for the ffmpeg engine)
+prewarm_soundscapes()
+
 # Custom CSS for a calming interface
 st.markdown("""
     <style>
@@ -10,6 +10,36 @@ AUDIO_OUTPUT_DIR = "output/audio"
 JSON_OUTPUT_DIR = "output/json"
 SOUNDSCAPE_DIR = "soundscapes"
 STATE_DIR = "output/state"
+CHECKPOINT_DB = os.path.join(STATE_DIR, "checkpoints.db")
+LEDGER_FILE = "output/ledger.jsonl"
+LLM_CACHE_DB = "output/.langchain.db"
+RESULT_CACHE_DB = "output/.result_cache.db"
+
+# Smaller model for mechanical structure extraction, JSON repair calls and
+# SSML review (override the review model with SSML_REVIEW_MODEL)
+FAST_LLM_MODEL = "gpt-4o-mini"
+
+# Retries for failed OpenAI requests, with the SDK's exponential backoff
+LLM_MAX_RETRIES = 3
+
+# Semantic LLM cache (enabled with SEMANTIC_CACHE=on)
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Persistent cache of parsed analysis/profile results (disable with RESULT_CACHE=off)
+RESULT_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+RESULT_CACHE_MAX_TEMPERATURE = 0.3
+
+# Longer scripts are condensed before being sent for prosody analysis
+PROSODY_SCRIPT_TOKEN_BUDGET = 1500
+
+# Maximum number of workflow runs in flight during a batch
+MAX_CONCURRENT_RUNS = 8
+
+# Concurrent Polly requests per meditation, and attempts per request
+# (throttled or failed requests are retried with backoff)
+POLLY_MAX_CONCURRENCY = 8
+POLLY_MAX_ATTEMPTS = 5
 
 # Workflow steps
 WORKFLOW_STEPS = [
@@ -20,4 +50,18 @@ WORKFLOW_STEPS = [
     "review_and_improve_ssml",
     "generate_audio",
     "mix_audio"
-] 
\ No newline at end of file
+]
+
+# Every Nth step saves a full state snapshot instead of a delta
+FULL_STATE_SNAPSHOT_INTERVAL = 5
+
+# State fields written by each step, persisted in that step's delta state file
+STEP_OUTPUT_KEYS = {
+    "generate_script": ["meditation_script", "section_parsing_error"],
+    "analyze_prosody": ["prosody_analysis", "prefetched_profile", "parsing_warning", "parsing_error"],
+    "create_profile": ["prosody_profile", "parsing_warning", "profile_generation_error"],
+    "generate_ssml": ["ssml_output"],
+    "review_and_improve_ssml": ["ssml_output", "ssml_review"],
+    "generate_audio": ["audio_output"],
+    "mix_audio": ["audio_output"]
+}
@@ -5,7 +5,6 @@ Main entry point for the meditation TTS system.
 import os
 import json
 from typing import Dict, Any, Optional
-from datetime import datetime
 
 from meditation_tts.models.enums import (
     EmotionalState,
@@ -16,6 +15,8 @@ from meditation_tts.models.enums import (
 )
 from meditation_tts.workflow.runner import run_meditation_generation
 from meditation_tts.utils.logging_utils import logger
+from meditation_tts.utils.time_utils import file_timestamp
+from meditation_tts.utils.ledger import LEDGER_MODES, configure_ledger
 
 def create_test_request() -> Dict[str, Any]:
     """
@@ -69,9 +70,14 @@ def main():
     parser.add_argument('--output', type=str, default='', help='Output file path (default: auto-generated in output directory)')
     parser.add_argument('--start-step', type=str, default=None, help='Start from a specific workflow step')
     parser.add_argument('--end-step', type=str, default=None, help='End at a specific workflow step')
+    parser.add_argument('--ledger', type=str, choices=list(LEDGER_MODES), default=None,
+                      help='Reuse steps already recorded in the workflow ledger (default: WORKFLOW_LEDGER or off)')
+    parser.add_argument('--force', action='store_true', help='Rerun every step and refresh the workflow ledger')
     
     args = parser.parse_args()
     
+    configure_ledger('refresh' if args.force else args.ledger)
+    
     # Check for API key
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
@@ -99,7 +105,7 @@ def main():
     
     # Generate output filename with timestamp if not specified
     if not args.output:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = file_timestamp()
         output_path = f"output/meditation_{request_data['emotional_state']}_{request_data['meditation_theme']}_{timestamp}.json"
     else:
         output_path = args.output
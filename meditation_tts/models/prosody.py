@@ -2,54 +2,168 @@
 Prosody-related data models for the TTS system.
 """
 
-from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
+from types import MappingProxyType
+from typing import Annotated, Any, Dict, List, Mapping, Optional
+from pydantic import BaseModel, Field, PlainSerializer
+
+def _to_dict(table: Mapping[str, Any]) -> Dict[str, Any]:
+    """Copy a (possibly nested, read-only) table into plain dicts for serialization."""
+    return {key: _to_dict(value) if isinstance(value, Mapping) else value for key, value in table.items()}
+
+# Table fields default to the shared read-only tables below and are dumped as plain dicts
+Table = Annotated[Mapping[str, str], PlainSerializer(_to_dict)]
+NestedTable = Annotated[Mapping[str, Mapping[str, str]], PlainSerializer(_to_dict)]
+
+# Default tables shared by every model instance instead of being rebuilt per
+# instance. They are read-only; copy a table (e.g. with dict()) to modify it.
+DEFAULT_EMOTIONAL_CONTOURS: Mapping[str, str] = MappingProxyType({
+    "calm": "gradual downward drift with gentle rises",
+    "anxious": "higher baseline with more variation",
+    "energetic": "higher baseline with upward contours",
+    "tired": "lower baseline with minimal variation",
+    "happy": "moderate baseline with upward contours",
+    "sad": "lower baseline with downward contours",
+    "stressed": "higher baseline with tense contours"
+})
+
+DEFAULT_SPECIAL_SECTIONS: Mapping[str, str] = MappingProxyType({
+    "breathing": "70%",
+    "introduction": "80%",
+    "closing": "75%",
+    "grounding": "65%",
+    "body_scan": "60%",
+    "affirmations": "75%",
+    "visualization": "70%"
+})
+
+DEFAULT_EMOTIONAL_RATES: Mapping[str, str] = MappingProxyType({
+    "calm": "70%",
+    "anxious": "85%",
+    "energetic": "90%",
+    "tired": "65%",
+    "happy": "85%",
+    "sad": "70%",
+    "stressed": "80%"
+})
+
+DEFAULT_BREATHING_PATTERNS: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "4-7-8": MappingProxyType({
+        "inhale": "4s",
+        "hold": "7s",
+        "exhale": "8s"
+    }),
+    "box_breathing": MappingProxyType({
+        "inhale": "4s",
+        "hold_in": "4s",
+        "exhale": "4s",
+        "hold_out": "4s"
+    }),
+    "deep_breathing": MappingProxyType({
+        "inhale": "4s",
+        "exhale": "6s"
+    })
+})
+
+DEFAULT_EMOTIONAL_EMPHASIS: Mapping[str, str] = MappingProxyType({
+    "calm": "reduced",
+    "anxious": "moderate",
+    "energetic": "strong",
+    "tired": "reduced",
+    "happy": "moderate",
+    "sad": "reduced",
+    "stressed": "moderate"
+})
+
+DEFAULT_SECTION_PROFILES: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "introduction": MappingProxyType({
+        "pitch": "-15%",
+        "rate": "80%",
+        "volume": "soft"
+    }),
+    "grounding": MappingProxyType({
+        "pitch": "-20%",
+        "rate": "65%",
+        "volume": "x-soft"
+    }),
+    "body_scan": MappingProxyType({
+        "pitch": "-18%",
+        "rate": "60%",
+        "volume": "x-soft"
+    }),
+    "breathing": MappingProxyType({
+        "pitch": "-15%",
+        "rate": "70%",
+        "volume": "soft"
+    }),
+    "visualization": MappingProxyType({
+        "pitch": "-12%",
+        "rate": "75%",
+        "volume": "soft"
+    }),
+    "affirmations": MappingProxyType({
+        "pitch": "-10%",
+        "rate": "75%",
+        "volume": "medium"
+    }),
+    "closing": MappingProxyType({
+        "pitch": "-15%",
+        "rate": "75%",
+        "volume": "soft"
+    })
+})
+
+DEFAULT_LANGUAGE_ADJUSTMENTS: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "es-ES": MappingProxyType({
+        "rate": "80%",
+        "pitch": "-12%",
+        "volume": "soft"
+    }),
+    "en-US": MappingProxyType({
+        "rate": "85%",
+        "pitch": "-10%",
+        "volume": "medium"
+    })
+})
+
+DEFAULT_PROGRESSION: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    "start": MappingProxyType({
+        "rate": "85%",
+        "pitch": "-10%",
+        "volume": "medium"
+    }),
+    "middle": MappingProxyType({
+        "rate": "75%",
+        "pitch": "-15%",
+        "volume": "soft"
+    }),
+    "end": MappingProxyType({
+        "rate": "70%",
+        "pitch": "-20%",
+        "volume": "x-soft"
+    })
+})
 
 class PitchProfile(BaseModel):
     """Profile for pitch adjustments in speech synthesis."""
     base_pitch: str = Field(description="Base pitch adjustment, e.g. '-10%', 'low'")
     range: str = Field(description="Pitch range/variation, e.g. '+20%', 'wide'")
     contour_pattern: str = Field(description="Natural pitch contour description")
-    emotional_contours: Dict[str, str] = Field(
+    emotional_contours: Table = Field(
         description="Pitch contours for different emotional states",
-        default_factory=lambda: {
-            "calm": "gradual downward drift with gentle rises",
-            "anxious": "higher baseline with more variation",
-            "energetic": "higher baseline with upward contours",
-            "tired": "lower baseline with minimal variation",
-            "happy": "moderate baseline with upward contours",
-            "sad": "lower baseline with downward contours",
-            "stressed": "higher baseline with tense contours"
-        }
+        default_factory=lambda: DEFAULT_EMOTIONAL_CONTOURS
     )
 
 class RateProfile(BaseModel):
     """Profile for speech rate adjustments in speech synthesis."""
     base_rate: str = Field(description="Base speaking rate, e.g. '90%', 'slow'")
     variation: str = Field(description="Rate variation pattern")
-    special_sections: Dict[str, str] = Field(
+    special_sections: Table = Field(
         description="Rate adjustments for special sections",
-        default_factory=lambda: {
-            "breathing": "70%",
-            "introduction": "80%",
-            "closing": "75%",
-            "grounding": "65%",
-            "body_scan": "60%",
-            "affirmations": "75%",
-            "visualization": "70%"
-        }
+        default_factory=lambda: DEFAULT_SPECIAL_SECTIONS
     )
-    emotional_rates: Dict[str, str] = Field(
+    emotional_rates: Table = Field(
         description="Rate adjustments for different emotional states",
-        default_factory=lambda: {
-            "calm": "70%",
-            "anxious": "85%",
-            "energetic": "90%",
-            "tired": "65%",
-            "happy": "85%",
-            "sad": "70%",
-            "stressed": "80%"
-        }
+        default_factory=lambda: DEFAULT_EMOTIONAL_RATES
     )
 
 class PauseProfile(BaseModel):
@@ -59,42 +173,18 @@ class PauseProfile(BaseModel):
     long_pause: str = Field(description="Duration for long pauses, e.g. '3s'")
     breath_pause: str = Field(description="Duration for breathing instruction pauses, e.g. '4s'")
     sentence_pattern: str = Field(description="Pattern for sentence pauses")
-    breathing_patterns: Dict[str, Dict[str, str]] = Field(
+    breathing_patterns: NestedTable = Field(
         description="Pause patterns for different breathing techniques",
-        default_factory=lambda: {
-            "4-7-8": {
-                "inhale": "4s",
-                "hold": "7s",
-                "exhale": "8s"
-            },
-            "box_breathing": {
-                "inhale": "4s",
-                "hold_in": "4s",
-                "exhale": "4s",
-                "hold_out": "4s"
-            },
-            "deep_breathing": {
-                "inhale": "4s",
-                "exhale": "6s"
-            }
-        }
+        default_factory=lambda: DEFAULT_BREATHING_PATTERNS
     )
 
 class EmphasisProfile(BaseModel):
     """Profile for word emphasis in speech synthesis."""
     intensity: str = Field(description="Overall emphasis intensity")
     key_terms: List[str] = Field(description="Terms to emphasize")
-    emotional_emphasis: Dict[str, str] = Field(
+    emotional_emphasis: Table = Field(
         description="Emphasis patterns for different emotional states",
-        default_factory=lambda: {
-            "calm": "reduced",
-            "anxious": "moderate",
-            "energetic": "strong",
-            "tired": "reduced",
-            "happy": "moderate",
-            "sad": "reduced",
-            "stressed": "moderate"
-        }
+        default_factory=lambda: DEFAULT_EMOTIONAL_EMPHASIS
     )
 
 class ProsodyProfile(BaseModel):
@@ -107,84 +197,21 @@ class ProsodyProfile(BaseModel):
     voice_quality: Optional[str] = Field(default=None, description="Voice quality hint if supported")
     
     # Section-specific profiles
-    section_profiles: Dict[str, Dict[str, str]] = Field(
+    section_profiles: NestedTable = Field(
         description="Detailed profiles for different section types",
-        default_factory=lambda: {
-            "introduction": {
-                "pitch": "-15%",
-                "rate": "80%",
-                "volume": "soft"
-            },
-            "grounding": {
-                "pitch": "-20%",
-                "rate": "65%",
-                "volume": "x-soft"
-            },
-            "body_scan": {
-                "pitch": "-18%",
-                "rate": "60%",
-                "volume": "x-soft"
-            },
-            "breathing": {
-                "pitch": "-15%",
-                "rate": "70%",
-                "volume": "soft"
-            },
-            "visualization": {
-                "pitch": "-12%",
-                "rate": "75%",
-                "volume": "soft"
-            },
-            "affirmations": {
-                "pitch": "-10%",
-                "rate": "75%",
-                "volume": "medium"
-            },
-            "closing": {
-                "pitch": "-15%",
-                "rate": "75%",
-                "volume": "soft"
-            }
-        }
+        default_factory=lambda: DEFAULT_SECTION_PROFILES
     )
     
     # Language-specific adjustments
-    language_adjustments: Dict[str, Dict[str, str]] = Field(
+    language_adjustments: NestedTable = Field(
         description="Adjustments specific to each language code",
-        default_factory=lambda: {
-            "es-ES": {
-                "rate": "80%",
-                "pitch": "-12%",
-                "volume": "soft"
-            },
-            "en-US": {
-                "rate": "85%",
-                "pitch": "-10%",
-                "volume": "medium"
-            }
-        }
+        default_factory=lambda: DEFAULT_LANGUAGE_ADJUSTMENTS
     )
     
     # Progressive changes throughout the meditation
-    progression: Dict[str, Dict[str, str]] = Field(
+    progression: NestedTable = Field(
         description="How prosody changes throughout the meditation",
-        default_factory=lambda: {
-            "start": {
-                "rate": "85%",
-                "pitch": "-10%",
-                "volume": "medium"
-            },
-            "middle": {
-                "rate": "75%",
-                "pitch": "-15%",
-                "volume": "soft"
-            },
-            "end": {
-                "rate": "70%",
-                "pitch": "-20%",
-                "volume": "x-soft"
-            }
-        }
+        default_factory=lambda: DEFAULT_PROGRESSION
     )
 
 class ProsodyAnalysis(BaseModel):
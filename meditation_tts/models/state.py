@@ -2,7 +2,20 @@
 State models for workflow state management.
 """
 
-from typing import Dict, List, Optional, Any, TypedDict
+from typing import Annotated, Dict, List, Optional, Any, TypedDict
+
+def keep_latest_value(current: Optional[Any], update: Optional[Any]) -> Optional[Any]:
+    """
+    Reducer for state fields that parallel branches may write in the same step.
+    
+    Args:
+        current: The value currently in the state
+        update: The value written by a node
+        
+    Returns:
+        The written value, or the current one if the node wrote None
+    """
+    return update if update is not None else current
 
 class GraphState(TypedDict, total=False):
     """
@@ -16,4 +29,11 @@ class GraphState(TypedDict, total=False):
     ssml_output: Optional[str]
     audio_output: Optional[Dict[str, Any]]
     error: Optional[str]
-    current_step: Optional[str] 
\ No newline at end of file
+    current_step: Optional[str]
+    # Identifies the run in state file names, so delta files are only merged
+    # with earlier files of the same run
+    run_id: Optional[str]
+    # Selected by a branch that runs alongside the LLM steps
+    soundscape_file: Annotated[Optional[str], keep_latest_value]
+    # Profile produced ahead of the create_profile step (speculation or fused analysis)
+    prefetched_profile: Annotated[Optional[Dict[str, Any]], keep_latest_value]
@@ -2,10 +2,24 @@
 Services for the meditation TTS system.
 """
 
-from meditation_tts.services.audio_generator import AudioGenerator
+from meditation_tts.services.audio_generator import AudioGenerator, get_audio_generator
 from meditation_tts.services.audio_mixer import AudioMixer
+from meditation_tts.services.llm_client import get_chat_model, get_json_chat_model, configure_llm_cache
+from meditation_tts.services.semantic_cache import SemanticCache, get_semantic_cache
+from meditation_tts.services.result_cache import ResultCache, get_result_cache
+from meditation_tts.services.soundscape_index import find_background_file, list_available_soundscapes
 
 __all__ = [
     'AudioGenerator',
-    'AudioMixer'
+    'AudioMixer',
+    'get_audio_generator',
+    'get_chat_model',
+    'get_json_chat_model',
+    'configure_llm_cache',
+    'SemanticCache',
+    'get_semantic_cache',
+    'ResultCache',
+    'get_result_cache',
+    'find_background_file',
+    'list_available_soundscapes'
 ]
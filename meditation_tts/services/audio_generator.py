@@ -5,12 +5,30 @@ AWS Polly-based audio generation service.
 import boto3
 import os
 import json
-from datetime import datetime
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 
+from meditation_tts.config.constants import POLLY_MAX_ATTEMPTS, POLLY_MAX_CONCURRENCY
 from meditation_tts.models.enums import VoiceType
 from meditation_tts.utils.logging_utils import logger
+from meditation_tts.utils.text_utils import MARKUP_TAG_RE, SENTENCE_SPLIT_RE
+from meditation_tts.utils.time_utils import file_timestamp
+
+# Polly output formats whose chunks form one valid stream when their bytes are
+# joined (MP3 frames, raw PCM). Joined Ogg files form a chained stream that many
+# players and probes only partly handle, so those go through ffmpeg concat.
+BYTE_CONCAT_FORMATS = {"mp3", "pcm"}
+
+# Request voice type names mapped to the enum
+VOICE_TYPE_MAP = {
+    'Male': VoiceType.MALE,
+    'Female': VoiceType.FEMALE,
+    'Neutral': VoiceType.NEUTRAL
+}
 
 class AudioGenerator:
     """Service for generating audio from SSML content using AWS Polly."""
@@ -29,6 +47,23 @@ class AudioGenerator:
         }
     }
     
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def get_voice_id(cls, voice_type: str, language_code: str) -> str:
+        """
+        Resolve the Polly voice for a request's voice type and language.
+        
+        Args:
+            voice_type: Voice type name from the request (Male, Female or Neutral)
+            language_code: Language code (e.g., 'en-US', 'es-ES')
+            
+        Returns:
+            str: The Polly voice ID, defaulting to the neutral en-US voice
+        """
+        voice_type_value = VOICE_TYPE_MAP.get(voice_type, VoiceType.NEUTRAL).value
+        voice_map = cls.VOICE_MAPS.get(language_code, cls.VOICE_MAPS['en-US'])
+        return voice_map.get(voice_type_value, voice_map[VoiceType.NEUTRAL.value])
+    
     def __init__(self, aws_profile: Optional[str] = None, 
                  aws_access_key_id: Optional[str] = None,
                  aws_secret_access_key: Optional[str] = None,
@@ -59,8 +94,12 @@ class AudioGenerator:
             # Use default credentials
             self.session = boto3.Session(region_name=aws_region)
         
-        # Create Polly client
-        self.polly_client = self.session.client('polly')
+        # Create Polly client; the pool is sized for concurrent chunk requests
+        # and throttled requests are retried with adaptive backoff
+        self.polly_client = self.session.client('polly', config=Config(
+            max_pool_connections=POLLY_MAX_CONCURRENCY,
+            retries={"total_max_attempts": POLLY_MAX_ATTEMPTS, "mode": "adaptive"}
+        ))
         
     def test_aws_connection(self) -> bool:
         """
@@ -77,24 +116,21 @@ class AudioGenerator:
             logger.error(f"Error accessing AWS: {e}")
             return False
     
-    def generate_audio_from_ssml(self, ssml_text: str, voice_id: str, 
-                                language_code: str = 'en-US',
-                                output_format: str = 'mp3',
-                                file_suffix: str = "") -> Optional[str]:
+    def synthesize_ssml(self, ssml_text: str, voice_id: str,
+                        language_code: str = 'en-US',
+                        output_format: str = 'mp3') -> Optional[bytes]:
         """
-        Generate audio from SSML text using AWS Polly.
+        Synthesize SSML text with AWS Polly and return the audio in memory.
         
         Args:
             ssml_text: SSML formatted text
             voice_id: Polly voice ID
             language_code: Language code (e.g., 'en-US', 'es-ES')
             output_format: Output audio format (mp3, ogg_vorbis, pcm)
-            file_suffix: Optional suffix for the output filename
             
         Returns:
-            Optional[str]: Path to the generated audio file or None if failed
+            Optional[bytes]: The audio data or None if failed
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         try:
             response = self.polly_client.synthesize_speech(
                 Text=ssml_text,
@@ -105,15 +141,7 @@ class AudioGenerator:
             )
             
             if "AudioStream" in response:
-                os.makedirs(self.output_dir, exist_ok=True)
-                file_name = os.path.join(
-                    self.output_dir, 
-                    f"meditation_audio_{voice_id}_{timestamp}{file_suffix}.{output_format}"
-                )
-                with open(file_name, 'wb') as file:
-                    file.write(response['AudioStream'].read())
-                logger.info(f"Audio content written to file {file_name}")
-                return file_name
+                return response['AudioStream'].read()
             else:
                 logger.error("Could not generate audio: No AudioStream in response")
                 return None
@@ -121,19 +149,218 @@ class AudioGenerator:
             logger.error(f"An error occurred with AWS Polly: {e}")
             return None
     
+    def _write_audio(self, audio: bytes, voice_id: str, output_format: str, file_suffix: str = "") -> str:
+        """
+        Write synthesized audio to a new file in the output directory.
+        
+        Args:
+            audio: The audio data
+            voice_id: Polly voice ID, used in the file name
+            output_format: Output audio format, used as the file extension
+            file_suffix: Optional suffix for the output filename
+            
+        Returns:
+            str: Path to the written audio file
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        file_name = os.path.join(
+            self.output_dir, 
+            f"meditation_audio_{voice_id}_{file_timestamp()}{file_suffix}.{output_format}"
+        )
+        with open(file_name, 'wb') as file:
+            file.write(audio)
+        logger.info(f"Audio content written to file {file_name}")
+        return file_name
+    
+    def _combine_audio_chunks(self, audio_chunks: List[bytes], voice_id: str,
+                              output_format: str = 'mp3') -> Optional[str]:
+        """
+        Write the audio of all chunks, in order, as one file.
+        
+        Args:
+            audio_chunks: The audio data of each chunk, in playback order
+            voice_id: Polly voice ID, used in the file name
+            output_format: Output audio format (mp3, ogg_vorbis, pcm)
+            
+        Returns:
+            Optional[str]: Path to the combined audio file or None if failed
+        """
+        if len(audio_chunks) == 1 or output_format in BYTE_CONCAT_FORMATS:
+            return self._write_audio(b"".join(audio_chunks), voice_id, output_format)
+        
+        audio_files = [
+            self._write_audio(audio, voice_id, output_format, file_suffix=f"_chunk_{i+1}")
+            for i, audio in enumerate(audio_chunks)
+        ]
+        return self._combine_audio_files(audio_files, output_format)
+    
+    def _combine_audio_files(self, audio_files: List[str], output_format: str = 'mp3') -> Optional[str]:
+        """
+        Concatenate chunk audio files in order with ffmpeg and remove the chunks.
+        
+        Args:
+            audio_files: Paths of the chunk files, in playback order
+            output_format: Output audio format (mp3, ogg_vorbis, pcm)
+            
+        Returns:
+            Optional[str]: Path to the combined audio file or None if failed
+        """
+        import subprocess
+        
+        timestamp = file_timestamp()
+        list_file = os.path.join(self.output_dir, f"chunks_list_{timestamp}.txt")
+        combined_file = os.path.join(self.output_dir, f"meditation_voice_{timestamp}.{output_format}")
+        
+        # Create a list file for ffmpeg
+        with open(list_file, 'w') as f:
+            for audio_file in audio_files:
+                f.write(f"file '{os.path.abspath(audio_file)}'\n")
+        
+        # Combine the files using ffmpeg
+        try:
+            cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", combined_file]
+            subprocess.run(cmd, check=True)
+            logger.info(f"Combined {len(audio_files)} audio chunks into: {combined_file}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to combine audio chunks: {str(e)}")
+            return None
+        
+        # Clean up intermediate files
+        try:
+            os.remove(list_file)
+            for audio_file in audio_files:
+                os.remove(audio_file)
+        except Exception as e:
+            logger.warning(f"Failed to clean up temporary files: {str(e)}")
+        
+        return combined_file
+    
+    def generate_audio_from_ssml(self, ssml_text: str, voice_id: str, 
+                                language_code: str = 'en-US',
+                                output_format: str = 'mp3',
+                                file_suffix: str = "") -> Optional[str]:
+        """
+        Generate audio from SSML text using AWS Polly.
+        
+        Args:
+            ssml_text: SSML formatted text
+            voice_id: Polly voice ID
+            language_code: Language code (e.g., 'en-US', 'es-ES')
+            output_format: Output audio format (mp3, ogg_vorbis, pcm)
+            file_suffix: Optional suffix for the output filename
+            
+        Returns:
+            Optional[str]: Path to the generated audio file or None if failed
+        """
+        audio = self.synthesize_ssml(ssml_text, voice_id, language_code, output_format)
+        if audio is None:
+            return None
+        return self._write_audio(audio, voice_id, output_format, file_suffix)
+    
+    def iter_ssml_chunks(self, ssml_text: str, max_chunk_size: int = 2900) -> Iterator[str]:
+        """
+        Split SSML into <speak> documents within the Polly length limit.
+        
+        Chunks are yielded as soon as they are complete, so synthesis of the
+        first chunk can start before the rest of the document is split.
+        
+        Args:
+            ssml_text: SSML formatted text
+            max_chunk_size: Maximum size of each chunk in characters
+            
+        Yields:
+            str: A complete <speak> document for one chunk
+            
+        Raises:
+            ValueError: If the SSML has no speak tag
+        """
+        # Parse the SSML
+        from bs4 import BeautifulSoup
+        
+        # Check if we have valid SSML
+        if not (ssml_text.strip().startswith("<speak") and ssml_text.strip().endswith("</speak>")):
+            logger.warning("Input is not valid SSML, attempting to fix")
+            ssml_text = f"<speak>{ssml_text}</speak>"
+        
+        soup = BeautifulSoup(ssml_text, 'xml')
+        speak_tag = soup.find('speak')
+        
+        if not speak_tag:
+            raise ValueError("Could not parse SSML: speak tag not found")
+        
+        # Get all paragraphs
+        paragraphs = speak_tag.find_all('p')
+        
+        if not paragraphs:
+            # If no paragraph tags, try to split by sentence tags
+            paragraphs = speak_tag.find_all('s')
+        
+        if paragraphs:
+            # Using existing paragraph structure
+            logger.info(f"Splitting SSML using {len(paragraphs)} paragraph tags")
+            
+            # Collect each chunk's parts and join once instead of growing a string
+            current_parts = []
+            current_len = len("<speak>")
+            
+            for p in paragraphs:
+                p_str = str(p)
+                if current_len + len(p_str) + 10 <= max_chunk_size:  # 10 char buffer for closing tag
+                    current_parts.append(p_str)
+                    current_len += len(p_str)
+                else:
+                    yield "<speak>" + "".join(current_parts) + "</speak>"
+                    current_parts = [p_str]
+                    current_len = len("<speak>") + len(p_str)
+            
+            # Add the last chunk if not empty
+            if current_parts:
+                yield "<speak>" + "".join(current_parts) + "</speak>"
+        else:
+            # No paragraph structure, use simple text extraction and sentence splitting
+            logger.info("No paragraph structure found, splitting by sentences")
+            
+            # Extract the text content
+            text_content = MARKUP_TAG_RE.sub('', str(speak_tag))
+            # Split by periods (basic sentence splitting)
+            sentences = SENTENCE_SPLIT_RE.split(text_content)
+            
+            # Create chunks of sentences
+            current_sentences = []
+            current_len = 0
+            
+            for sentence in sentences:
+                if current_len + len(sentence) + 50 <= max_chunk_size:  # 50 char buffer for SSML tags
+                    current_sentences.append(sentence)
+                    current_len += len(sentence) + 1
+                else:
+                    if current_sentences:
+                        yield f"<speak>{' '.join(current_sentences).strip()}</speak>"
+                    current_sentences = [sentence]
+                    current_len = len(sentence) + 1
+            
+            # Add the last chunk if not empty
+            if current_sentences:
+                yield f"<speak>{' '.join(current_sentences).strip()}</speak>"
+    
     def generate_chunked_audio(self, ssml_text: str, voice_id: str, 
                              language_code: str = 'en-US',
                              output_format: str = 'mp3',
-                             max_chunk_size: int = 2900) -> Optional[str]:
+                             max_chunk_size: int = 2900,
+                             max_concurrency: int = POLLY_MAX_CONCURRENCY) -> Optional[str]:
         """
         Generate audio from long SSML text by chunking it into smaller parts.
         
+        Chunks are synthesized concurrently on a thread pool, at most
+        max_concurrency at a time.
+        
         Args:
             ssml_text: SSML formatted text
             voice_id: Polly voice ID
             language_code: Language code (e.g., 'en-US', 'es-ES')
             output_format: Output audio format (mp3, ogg_vorbis, pcm)
             max_chunk_size: Maximum size of each chunk in characters
+            max_concurrency: Maximum number of concurrent Polly requests
             
         Returns:
             Optional[str]: Path to the combined audio file or None if failed
@@ -147,131 +374,93 @@ class AudioGenerator:
         logger.info(f"SSML exceeds AWS Polly length limit ({len(ssml_text)} chars), splitting into chunks")
         
         try:
-            # Parse the SSML
-            from bs4 import BeautifulSoup
-            import re
-            
-            # Check if we have valid SSML
-            if not (ssml_text.strip().startswith("<speak") and ssml_text.strip().endswith("</speak>")):
-                logger.warning("Input is not valid SSML, attempting to fix")
-                ssml_text = f"<speak>{ssml_text}</speak>"
+            # Submit each chunk as soon as the splitter produces it and keep the
+            # audio in memory until all chunks are done
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="polly") as executor:
+                futures = []
+                for i, chunk in enumerate(self.iter_ssml_chunks(ssml_text, max_chunk_size)):
+                    logger.info(f"Generating audio for chunk {i+1} ({len(chunk)} chars)")
+                    futures.append(executor.submit(
+                        self.synthesize_ssml,
+                        ssml_text=chunk,
+                        voice_id=voice_id,
+                        language_code=language_code,
+                        output_format=output_format
+                    ))
+                logger.info(f"Split SSML into {len(futures)} chunks")
+                audio_chunks = [future.result() for future in futures]
             
-            soup = BeautifulSoup(ssml_text, 'xml')
-            speak_tag = soup.find('speak')
-            
-            if not speak_tag:
-                logger.error("Could not parse SSML: speak tag not found")
+            if any(audio is None for audio in audio_chunks):
+                logger.error(f"Failed to generate audio for {audio_chunks.count(None)} of {len(audio_chunks)} chunks")
                 return None
             
-            # Get all paragraphs
-            paragraphs = speak_tag.find_all('p')
-            
-            if not paragraphs:
-                # If no paragraph tags, try to split by sentence tags
-                paragraphs = speak_tag.find_all('s')
-            
-            chunks = []
-            
-            if paragraphs:
-                # Using existing paragraph structure
-                logger.info(f"Splitting SSML using {len(paragraphs)} paragraph tags")
-                
-                current_chunk = "<speak>"
-                
-                for p in paragraphs:
-                    p_str = str(p)
-                    if len(current_chunk) + len(p_str) + 10 <= max_chunk_size:  # 10 char buffer for closing tag
-                        current_chunk += p_str
-                    else:
-                        current_chunk += "</speak>"
-                        chunks.append(current_chunk)
-                        current_chunk = "<speak>" + p_str
-                
-                # Add the last chunk if not empty
-                if current_chunk != "<speak>":
-                    current_chunk += "</speak>"
-                    chunks.append(current_chunk)
-            else:
-                # No paragraph structure, use simple text extraction and sentence splitting
-                logger.info("No paragraph structure found, splitting by sentences")
-                
-                # Extract the text content
-                text_content = re.sub(r'<[^>]+>', '', str(speak_tag))
-                # Split by periods (basic sentence splitting)
-                sentences = re.split(r'(?<=[.!?])\s+', text_content)
-                
-                # Create chunks of sentences
-                current_chunk = ""
-                
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 50 <= max_chunk_size:  # 50 char buffer for SSML tags
-                        current_chunk += sentence + " "
-                    else:
-                        if current_chunk:
-                            chunks.append(f"<speak>{current_chunk.strip()}</speak>")
-                        current_chunk = sentence + " "
-                
-                # Add the last chunk if not empty
-                if current_chunk:
-                    chunks.append(f"<speak>{current_chunk.strip()}</speak>")
+            return self._combine_audio_chunks(audio_chunks, voice_id, output_format)
+        
+        except ValueError as e:
+            logger.error(str(e))
+            return None
+        except Exception as e:
+            logger.exception(f"Error in chunked audio generation: {str(e)}")
+            return None
+    
+    async def agenerate_chunked_audio(self, ssml_text: str, voice_id: str,
+                                      language_code: str = 'en-US',
+                                      output_format: str = 'mp3',
+                                      max_chunk_size: int = 2900,
+                                      max_concurrency: int = POLLY_MAX_CONCURRENCY) -> Optional[str]:
+        """
+        Async version of generate_chunked_audio that synthesizes chunks concurrently.
+        
+        The blocking Polly calls run in worker threads, at most max_concurrency
+        at a time, so a meditation takes roughly one Polly round-trip per batch
+        of chunks instead of one per chunk.
+        
+        Args:
+            ssml_text: SSML formatted text
+            voice_id: Polly voice ID
+            language_code: Language code (e.g., 'en-US', 'es-ES')
+            output_format: Output audio format (mp3, ogg_vorbis, pcm)
+            max_chunk_size: Maximum size of each chunk in characters
+            max_concurrency: Maximum number of concurrent Polly requests
             
+        Returns:
+            Optional[str]: Path to the combined audio file or None if failed
+        """
+        if len(ssml_text) <= max_chunk_size:
+            logger.info("SSML text is within limits, no chunking needed")
+            return await asyncio.to_thread(
+                self.generate_audio_from_ssml, ssml_text, voice_id, language_code, output_format
+            )
+        
+        logger.info(f"SSML exceeds AWS Polly length limit ({len(ssml_text)} chars), splitting into chunks")
+        
+        try:
+            chunks = list(self.iter_ssml_chunks(ssml_text, max_chunk_size))
             logger.info(f"Split SSML into {len(chunks)} chunks")
+            semaphore = asyncio.Semaphore(max_concurrency)
             
-            # Generate audio for each chunk
-            audio_files = []
-            
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Generating audio for chunk {i+1}/{len(chunks)} ({len(chunk)} chars)")
-                chunk_file = self.generate_audio_from_ssml(
-                    ssml_text=chunk,
-                    voice_id=voice_id,
-                    language_code=language_code,
-                    output_format=output_format,
-                    file_suffix=f"_chunk_{i+1}"
-                )
-                
-                if chunk_file:
-                    audio_files.append(chunk_file)
-                    logger.info(f"Generated chunk {i+1}/{len(chunks)}: {chunk_file}")
-                else:
-                    logger.error(f"Failed to generate audio for chunk {i+1}/{len(chunks)}")
-                    return None
-            
-            # If there's only one file, return it directly
-            if len(audio_files) == 1:
-                return audio_files[0]
-            
-            # Combine all audio files using ffmpeg
-            import subprocess
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            list_file = os.path.join(self.output_dir, f"chunks_list_{timestamp}.txt")
-            combined_file = os.path.join(self.output_dir, f"meditation_voice_{timestamp}.{output_format}")
+            async def synthesize(i: int, chunk: str) -> Optional[bytes]:
+                async with semaphore:
+                    logger.info(f"Generating audio for chunk {i+1}/{len(chunks)} ({len(chunk)} chars)")
+                    return await asyncio.to_thread(
+                        self.synthesize_ssml,
+                        ssml_text=chunk,
+                        voice_id=voice_id,
+                        language_code=language_code,
+                        output_format=output_format
+                    )
             
-            # Create a list file for ffmpeg
-            with open(list_file, 'w') as f:
-                for audio_file in audio_files:
-                    f.write(f"file '{os.path.abspath(audio_file)}'\n")
+            audio_chunks = await asyncio.gather(*(synthesize(i, chunk) for i, chunk in enumerate(chunks)))
             
-            # Combine the files using ffmpeg
-            try:
-                cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", combined_file]
-                subprocess.run(cmd, check=True)
-                logger.info(f"Combined {len(audio_files)} audio chunks into: {combined_file}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to combine audio chunks: {str(e)}")
+            if any(audio is None for audio in audio_chunks):
+                logger.error(f"Failed to generate audio for {audio_chunks.count(None)} of {len(chunks)} chunks")
                 return None
             
-            # Clean up intermediate files
-            try:
-                os.remove(list_file)
-                for audio_file in audio_files:
-                    os.remove(audio_file)
-            except Exception as e:
-                logger.warning(f"Failed to clean up temporary files: {str(e)}")
-            
-            return combined_file
+            return await asyncio.to_thread(self._combine_audio_chunks, audio_chunks, voice_id, output_format)
         
+        except ValueError as e:
+            logger.error(str(e))
+            return None
         except Exception as e:
             logger.exception(f"Error in chunked audio generation: {str(e)}")
             return None
@@ -302,17 +491,8 @@ class AudioGenerator:
             voice_type_str = request.get('voice_type', 'Female')
             language_code = request.get('language_code', 'en-US')
             
-            # Map voice type string to enum
-            voice_type_map = {
-                'Male': VoiceType.MALE.value,
-                'Female': VoiceType.FEMALE.value,
-                'Neutral': VoiceType.NEUTRAL.value
-            }
-            voice_type = voice_type_map.get(voice_type_str, VoiceType.NEUTRAL.value)
-            
             # Get the appropriate voice ID
-            voice_map = self.VOICE_MAPS.get(language_code, self.VOICE_MAPS['en-US'])
-            voice_id = voice_map.get(voice_type, voice_map[VoiceType.NEUTRAL.value])
+            voice_id = self.get_voice_id(voice_type_str, language_code)
             
             # Generate audio
             return self.generate_audio_from_ssml(
@@ -323,4 +503,29 @@ class AudioGenerator:
             
         except Exception as e:
             logger.error(f"Error processing meditation JSON: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+@functools.lru_cache(maxsize=None)
+def get_audio_generator(aws_profile: Optional[str] = None,
+                        aws_region: str = 'us-east-1',
+                        output_dir: str = "./") -> AudioGenerator:
+    """
+    Get an AudioGenerator, creating it on first use.
+    
+    Generators are reused for the lifetime of the process so the Polly
+    client keeps its connections between meditations.
+    
+    Args:
+        aws_profile: AWS profile name to use
+        aws_region: AWS region name
+        output_dir: Directory to save generated audio files
+        
+    Returns:
+        AudioGenerator: The shared generator for these settings
+    """
+    return AudioGenerator(
+        aws_profile=aws_profile,
+        aws_region=aws_region,
+        output_dir=output_dir
+    )
+
@@ -5,11 +5,14 @@ FFmpeg-based Audio Mixer for Meditation Soundscapes.
 import os
 import sys
 import random
+import shutil
+import functools
 import subprocess
 import logging
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any, List
 
+from meditation_tts.services.soundscape_index import find_background_file
 from meditation_tts.utils.logging_utils import logger
 
 class AudioMixer:
@@ -25,24 +28,37 @@ class AudioMixer:
         self.output_dir = output_dir
         
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def check_ffmpeg_installed() -> bool:
         """
         Check if ffmpeg is installed on the system.
         
+        The lookup is a PATH search rather than a subprocess and is cached
+        for the lifetime of the process.
+        
         Returns:
             bool: True if ffmpeg is installed, False otherwise
         """
-        try:
-            subprocess.run(
-                ["ffmpeg", "-version"], 
-                stdout=subprocess.DEVNULL, 
-                stderr=subprocess.DEVNULL
-            )
-            return True
-        except FileNotFoundError:
+        if shutil.which("ffmpeg") is None:
             logger.error("ffmpeg not found. Install it with 'brew install ffmpeg' on macOS or "
                         "follow instructions at https://ffmpeg.org/download.html")
             return False
+        return True
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def check_ffprobe_installed() -> bool:
+        """
+        Check if ffprobe is installed on the system.
+        
+        Returns:
+            bool: True if ffprobe is installed, False otherwise
+        """
+        if shutil.which("ffprobe") is None:
+            logger.error("ffprobe not found. It ships with ffmpeg, see "
+                        "https://ffmpeg.org/download.html")
+            return False
+        return True
 
     def create_output_dir(self) -> bool:
         """
@@ -88,6 +104,10 @@ class AudioMixer:
             if not self.check_ffmpeg_installed():
                 logger.error("Cannot merge audio: ffmpeg is not installed")
                 return None, None
+            
+            if not self.check_ffprobe_installed():
+                logger.error("Cannot merge audio: ffprobe is not installed")
+                return None, None
                 
             # Check if files exist
             if not os.path.exists(voice_file):
@@ -159,23 +179,15 @@ class AudioMixer:
                     f"[0:a][bg]amix=inputs=2:duration=first"
                 )
                 
-            # Run ffmpeg command to merge audio
+            # Build the ffmpeg command; the sample (if requested) is cut from the
+            # same mix in this single call instead of re-reading the encoded file
             merge_cmd = [
                 'ffmpeg',
                 '-y',  # Overwrite output file
                 '-i', voice_file,
-                '-i', background_file,
-                '-filter_complex', filter_complex,
-                '-codec:a', 'libmp3lame',
-                '-q:a', '2',
-                output_file
+                '-i', background_file
             ]
             
-            logger.info(f"Running ffmpeg command to merge audio files")
-            subprocess.run(merge_cmd, check=True)
-            logger.info(f"Merged audio saved as {output_file}")
-            
-            # Create sample if requested
             sample_file = None
             if create_sample:
                 # Create output path for sample
@@ -188,20 +200,31 @@ class AudioMixer:
                     sample_start = random.uniform(10, max_start_time)
                 else:
                     sample_start = 0
-                    
-                # Create sample with ffmpeg
-                sample_cmd = [
-                    'ffmpeg',
-                    '-y',
-                    '-i', output_file,
-                    '-ss', f"{sample_start}",
-                    '-t', f"{sample_duration}",
-                    '-acodec', 'copy',
-                    sample_file
-                ]
                 
+                # Split the mix so one branch feeds the full output and the other the sample
+                filter_complex += (
+                    "[mix];[mix]asplit=2[full][smp];"
+                    f"[smp]atrim=start={sample_start}:duration={sample_duration},"
+                    "asetpts=PTS-STARTPTS[sample]"
+                )
+                merge_cmd += [
+                    '-filter_complex', filter_complex,
+                    '-map', '[full]', '-codec:a', 'libmp3lame', '-q:a', '2', output_file,
+                    '-map', '[sample]', '-codec:a', 'libmp3lame', '-q:a', '2', sample_file
+                ]
                 logger.info(f"Creating sample from {sample_start:.2f}s to {sample_start+sample_duration:.2f}s")
-                subprocess.run(sample_cmd, check=True)
+            else:
+                merge_cmd += [
+                    '-filter_complex', filter_complex,
+                    '-codec:a', 'libmp3lame',
+                    '-q:a', '2',
+                    output_file
+                ]
+            
+            logger.info(f"Running ffmpeg command to merge audio files")
+            subprocess.run(merge_cmd, check=True)
+            logger.info(f"Merged audio saved as {output_file}")
+            if sample_file:
                 logger.info(f"Sample audio saved as {sample_file}")
                 
             return output_file, sample_file
@@ -266,17 +289,5 @@ class AudioMixer:
         Returns:
             Optional[str]: Path to a matching soundscape file or None if not found
         """
-        import glob
-        
-        # Try to find files matching the type
-        pattern = os.path.join(soundscape_dir, f"*{soundscape_type.lower()}*.mp3")
-        matches = glob.glob(pattern)
-        if matches:
-            return random.choice(matches)
-            
-        # Fallback: pick any mp3 in the directory
-        all_files = glob.glob(os.path.join(soundscape_dir, "*.mp3"))
-        if all_files:
-            return random.choice(all_files)
-            
-        return None 
\ No newline at end of file
+        # Shares the workflow's directory index, rescanned only when the directory changes
+        return find_background_file(soundscape_dir, soundscape_type) 
\ No newline at end of file
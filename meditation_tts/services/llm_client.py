@@ -0,0 +1,95 @@
+"""
+Shared chat model clients for the workflow nodes.
+"""
+
+import functools
+import os
+
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+
+try:
+    from langchain_community.cache import SQLiteCache
+except ImportError:  # Optional dependency
+    SQLiteCache = None
+
+from meditation_tts.config.constants import LLM_CACHE_DB, LLM_MAX_RETRIES, RESULT_CACHE_MAX_TEMPERATURE
+from meditation_tts.utils.logging_utils import logger
+
+def configure_llm_cache(mode: str = None) -> str:
+    """
+    Install LangChain's global LLM cache so repeated identical prompts are
+    answered locally instead of calling the API again.
+    
+    Opt-in: the global cache also stores failed replies (truncated JSON,
+    reviews without a <speak> block), which the nodes expect to retry on
+    the next run, so it is off unless LLM_CACHE asks for it. "off" leaves
+    the global cache alone, so a cache the host application installed
+    before importing this package stays in place.
+    
+    Args:
+        mode: "memory", "sqlite" or "off"; defaults to the LLM_CACHE
+            environment variable, then "off"
+        
+    Returns:
+        str: The cache mode actually in effect
+    """
+    mode = (mode or os.environ.get("LLM_CACHE", "off")).lower()
+    
+    if mode == "sqlite":
+        if SQLiteCache is not None:
+            os.makedirs(os.path.dirname(LLM_CACHE_DB), exist_ok=True)
+            set_llm_cache(SQLiteCache(database_path=LLM_CACHE_DB))
+            return mode
+        logger.warning("langchain-community is not installed, falling back to in-memory LLM cache")
+        mode = "memory"
+    
+    if mode == "memory":
+        set_llm_cache(InMemoryCache())
+    elif mode != "off":
+        logger.warning(f"Unknown LLM_CACHE mode '{mode}', not installing an LLM cache")
+        mode = "off"
+    
+    return mode
+
+configure_llm_cache()
+
+@functools.lru_cache(maxsize=None)
+def get_chat_model(temperature: float, model: str = "gpt-4o") -> ChatOpenAI:
+    """
+    Get a chat model client, creating it on first use.
+    
+    Clients are reused for the lifetime of the process so their HTTP
+    connection pools stay warm across nodes and workflow runs. Failed
+    requests (rate limits, timeouts, 5xx) are retried with exponential backoff.
+    Creative models (temperature above RESULT_CACHE_MAX_TEMPERATURE) bypass
+    the LLM cache so every call still samples a fresh reply.
+    
+    Args:
+        temperature: Sampling temperature
+        model: OpenAI model name
+        
+    Returns:
+        ChatOpenAI: The shared client for these settings
+    """
+    cache = False if temperature > RESULT_CACHE_MAX_TEMPERATURE else None
+    return ChatOpenAI(temperature=temperature, model=model, max_retries=LLM_MAX_RETRIES, cache=cache)
+
+@functools.lru_cache(maxsize=None)
+def get_json_chat_model(temperature: float, model: str = "gpt-4o") -> Runnable:
+    """
+    Get a chat model client that is constrained to reply with a JSON object.
+    
+    Uses OpenAI's JSON mode, so replies always parse and no regex extraction
+    or repair call is needed. The prompt must mention JSON.
+    
+    Args:
+        temperature: Sampling temperature
+        model: OpenAI model name
+        
+    Returns:
+        Runnable: The shared client bound to JSON mode
+    """
+    return get_chat_model(temperature, model).bind(response_format={"type": "json_object"})
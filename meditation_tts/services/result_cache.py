@@ -0,0 +1,154 @@
+"""
+Persistent cache of parsed LLM results keyed by the inputs that produced them.
+
+The LangChain LLM cache stores raw responses, so a hit still has to be parsed
+and a malformed response still triggers the repair call. This cache stores
+the parsed result of a node's LLM step instead, in a small SQLite database
+that survives restarts.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from meditation_tts.config.constants import (
+    RESULT_CACHE_DB,
+    RESULT_CACHE_MAX_TEMPERATURE,
+    RESULT_CACHE_TTL_SECONDS
+)
+from meditation_tts.utils.json_utils import dumps_json, loads_json
+from meditation_tts.utils.logging_utils import logger
+
+class ResultCache:
+    """SQLite-backed cache of JSON results with a time to live."""
+
+    def __init__(self, path: str = RESULT_CACHE_DB, ttl_seconds: int = RESULT_CACHE_TTL_SECONDS):
+        """
+        Initialize the result cache.
+
+        Args:
+            path: Path to the SQLite database
+            ttl_seconds: How long a stored result stays valid
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored result.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored result, or None if missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return loads_json(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a result.
+
+        Args:
+            key: The cache key
+            value: The JSON-serializable result
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                (key, dumps_json(value), time.time())
+            )
+            self._conn.commit()
+
+@functools.lru_cache(maxsize=1)
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get the shared result cache unless disabled via RESULT_CACHE=off.
+
+    Returns:
+        Optional[ResultCache]: The cache, or None when disabled or unavailable
+    """
+    if os.environ.get("RESULT_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    try:
+        return ResultCache()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open result cache at {RESULT_CACHE_DB}: {str(e)}")
+        return None
+
+def result_cache_key(purpose: str, llm: Any, **inputs: Any) -> Optional[str]:
+    """
+    Build the cache key for an LLM step.
+
+    Args:
+        purpose: LLM call purpose, e.g. "Prosody Analysis"
+        llm: The chat model the step calls
+        **inputs: Everything else the prompt is built from
+
+    Returns:
+        Optional[str]: Hex SHA-256 key, or None if the model samples too freely to cache
+    """
+    temperature = getattr(llm, "temperature", None) or 0.0
+    if temperature > RESULT_CACHE_MAX_TEMPERATURE:
+        return None
+    payload = {
+        "purpose": purpose,
+        "model": getattr(llm, "model_name", None),
+        "temperature": temperature,
+        "inputs": inputs
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def get_cached_result(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Look up a result if caching applies.
+
+    Args:
+        key: Key from result_cache_key, or None
+
+    Returns:
+        Optional[Dict[str, Any]]: The cached result, or None on a miss
+    """
+    cache = get_result_cache()
+    if cache is None or key is None:
+        return None
+    try:
+        return cache.get(key)
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning(f"Result cache lookup failed: {str(e)}")
+        return None
+
+def store_result(key: Optional[str], value: Dict[str, Any]) -> None:
+    """
+    Store a result if caching applies.
+
+    Args:
+        key: Key from result_cache_key, or None
+        value: The parsed result
+    """
+    cache = get_result_cache()
+    if cache is None or key is None:
+        return
+    try:
+        cache.set(key, value)
+    except (sqlite3.Error, TypeError) as e:
+        logger.warning(f"Result cache store failed: {str(e)}")
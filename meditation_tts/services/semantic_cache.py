@@ -0,0 +1,213 @@
+"""
+Semantic response cache for LLM calls whose prompts embed generated content.
+
+Prompts that include a full script rarely repeat byte for byte, so the
+exact-match LLM cache misses them. This cache compares prompt embeddings
+instead and reuses a stored response when a new prompt is close enough.
+
+A reused response was written for a different prompt, so the cache only
+suits calls whose reply does not quote the prompt's content; callers can
+tell a reused response apart with is_semantic_hit.
+"""
+
+import functools
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import AIMessage
+from langchain_openai import OpenAIEmbeddings
+
+from meditation_tts.config.constants import (
+    SEMANTIC_CACHE_EMBEDDING_MODEL,
+    SEMANTIC_CACHE_THRESHOLD
+)
+from meditation_tts.utils.logging_utils import logger
+
+# Response metadata flag set on responses served from the cache
+SEMANTIC_HIT_KEY = "semantic_cache_hit"
+
+class SemanticCache:
+    """In-memory cache of LLM responses keyed by prompt embedding, per namespace."""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 embedding_model: str = SEMANTIC_CACHE_EMBEDDING_MODEL):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            embedding_model: OpenAI embedding model name
+        """
+        self.threshold = threshold
+        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        self._entries: Dict[Tuple, Tuple[List[np.ndarray], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prompt_text(messages: List[Any]) -> str:
+        return "\n\n".join(message.content for message in messages)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def lookup(self, namespace: Tuple, vector: np.ndarray) -> Optional[str]:
+        """
+        Find the closest cached response in a namespace.
+
+        Args:
+            namespace: Key separating unrelated prompts
+            vector: Normalized prompt embedding
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss
+        """
+        with self._lock:
+            vectors, responses = self._entries.get(namespace, ([], []))
+            if not vectors:
+                return None
+            similarities = np.stack(vectors) @ vector
+
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return responses[best]
+        return None
+
+    def update(self, namespace: Tuple, vector: np.ndarray, response: str) -> None:
+        """
+        Store a response for a prompt embedding.
+
+        Args:
+            namespace: Key separating unrelated prompts
+            vector: Normalized prompt embedding
+            response: LLM response content
+        """
+        with self._lock:
+            vectors, responses = self._entries.setdefault(namespace, ([], []))
+            vectors.append(vector)
+            responses.append(response)
+
+    def invoke(self, llm: Any, messages: List[Any], namespace: Tuple) -> Any:
+        """
+        Invoke the LLM unless a semantically similar prompt was already answered.
+
+        Args:
+            llm: Chat model to call on a miss
+            messages: Messages to send; their combined content is embedded
+            namespace: Key separating unrelated prompts
+
+        Returns:
+            The chat model response, or an AIMessage holding the cached content
+        """
+        vector = self._normalize(self.embeddings.embed_query(self._prompt_text(messages)))
+        cached = self.lookup(namespace, vector)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={SEMANTIC_HIT_KEY: True})
+
+        response = llm.invoke(messages)
+        self.update(namespace, vector, response.content)
+        return response
+
+    async def ainvoke(self, llm: Any, messages: List[Any], namespace: Tuple) -> Any:
+        """
+        Async version of invoke.
+
+        Args:
+            llm: Chat model to call on a miss
+            messages: Messages to send; their combined content is embedded
+            namespace: Key separating unrelated prompts
+
+        Returns:
+            The chat model response, or an AIMessage holding the cached content
+        """
+        vector = self._normalize(await self.embeddings.aembed_query(self._prompt_text(messages)))
+        cached = self.lookup(namespace, vector)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={SEMANTIC_HIT_KEY: True})
+
+        response = await llm.ainvoke(messages)
+        self.update(namespace, vector, response.content)
+        return response
+
+@functools.lru_cache(maxsize=1)
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Get the shared semantic cache if enabled via SEMANTIC_CACHE=on.
+
+    Returns:
+        Optional[SemanticCache]: The cache, or None when disabled
+    """
+    if os.environ.get("SEMANTIC_CACHE", "off").lower() not in ("on", "1", "true"):
+        return None
+    return SemanticCache()
+
+def is_semantic_hit(response: Any) -> bool:
+    """
+    Check whether a response was reused from a similar prompt instead of generated.
+
+    Args:
+        response: A response returned by cached_invoke or acached_invoke
+
+    Returns:
+        bool: Whether the response came from the semantic cache
+    """
+    return bool((getattr(response, "response_metadata", None) or {}).get(SEMANTIC_HIT_KEY))
+
+def cache_namespace(purpose: str, request: Dict[str, Any]) -> Tuple:
+    """
+    Build a cache namespace from the call purpose and request parameters.
+
+    Args:
+        purpose: LLM call purpose, e.g. "Prosody Analysis"
+        request: The meditation request
+
+    Returns:
+        Tuple: Namespace key
+    """
+    return (
+        purpose,
+        request.get("language_code"),
+        request.get("meditation_style"),
+        request.get("meditation_theme")
+    )
+
+def cached_invoke(llm: Any, messages: List[Any], purpose: str, request: Dict[str, Any]) -> Any:
+    """
+    Invoke the LLM through the semantic cache when it is enabled.
+
+    Args:
+        llm: Chat model to call
+        messages: Messages to send
+        purpose: LLM call purpose used to namespace the cache
+        request: The meditation request
+
+    Returns:
+        The chat model response
+    """
+    cache = get_semantic_cache()
+    if cache is None:
+        return llm.invoke(messages)
+    return cache.invoke(llm, messages, cache_namespace(purpose, request))
+
+async def acached_invoke(llm: Any, messages: List[Any], purpose: str, request: Dict[str, Any]) -> Any:
+    """
+    Async version of cached_invoke.
+
+    Args:
+        llm: Chat model to call
+        messages: Messages to send
+        purpose: LLM call purpose used to namespace the cache
+        request: The meditation request
+
+    Returns:
+        The chat model response
+    """
+    cache = get_semantic_cache()
+    if cache is None:
+        return await llm.ainvoke(messages)
+    return await cache.ainvoke(llm, messages, cache_namespace(purpose, request))
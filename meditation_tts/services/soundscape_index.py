@@ -0,0 +1,155 @@
+"""
+Index of the soundscape files in a directory, shared by the mixing node and AudioMixer.
+
+The directory is scanned once per modification time and files are grouped
+by the soundscape type their names suggest.
+"""
+
+import os
+import re
+import random
+import functools
+from typing import Dict, List, Optional, Tuple
+
+from meditation_tts.utils.logging_utils import logger
+
+# File name keywords mapped to the soundscape type they indicate
+SOUNDSCAPE_KEYWORDS = {
+    "nature": "nature",
+    "river": "nature",
+    "stream": "nature",
+    "urban": "urban",
+    "city": "urban",
+    "ambient": "ambient",
+    "silence": "silence",
+    "rain": "rain",
+    "thunder": "rain",
+    "storm": "rain",
+    "ocean": "ocean",
+    "waves": "ocean",
+    "forest": "forest",
+    "birds": "forest",
+    "nighttime": "nighttime",
+    "crickets": "nighttime",
+}
+SOUNDSCAPE_TYPES = frozenset(SOUNDSCAPE_KEYWORDS.values())
+SOUNDSCAPE_EXTENSIONS = (".mp3",)
+
+# One alternation with a named group per type, so a single regex scan of the
+# file name yields every matching type
+_SOUNDSCAPE_TYPE_RE = re.compile("|".join(
+    f"(?P<{soundscape_type}>" + "|".join(
+        re.escape(keyword) for keyword, t in SOUNDSCAPE_KEYWORDS.items() if t == soundscape_type
+    ) + ")"
+    for soundscape_type in sorted(SOUNDSCAPE_TYPES)
+))
+
+@functools.lru_cache(maxsize=16)
+def _scan_soundscapes(soundscape_dir: str, dir_mtime_ns: int) -> Tuple[Dict[str, Tuple[str, ...]], Tuple[str, ...]]:
+    """
+    Scan a soundscape directory once per modification time.
+    
+    Args:
+        soundscape_dir: Directory containing soundscape files
+        dir_mtime_ns: Modification time of the directory, used as cache key
+        
+    Returns:
+        Tuple of the files grouped by soundscape type and all files, sorted
+    """
+    soundscapes: Dict[str, List[str]] = {}
+    all_files: List[str] = []
+    with os.scandir(soundscape_dir) as entries:
+        for entry in entries:
+            lower = entry.name.lower()
+            if lower.startswith(".") or not lower.endswith(SOUNDSCAPE_EXTENSIONS):
+                continue
+            if not entry.is_file():
+                continue
+            all_files.append(entry.path)
+            matched = {m.lastgroup for m in _SOUNDSCAPE_TYPE_RE.finditer(lower)} or {"other"}
+            for soundscape_type in matched:
+                soundscapes.setdefault(soundscape_type, []).append(entry.path)
+    return (
+        {soundscape_type: tuple(paths) for soundscape_type, paths in soundscapes.items()},
+        tuple(sorted(all_files))
+    )
+
+def get_soundscape_index(soundscape_dir: str) -> Tuple[Dict[str, Tuple[str, ...]], Tuple[str, ...]]:
+    """
+    Get the soundscape files of a directory, rescanning only when it changed.
+    
+    Args:
+        soundscape_dir: Directory containing soundscape files
+        
+    Returns:
+        Tuple of the files grouped by soundscape type and all files, sorted;
+            both empty if the directory does not exist
+    """
+    try:
+        dir_mtime_ns = os.stat(soundscape_dir).st_mtime_ns
+        return _scan_soundscapes(soundscape_dir, dir_mtime_ns)
+    except FileNotFoundError:
+        logger.warning(f"Soundscape directory not found: {soundscape_dir}")
+        return {}, ()
+
+@functools.lru_cache(maxsize=32)
+def _soundscape_candidates(soundscape_dir: str, soundscape_type: str, dir_mtime_ns: int) -> Tuple[str, ...]:
+    """
+    Get the files to pick from for a soundscape type, once per directory modification time.
+    
+    Args:
+        soundscape_dir: Directory containing soundscape files
+        soundscape_type: Lower-cased type of soundscape to find
+        dir_mtime_ns: Modification time of the directory, used as cache key
+        
+    Returns:
+        Tuple of the files whose name contains the type, or of all files if none do
+    """
+    _, all_files = _scan_soundscapes(soundscape_dir, dir_mtime_ns)
+    
+    # Try to find files whose name contains the type itself; the keyword
+    # groups are only used for listing
+    matches = tuple(path for path in all_files if soundscape_type in os.path.basename(path).lower())
+    # Fallback: pick any mp3 in the directory
+    return matches or all_files
+
+def list_available_soundscapes(soundscape_dir: str) -> Dict[str, List[str]]:
+    """
+    List soundscape files grouped by the soundscape type their name suggests.
+    
+    A file is listed under every type whose keywords appear in its name, or
+    under "other" if none do. The directory is only rescanned when its
+    modification time changes.
+    
+    Args:
+        soundscape_dir: Directory containing soundscape files
+        
+    Returns:
+        Dict mapping soundscape type to a list of file paths
+    """
+    soundscapes, _ = get_soundscape_index(soundscape_dir)
+    return {soundscape_type: list(paths) for soundscape_type, paths in soundscapes.items()}
+
+def find_background_file(soundscape_dir: str, soundscape_type: str,
+                         rng: Optional[random.Random] = None) -> Optional[str]:
+    """
+    Find a background soundscape file matching the type, or pick a random one.
+    
+    Args:
+        soundscape_dir: Directory containing soundscape files
+        soundscape_type: Type of soundscape to find
+        rng: Optional random generator for reproducible picks
+        
+    Returns:
+        str or None: Path to the selected soundscape file or None if not found
+    """
+    try:
+        dir_mtime_ns = os.stat(soundscape_dir).st_mtime_ns
+    except FileNotFoundError:
+        logger.warning(f"Soundscape directory not found: {soundscape_dir}")
+        return None
+    
+    candidates = _soundscape_candidates(soundscape_dir, soundscape_type.lower(), dir_mtime_ns)
+    if not candidates:
+        return None
+    return (rng or random).choice(candidates)
@@ -11,14 +11,24 @@ from meditation_tts.utils.logging_utils import (
 from meditation_tts.utils.state_utils import (
     save_state,
     load_state,
-    get_latest_state_file
+    get_latest_state_file,
+    get_run_state_file
 )
 
+from meditation_tts.utils.json_utils import dumps_json, loads_json
+
+from meditation_tts.utils.time_utils import file_timestamp, timestamps
+
+from meditation_tts.utils.ledger import configure_ledger, get_ledger, ledgered
+
 from meditation_tts.utils.text_utils import (
     split_into_sentences,
+    extract_json_block,
     detect_breathing_pattern
 )
 
+from meditation_tts.utils.ssml_utils import autofix_ssml, validate_ssml
+
 __all__ = [
     'log_state_transition',
     'log_llm_interaction',
@@ -26,6 +36,17 @@ __all__ = [
     'save_state',
     'load_state',
     'get_latest_state_file',
+    'get_run_state_file',
+    'dumps_json',
+    'loads_json',
+    'file_timestamp',
+    'timestamps',
+    'configure_ledger',
+    'get_ledger',
+    'ledgered',
     'split_into_sentences',
-    'detect_breathing_pattern'
+    'extract_json_block',
+    'detect_breathing_pattern',
+    'autofix_ssml',
+    'validate_ssml'
 ]
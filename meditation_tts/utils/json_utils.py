@@ -0,0 +1,44 @@
+"""
+JSON serialization helpers for the meditation TTS system.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+
+def dumps_json(obj: Any, indent: bool = False,
+               default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON, using orjson when it is installed.
+    
+    Args:
+        obj: The object to serialize
+        indent: Pretty-print with a two-space indent
+        default: Optional converter for objects JSON can't represent (e.g. str)
+        
+    Returns:
+        bytes: The encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, default=default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), default=default).encode("utf-8")
+
+def loads_json(data: bytes) -> Any:
+    """
+    Parse a JSON document, using orjson when it is installed.
+    
+    Args:
+        data: The encoded JSON document
+        
+    Returns:
+        Any: The decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,218 @@
+"""
+Append-only ledger of completed workflow steps for idempotent reruns.
+
+Each entry maps a fingerprint of a step's inputs (the request plus the
+outputs of the earlier steps) to the fields the step wrote. When the ledger
+is enabled, a step whose fingerprint is already recorded is skipped and its
+recorded outputs are merged into the state instead.
+"""
+
+import os
+import json
+import hashlib
+import inspect
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from meditation_tts.config.constants import LEDGER_FILE, STEP_OUTPUT_KEYS, WORKFLOW_STEPS
+from meditation_tts.utils.json_utils import dumps_json, loads_json
+from meditation_tts.utils.logging_utils import logger
+
+LEDGER_MODES = ("off", "on", "refresh")
+
+_ledger_mode = "off"
+
+def configure_ledger(mode: Optional[str] = None) -> str:
+    """
+    Set how workflow steps use the ledger.
+    
+    Args:
+        mode: "off" (default) ignores the ledger, "on" reuses recorded steps
+            and records new ones, "refresh" reruns every step and records it
+            again; defaults to the WORKFLOW_LEDGER environment variable
+            
+    Returns:
+        str: The ledger mode actually in effect
+    """
+    global _ledger_mode
+    mode = (mode or os.environ.get("WORKFLOW_LEDGER", "off")).lower()
+    if mode not in LEDGER_MODES:
+        logger.warning(f"Unknown WORKFLOW_LEDGER mode '{mode}', ledger disabled")
+        mode = "off"
+    _ledger_mode = mode
+    return mode
+
+def step_fingerprint(step: str, state: Dict[str, Any]) -> str:
+    """
+    Hash the inputs of a workflow step.
+    
+    Args:
+        step: The workflow step name
+        state: The state the step is about to run on
+        
+    Returns:
+        str: Hex SHA-256 of the request and the earlier steps' outputs
+    """
+    input_keys = sorted({
+        key
+        for prev_step in WORKFLOW_STEPS[:WORKFLOW_STEPS.index(step)]
+        for key in STEP_OUTPUT_KEYS[prev_step]
+    })
+    payload = {
+        "step": step,
+        "request": state.get("request"),
+        "inputs": {key: state.get(key) for key in input_keys}
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class WorkflowLedger:
+    """JSONL ledger of step outputs keyed by input fingerprint."""
+    
+    def __init__(self, path: str = LEDGER_FILE):
+        """
+        Initialize the ledger.
+        
+        Args:
+            path: Path to the ledger file
+        """
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = loads_json(line)
+                        except ValueError:
+                            logger.warning(f"Skipping malformed ledger line in {self.path}")
+                            continue
+                        # Later records override earlier ones (e.g. after a refresh)
+                        entries[record["key"]] = record["outputs"]
+            self._entries = entries
+        return self._entries
+        
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the recorded outputs for a fingerprint.
+        
+        Args:
+            key: The step fingerprint
+            
+        Returns:
+            Optional[Dict[str, Any]]: The recorded outputs, or None if not recorded
+        """
+        with self._lock:
+            return self._load().get(key)
+            
+    def record(self, key: str, step: str, outputs: Dict[str, Any]) -> None:
+        """
+        Append a step's outputs to the ledger.
+        
+        Args:
+            key: The step fingerprint
+            step: The workflow step name
+            outputs: The fields the step wrote
+        """
+        line = dumps_json({"key": key, "step": step, "outputs": outputs}, default=str) + b"\n"
+        with self._lock:
+            self._load()[key] = outputs
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(line)
+
+@functools.lru_cache(maxsize=1)
+def get_ledger() -> WorkflowLedger:
+    """
+    Get the shared workflow ledger.
+    
+    Returns:
+        WorkflowLedger: The ledger backed by LEDGER_FILE
+    """
+    return WorkflowLedger()
+
+# Keys of audio_output that hold file paths written by the audio steps
+AUDIO_OUTPUT_PATH_KEYS = ("voice_file", "full_audio", "sample_audio", "json_file")
+
+def _outputs_still_valid(outputs: Dict[str, Any]) -> bool:
+    # Recorded audio outputs point at files, which may have been cleaned up since
+    audio_output = outputs.get("audio_output") or {}
+    return all(
+        os.path.exists(audio_output[name])
+        for name in AUDIO_OUTPUT_PATH_KEYS
+        if isinstance(audio_output.get(name), str)
+    )
+
+def _lookup(step: str, state: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """
+    Check the ledger for a step about to run.
+    
+    Args:
+        step: The workflow step name
+        state: The state the step is about to run on
+        
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the recorded outputs were merged into
+            the state, and the fingerprint to record under (None if not recording)
+    """
+    if _ledger_mode == "off" or state.get("error"):
+        return False, None
+        
+    key = step_fingerprint(step, state)
+    if _ledger_mode == "on":
+        outputs = get_ledger().get(key)
+        if outputs is not None and _outputs_still_valid(outputs):
+            logger.info(f"Ledger hit for step {step}, skipping it")
+            state.update(outputs)
+            return True, None
+    return False, key
+
+def _record(step: str, key: Optional[str], state: Dict[str, Any]) -> None:
+    if key is None or state.get("error"):
+        return
+    outputs = {name: state[name] for name in STEP_OUTPUT_KEYS[step] if name in state}
+    get_ledger().record(key, step, outputs)
+
+def ledgered(step: str) -> Callable:
+    """
+    Decorate a workflow node so it consults the ledger before running.
+    
+    Works for both sync and async node functions.
+    
+    Args:
+        step: The workflow step the node implements
+        
+    Returns:
+        Callable: The decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(state):
+                hit, key = _lookup(step, state)
+                if hit:
+                    return state
+                state = await func(state)
+                _record(step, key, state)
+                return state
+            return async_wrapper
+            
+        @functools.wraps(func)
+        def wrapper(state):
+            hit, key = _lookup(step, state)
+            if hit:
+                return state
+            state = func(state)
+            _record(step, key, state)
+            return state
+        return wrapper
+    return decorator
+
+configure_ledger()
@@ -3,34 +3,73 @@ Logging utilities for the meditation TTS system.
 """
 
 import os
-import json
+import queue
+import atexit
 import logging
-from datetime import datetime
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Iterable, Optional
+
+from meditation_tts.utils.json_utils import dumps_json
+from meditation_tts.utils.time_utils import timestamps
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# File writes happen on a background listener thread; callers only enqueue.
+# QueueHandler formats records before enqueueing them, so the file handler
+# keeps the default message-only formatter.
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.FileHandler("meditation_workflow.log"))
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler("meditation_workflow.log"),
+        QueueHandler(_log_queue),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger('meditation_tts')
 
-def log_state_transition(current_step: str, state: Dict[str, Any]) -> None:
-    """Log detailed information about the current state of the workflow."""
+# Single writer thread for the per-interaction detail files
+_detail_log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-log-writer")
+
+def _write_detail_log(path: str, data: bytes) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logger.error(f"Error writing detailed log {path}: {str(e)}")
+
+def log_state_transition(current_step: str, state: Dict[str, Any],
+                         keys: Optional[Iterable[str]] = None) -> None:
+    """
+    Log the workflow step, and a summary of the state at DEBUG level.
+    
+    Args:
+        current_step: Name of the step being entered or completed
+        state: The current workflow state
+        keys: Only summarize these state fields; defaults to all of them
+    """
     logger.info(f"===== STEP: {current_step} =====")
     
+    # Building and serializing the summary is wasted work unless DEBUG is enabled
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    
     # Log only the essential state information without huge content
     state_log = {}
-    for key, value in state.items():
+    fields = state.items() if keys is None else ((key, state[key]) for key in keys if key in state)
+    for key, value in fields:
         if key == "meditation_script" and value:
             state_log[key] = {"length": len(value.get("content", "")), "sections": len(value.get("sections", []))}
         elif key == "prosody_analysis" and value:
             state_log[key] = {"overall_tone": value.get("overall_tone", ""), "key_terms_count": len(value.get("key_terms", []))}
-        elif key == "prosody_profile" and value:
+        elif key in ("prosody_profile", "prefetched_profile") and value:
             state_log[key] = {"base_rate": value.get("rate", {}).get("base_rate", "") if isinstance(value.get("rate"), dict) else ""}
         elif key == "ssml_output" and value:
             state_log[key] = {"length": len(value), "has_speak_tag": "<speak>" in value and "</speak>" in value}
@@ -39,31 +78,50 @@ def log_state_transition(current_step: str, state: Dict[str, Any]) -> None:
         else:
             state_log[key] = value
     
-    logger.info(f"State summary: {json.dumps(state_log, indent=2)}")
+    logger.debug(f"State summary: {dumps_json(state_log, default=str).decode()}")
 
-def log_llm_interaction(prompt: str, response_content: str, model: str, purpose: str) -> None:
-    """Log details of an LLM interaction."""
-    logger.info(f"LLM Interaction: {purpose}")
-    logger.info(f"Model: {model}")
+def log_llm_interaction(prompt: str, response_content: str, model: str, purpose: str,
+                        usage_metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Log details of an LLM interaction.
     
-    # Log truncated versions of prompt and response
-    prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
-    response_preview = response_content[:500] + "..." if len(response_content) > 500 else response_content
-    
-    logger.info(f"Prompt preview: {prompt_preview}")
-    logger.info(f"Response preview: {response_preview}")
+    Args:
+        prompt: The prompt sent to the model
+        response_content: The model's response
+        model: The model name
+        purpose: What the call was for, also used in the detail file name
+        usage_metadata: Token usage reported with the response, if any
+    """
+    info_enabled = logger.isEnabledFor(logging.INFO)
+    if info_enabled:
+        logger.info(f"LLM Interaction: {purpose}")
+        logger.info(f"Model: {model}")
+        if usage_metadata:
+            # Prompt tokens served from the provider's prefix cache
+            cache_read = (usage_metadata.get("input_token_details") or {}).get("cache_read", 0)
+            logger.info(f"Input tokens: {usage_metadata.get('input_tokens', 0)} ({cache_read} cached)")
+        
+        # Log truncated versions of prompt and response
+        prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
+        response_preview = response_content[:500] + "..." if len(response_content) > 500 else response_content
+        
+        logger.info(f"Prompt preview: {prompt_preview}")
+        logger.info(f"Response preview: {response_preview}")
     
     # Also log the full interaction to a separate file for detailed analysis
-    detailed_log_path = f"logs/llm_interactions/{datetime.now().strftime('%Y%m%d_%H%M%S')}_{purpose.replace(' ', '_')}.json"
-    os.makedirs(os.path.dirname(detailed_log_path), exist_ok=True)
-    
-    with open(detailed_log_path, 'w') as f:
-        json.dump({
-            "purpose": purpose,
-            "model": model,
-            "timestamp": datetime.now().isoformat(),
-            "prompt": prompt,
-            "response": response_content
-        }, f, indent=2)
+    # (written regardless of the log level)
+    # Serialize now, write on the background thread
+    file_ts, iso_ts = timestamps()
+    detailed_log_path = f"logs/llm_interactions/{file_ts}_{purpose.replace(' ', '_')}.json"
+    data = dumps_json({
+        "purpose": purpose,
+        "model": model,
+        "timestamp": iso_ts,
+        "prompt": prompt,
+        "response": response_content,
+        "usage": usage_metadata
+    }, indent=True, default=str)
+    _detail_log_executor.submit(_write_detail_log, detailed_log_path, data)
     
-    logger.info(f"Detailed log saved to: {detailed_log_path}") 
\ No newline at end of file
+    if info_enabled:
+        logger.info(f"Detailed log queued for: {detailed_log_path}") 
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+SSML validation utilities for the meditation TTS system.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+
+# Tags AWS Polly Neural voices accept
+NEURAL_SUPPORTED_TAGS = {
+    "speak", "break", "prosody", "p", "s", "say-as", "phoneme", "w", "lang", "mark", "sub"
+}
+
+BREAK_TIME_RE = re.compile(r'^(\d+(?:\.\d+)?)(ms|s)$')
+PERCENT_RE = re.compile(r'^([+-]?\d+(?:\.\d+)?)%$')
+DECIBEL_RE = re.compile(r'^[+-]?\d+(?:\.\d+)?dB$')
+
+BREAK_STRENGTHS = {"none", "x-weak", "weak", "medium", "strong", "x-strong"}
+RATE_KEYWORDS = {"x-slow", "slow", "medium", "fast", "x-fast"}
+PITCH_KEYWORDS = {"default", "x-low", "low", "medium", "high", "x-high"}
+VOLUME_KEYWORDS = {"default", "silent", "x-soft", "soft", "medium", "loud", "x-loud"}
+
+# Patterns for the mechanical repairs in autofix_ssml
+TAG_RE = re.compile(r'<(/?)([A-Za-z][\w:.-]*)([^>]*?)(/?)>')
+UNITLESS_PERCENT_ATTR_RE = re.compile(r'\b(rate|pitch)="([+-]?\d+(?:\.\d+)?)"')
+UNITLESS_VOLUME_RE = re.compile(r'\bvolume="([+-]?\d+(?:\.\d+)?)"')
+UNITLESS_BREAK_RE = re.compile(r'(<break\b[^>]*?\btime=")(\d+(?:\.\d+)?)"')
+PERCENT_ATTR_RE = re.compile(r'\b(rate|pitch)="([+-]?\d+(?:\.\d+)?)%"')
+BREAK_TIME_ATTR_RE = re.compile(r'(<break\b[^>]*?\btime=")(\d+(?:\.\d+)?)(ms|s)"')
+AMAZON_TAG_RE = re.compile(r'</?amazon:[^>]*>')
+PHONATION_TAG_RE = re.compile(r'</?phonation\b[^>]*>')
+EMPHASIS_OPEN_RE = re.compile(r'<emphasis\b[^>]*?(/?)>')
+BARE_AMPERSAND_RE = re.compile(r'&(?!(?:[A-Za-z]+|#\d+|#x[0-9A-Fa-f]+);)')
+
+# Polly's documented limits
+MAX_BREAK_MS = 10000
+RATE_PERCENT_RANGE = (20.0, 200.0)
+PITCH_PERCENT_RANGE = (-33.3, 50.0)
+
+SPEAK_OPEN = "<speak>"
+SPEAK_CLOSE = "</speak>"
+XML_FENCE = "```xml"
+
+def find_speak_block(content: str) -> Optional[str]:
+    """
+    Find the first complete <speak> element in an LLM response.
+    
+    Uses two linear str.find scans instead of a lazy DOTALL regex.
+    
+    Args:
+        content: The LLM response
+        
+    Returns:
+        Optional[str]: The <speak> element, or None if there is none
+    """
+    start = content.find(SPEAK_OPEN)
+    if start == -1:
+        return None
+    end = content.find(SPEAK_CLOSE, start)
+    if end == -1:
+        return None
+    return content[start:end + len(SPEAK_CLOSE)]
+
+def find_fenced_speak_block(content: str) -> Optional[str]:
+    """
+    Find a <speak> element inside a ```xml code block of an LLM response.
+    
+    Args:
+        content: The LLM response
+        
+    Returns:
+        Optional[str]: The <speak> element, or None if there is no fenced one
+    """
+    fence = content.find(XML_FENCE)
+    if fence == -1:
+        return None
+    body_start = fence + len(XML_FENCE)
+    fence_end = content.find("```", body_start)
+    return find_speak_block(content[body_start:fence_end if fence_end != -1 else len(content)])
+
+def _check_break(element: ET.Element, issues: List[str]) -> None:
+    time_value = element.get("time")
+    if time_value is not None:
+        match = BREAK_TIME_RE.match(time_value)
+        if not match:
+            issues.append(f'<break> time "{time_value}" needs a number with ms or s')
+        else:
+            amount = float(match.group(1)) * (1 if match.group(2) == "ms" else 1000)
+            if amount > MAX_BREAK_MS:
+                issues.append(f'<break> time "{time_value}" exceeds 10s')
+    strength = element.get("strength")
+    if strength is not None and strength not in BREAK_STRENGTHS:
+        issues.append(f'<break> strength "{strength}" is not supported')
+
+def _check_percent(attribute: str, value: str, value_range: Tuple[float, float], issues: List[str]) -> None:
+    match = PERCENT_RE.match(value)
+    if not match:
+        issues.append(f'<prosody> {attribute} "{value}" is not a keyword or percentage')
+        return
+    low, high = value_range
+    amount = float(match.group(1))
+    # Rates are absolute percentages, pitch is relative to the voice's default
+    if attribute == "rate" and match.group(1)[0] in "+-":
+        issues.append(f'<prosody> rate "{value}" must not be signed')
+    elif not low <= amount <= high:
+        issues.append(f'<prosody> {attribute} "{value}" is outside {low:g}% to {high:g}%')
+
+def _check_prosody(element: ET.Element, issues: List[str]) -> None:
+    rate = element.get("rate")
+    if rate is not None and rate not in RATE_KEYWORDS:
+        _check_percent("rate", rate, RATE_PERCENT_RANGE, issues)
+    pitch = element.get("pitch")
+    if pitch is not None and pitch not in PITCH_KEYWORDS:
+        _check_percent("pitch", pitch, PITCH_PERCENT_RANGE, issues)
+    volume = element.get("volume")
+    if volume is not None and volume not in VOLUME_KEYWORDS and not DECIBEL_RE.match(volume):
+        issues.append(f'<prosody> volume "{volume}" is not a keyword or dB value')
+
+def validate_ssml(ssml: str) -> Tuple[bool, List[str]]:
+    """
+    Check SSML for problems the review step would otherwise fix, without an LLM call.
+
+    Parses the markup to catch unbalanced or misnested tags, then checks tags
+    against those AWS Polly Neural voices support and attribute values against
+    Polly's formats and ranges.
+
+    Args:
+        ssml: The SSML document
+
+    Returns:
+        Tuple[bool, List[str]]: Whether the SSML passed, and the issues found
+    """
+    try:
+        root = ET.fromstring(ssml.strip())
+    except ET.ParseError as e:
+        # Also catches amazon:* tags, whose namespace is never declared
+        return False, [f"Invalid XML: {str(e)}"]
+
+    issues = []
+    if root.tag != "speak":
+        issues.append(f"Root element is <{root.tag}>, not <speak>")
+
+    for element in root.iter():
+        if element.tag not in NEURAL_SUPPORTED_TAGS:
+            issues.append(f"<{element.tag}> is not supported by Neural voices")
+        elif element.tag == "break":
+            _check_break(element, issues)
+        elif element.tag == "prosody":
+            _check_prosody(element, issues)
+
+    return not issues, issues
+
+def _balance_tags(ssml: str) -> str:
+    """
+    Drop stray closing tags and close unclosed or misnested ones.
+    
+    Args:
+        ssml: The SSML markup
+        
+    Returns:
+        str: The markup with every tag balanced and properly nested
+    """
+    parts = []
+    stack = []
+    position = 0
+    for match in TAG_RE.finditer(ssml):
+        parts.append(ssml[position:match.start()])
+        position = match.end()
+        closing, name, _, self_closing = match.groups()
+        if self_closing:
+            parts.append(match.group(0))
+        elif not closing:
+            stack.append(name)
+            parts.append(match.group(0))
+        elif name in stack:
+            # Close anything left open inside this element first
+            while stack:
+                open_name = stack.pop()
+                parts.append(f"</{open_name}>")
+                if open_name == name:
+                    break
+        # Closing tags with no matching opening tag are dropped
+    parts.append(ssml[position:])
+    parts.extend(f"</{name}>" for name in reversed(stack))
+    return "".join(parts)
+
+def _add_percent_unit(match: re.Match) -> str:
+    attribute, raw = match.group(1), match.group(2)
+    value = float(raw)
+    # An unsigned rate below Polly's minimum percentage is a multiplier like 1.2
+    if attribute == "rate" and raw[0] not in "+-" and value < RATE_PERCENT_RANGE[0]:
+        return f'rate="{value * 100:g}%"'
+    return f'{attribute}="{raw}%"'
+
+def _clamp_percent(match: re.Match) -> str:
+    attribute, raw = match.group(1), match.group(2)
+    value = float(raw)
+    low, high = RATE_PERCENT_RANGE if attribute == "rate" else PITCH_PERCENT_RANGE
+    if attribute == "rate" and raw[0] in "+-":
+        # Polly rates are absolute, so a signed rate is read relative to 100%
+        value += 100
+    elif low <= value <= high:
+        return match.group(0)
+    value = min(max(value, low), high)
+    sign = "+" if attribute == "pitch" and value > 0 else ""
+    return f'{attribute}="{sign}{value:g}%"'
+
+def _add_break_unit(match: re.Match) -> str:
+    # A pause of a few milliseconds is never what was meant, so small values are seconds
+    unit = "s" if float(match.group(2)) <= MAX_BREAK_MS / 1000 else "ms"
+    return f'{match.group(1)}{match.group(2)}{unit}"'
+
+def _clamp_break(match: re.Match) -> str:
+    milliseconds = float(match.group(2)) * (1 if match.group(3) == "ms" else 1000)
+    if milliseconds <= MAX_BREAK_MS:
+        return match.group(0)
+    return f'{match.group(1)}{MAX_BREAK_MS // 1000}s"'
+
+def autofix_ssml(ssml: str) -> str:
+    """
+    Repair the mechanical SSML defects validate_ssml reports, without an LLM call.
+    
+    Adds missing % and time units, turns <emphasis> into a slight prosody change,
+    strips amazon:* and phonation tags, escapes bare ampersands, clamps values
+    to Polly's limits and balances the tags.
+    
+    Args:
+        ssml: The SSML document
+        
+    Returns:
+        str: The repaired SSML document
+    """
+    ssml = ssml.strip()
+    ssml = AMAZON_TAG_RE.sub("", ssml)
+    ssml = PHONATION_TAG_RE.sub("", ssml)
+    ssml = EMPHASIS_OPEN_RE.sub(lambda m: "" if m.group(1) else '<prosody rate="95%">', ssml)
+    ssml = ssml.replace("</emphasis>", "</prosody>")
+    ssml = UNITLESS_PERCENT_ATTR_RE.sub(_add_percent_unit, ssml)
+    ssml = UNITLESS_VOLUME_RE.sub(r'volume="\1dB"', ssml)
+    ssml = UNITLESS_BREAK_RE.sub(_add_break_unit, ssml)
+    ssml = BARE_AMPERSAND_RE.sub("&amp;", ssml)
+    ssml = PERCENT_ATTR_RE.sub(_clamp_percent, ssml)
+    ssml = BREAK_TIME_ATTR_RE.sub(_clamp_break, ssml)
+    
+    if not ssml.startswith("<speak"):
+        ssml = f"<speak>{ssml}</speak>"
+    return _balance_tags(ssml)
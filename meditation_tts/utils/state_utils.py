@@ -3,58 +3,237 @@ State management utilities for the meditation TTS system.
 """
 
 import os
-import json
+import re
+import uuid
 import logging
-from datetime import datetime
-from typing import Dict, Optional, Any
+import functools
+from typing import Dict, Optional, Any, Tuple
 
-from meditation_tts.config.constants import STATE_DIR, WORKFLOW_STEPS
+try:
+    import msgpack
+except ImportError:  # optional, state files are written as JSON without it
+    msgpack = None
+
+from meditation_tts.config.constants import (
+    STATE_DIR,
+    WORKFLOW_STEPS,
+    STEP_OUTPUT_KEYS,
+    FULL_STATE_SNAPSHOT_INTERVAL
+)
 from meditation_tts.models.state import GraphState
+from meditation_tts.utils.json_utils import dumps_json, loads_json
+from meditation_tts.utils.time_utils import file_timestamp
 
 logger = logging.getLogger('meditation_tts')
 
-def save_state(state: GraphState, step: str) -> str:
+# Format tag written as the first byte of MessagePack state files. JSON state
+# files are untagged (they always start with "{"), so older files stay readable.
+STATE_FORMAT_MSGPACK = b"\x01"
+STATE_FILE_EXTENSION = ".msgpack" if msgpack is not None else ".json"
+
+def serialize_state(state: Dict[str, Any], indent: bool = False) -> bytes:
+    """
+    Encode a state payload, as tagged MessagePack when msgpack is installed.
+    
+    Args:
+        state: The state (or state delta) to encode
+        indent: Pretty-print when falling back to JSON
+        
+    Returns:
+        bytes: The encoded payload
+    """
+    if msgpack is not None:
+        return STATE_FORMAT_MSGPACK + msgpack.packb(state, use_bin_type=True)
+    return dumps_json(state, indent=indent)
+
+def deserialize_state(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a state payload written by serialize_state.
+    
+    Args:
+        data: The encoded payload
+        
+    Returns:
+        Dict[str, Any]: The decoded state
+        
+    Raises:
+        ValueError: If the payload is MessagePack but msgpack is not installed
+    """
+    if data[:1] == STATE_FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("State file is MessagePack-encoded but msgpack is not installed")
+        return msgpack.unpackb(data[1:], raw=False)
+    return loads_json(data)
+
+# Fields carried by every delta file so it can be inspected on its own
+DELTA_COMMON_KEYS = ("request", "current_step", "error", "run_id")
+
+def save_state(state: GraphState, step: str, *, full: bool = False) -> str:
     """
-    Save the current state to a JSON file.
+    Save the current state to a state file (MessagePack if available, else JSON).
+    
+    Intermediate steps only write the fields they produced (plus the request,
+    current step, error and run ID); load_state rebuilds the full state from
+    the same run's earlier files, so a step whose predecessor has no file in
+    this run is saved in full. The run ID is assigned on the first save
+    and is part of the file name. Every FULL_STATE_SNAPSHOT_INTERVAL-th
+    step, the terminal step, or full=True writes the whole state, which
+    bounds how many files a load has to merge.
     
     Args:
         state: The current workflow state
         step: The workflow step name
+        full: Write the whole state instead of the step's delta
         
     Returns:
         str: Path to the saved state file
     """
     os.makedirs(STATE_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"state_{step}_{timestamp}.json"
+    run_id = state.get("run_id")
+    if not run_id:
+        run_id = state["run_id"] = uuid.uuid4().hex
+    timestamp = file_timestamp()
+    filename = f"state_{step}_{timestamp}_{run_id}{STATE_FILE_EXTENSION}"
     filepath = os.path.join(STATE_DIR, filename)
     
-    with open(filepath, 'w') as f:
-        json.dump(state, f, indent=2)
+    if (full or step == WORKFLOW_STEPS[-1] or step not in STEP_OUTPUT_KEYS
+            or (WORKFLOW_STEPS.index(step) + 1) % FULL_STATE_SNAPSHOT_INTERVAL == 0
+            or not _has_previous_step_file(step, run_id)):
+        data = serialize_state(state)
+    else:
+        keys = DELTA_COMMON_KEYS + tuple(STEP_OUTPUT_KEYS[step])
+        delta = {key: state[key] for key in keys if key in state}
+        delta["delta_step"] = step
+        data = serialize_state(delta)
     
+    with open(filepath, 'wb') as f:
+        f.write(data)
+    
+    # The directory mtime may not change between two writes on filesystems
+    # with coarse timestamps, so drop the cached scans explicitly
+    _scan_latest_state_files.cache_clear()
     return filepath
 
+def _has_previous_step_file(step: str, run_id: str) -> bool:
+    # A run that started mid-workflow (or had its run ID just assigned) has
+    # nothing on disk for load_state to rebuild a delta from
+    index = WORKFLOW_STEPS.index(step)
+    return index > 0 and get_run_state_file(WORKFLOW_STEPS[index - 1], run_id) is not None
+
+def _read_state_file(filepath: str) -> Dict[str, Any]:
+    with open(filepath, 'rb') as f:
+        return deserialize_state(f.read())
+
 def load_state(filepath: str) -> Optional[GraphState]:
     """
-    Load state from a JSON file.
+    Load state from a state file.
+    
+    Delta files are merged on top of the latest files the same run wrote for
+    the preceding steps, back to the nearest full state.
     
     Args:
         filepath: Path to the state file
         
     Returns:
-        Optional[GraphState]: The loaded state or None if loading failed
+        Optional[GraphState]: The loaded state or None if loading failed,
+            including when an earlier file of the run is missing
     """
     try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        data = _read_state_file(filepath)
+        delta_step = data.pop("delta_step", None)
+        if delta_step not in WORKFLOW_STEPS:
+            return data
+        
+        run_id = data.get("run_id")
+        if not run_id:
+            logger.error(f"Delta state file {filepath} has no run ID to find its earlier steps by")
+            return None
+        
+        layers = [data]
+        for prev_step in reversed(WORKFLOW_STEPS[:WORKFLOW_STEPS.index(delta_step)]):
+            prev_file = get_run_state_file(prev_step, run_id)
+            if not prev_file:
+                logger.error(f"Cannot rebuild {filepath}: run {run_id} has no state file for step {prev_step}")
+                return None
+            prev_data = _read_state_file(prev_file)
+            is_delta = prev_data.pop("delta_step", None) is not None
+            layers.append(prev_data)
+            if not is_delta:
+                break
+        
+        state = {}
+        for layer in reversed(layers):
+            state.update(layer)
+        return state
     except Exception as e:
         logger.error(f"Error loading state from {filepath}: {str(e)}")
         return None
 
+# Matches state_<step>_<timestamp>[_<run id>].<ext>, preferring the longest step name
+_STATE_FILE_RE = re.compile(
+    r"state_(" + "|".join(map(re.escape, sorted(WORKFLOW_STEPS, key=len, reverse=True))) + r")_"
+    r"(?:.*_([0-9a-f]{32})\.\w+$)?"
+)
+
+@functools.lru_cache(maxsize=32)
+def _scan_latest_state_files(state_dir: str, dir_mtime_ns: int) -> Tuple[Dict[str, str], Dict[Tuple[str, str], str]]:
+    """
+    Find the newest state file of each step, and of each step per run, in a single directory pass.
+    
+    Cached on the directory's mtime, which changes whenever a file is added
+    or removed, so repeated lookups in a process skip the scan. save_state
+    also clears the cache after every write.
+    
+    Args:
+        state_dir: The state directory
+        dir_mtime_ns: Modification time of the directory, used as cache key
+        
+    Returns:
+        Tuple of the path of the newest state file for each step that has one,
+        and for each (step, run ID) pair that has one
+    """
+    newest = {}
+    newest_by_run = {}
+    with os.scandir(state_dir) as it:
+        for entry in it:
+            match = _STATE_FILE_RE.match(entry.name)
+            if not match:
+                continue
+            key = (entry.stat().st_mtime_ns, entry.name)
+            step, run_id = match.groups()
+            if step not in newest or key > newest[step][0]:
+                newest[step] = (key, entry.path)
+            if run_id and ((step, run_id) not in newest_by_run or key > newest_by_run[step, run_id][0]):
+                newest_by_run[step, run_id] = (key, entry.path)
+    return (
+        {step: path for step, (_, path) in newest.items()},
+        {step_run: path for step_run, (_, path) in newest_by_run.items()}
+    )
+
+def get_run_state_file(step: str, run_id: str) -> Optional[str]:
+    """
+    Get the path to the latest state file a run wrote for a step.
+    
+    Args:
+        step: The workflow step
+        run_id: The run ID stored in the state
+        
+    Returns:
+        Optional[str]: Path to the state file or None if the run has none for the step
+    """
+    try:
+        dir_mtime_ns = os.stat(STATE_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    _, latest_by_run = _scan_latest_state_files(STATE_DIR, dir_mtime_ns)
+    return latest_by_run.get((step, run_id))
+
 def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
     """
     Get the path to the latest state file, optionally filtered by step.
     
+    Without a step, returns the latest file of the furthest step in the workflow.
+    
     Args:
         step: Optional workflow step to filter by
         
@@ -62,56 +241,32 @@ def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
         Optional[str]: Path to the latest state file or None if not found
     """
     try:
-        if not os.path.exists(STATE_DIR):
+        try:
+            dir_mtime_ns = os.stat(STATE_DIR).st_mtime_ns
+        except FileNotFoundError:
             logger.warning(f"State directory does not exist: {STATE_DIR}")
             return None
             
         logger.info(f"Looking for latest state file{f' for step {step}' if step else ''}")
+        latest_files, _ = _scan_latest_state_files(STATE_DIR, dir_mtime_ns)
         
-        # List all state files
-        all_files = [f for f in os.listdir(STATE_DIR) if f.startswith("state_")]
-        logger.info(f"Found {len(all_files)} total state files")
-        
-        if not all_files:
-            logger.warning("No state files found")
-            return None
-            
-        # Filter by step if requested
         if step:
-            # Match the exact step (state_step_timestamp.json format)
-            matching_files = [f for f in all_files if f.startswith(f"state_{step}_")]
-            if not matching_files:
+            latest_file = latest_files.get(step)
+            if not latest_file:
                 logger.warning(f"No state files found for step: {step}")
                 return None
-                
-            logger.info(f"Found {len(matching_files)} state files for step {step}")
-            
-            # Sort by timestamp in filename (most recent last)
-            latest_file = sorted(matching_files)[-1]
             logger.info(f"Latest state file for step {step}: {latest_file}")
-            return os.path.join(STATE_DIR, latest_file)
-        else:
-            # Get all steps in order
-            step_prefixes = [f"state_{s}_" for s in WORKFLOW_STEPS]
-            
-            # Find the latest file for each step
-            latest_step_files = []
-            for prefix in step_prefixes:
-                matching_files = [f for f in all_files if f.startswith(prefix)]
-                if matching_files:
-                    latest_step_files.append(sorted(matching_files)[-1])
-            
-            if not latest_step_files:
-                logger.warning("No matching state files found")
-                return None
-                
-            # Sort by step order in workflow
-            latest_file = sorted(latest_step_files, 
-                                key=lambda f: WORKFLOW_STEPS.index(f.split('_')[1]))[-1]
-            
-            logger.info(f"Latest overall state file: {latest_file}")
-            return os.path.join(STATE_DIR, latest_file)
+            return latest_file
+        
+        for workflow_step in reversed(WORKFLOW_STEPS):
+            if workflow_step in latest_files:
+                latest_file = latest_files[workflow_step]
+                logger.info(f"Latest overall state file: {latest_file}")
+                return latest_file
+        
+        logger.warning("No state files found")
+        return None
             
     except Exception as e:
         logger.error(f"Error finding latest state file: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
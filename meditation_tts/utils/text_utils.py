@@ -3,8 +3,15 @@ Text processing utilities for the meditation TTS system.
 """
 
 import re
+import functools
 from typing import List, Dict, Optional, Any
 
+import tiktoken
+
+# Patterns shared by the workflow nodes, compiled once at import
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+MARKUP_TAG_RE = re.compile(r'<[^>]+>')
+
 def split_into_sentences(text: str) -> List[str]:
     """
     Simple sentence splitter for text processing.
@@ -17,10 +24,100 @@ def split_into_sentences(text: str) -> List[str]:
     """
     # Split on periods, question marks, and exclamation points
     # but keep the punctuation with the sentence
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = SENTENCE_SPLIT_RE.split(text)
     # Filter out empty sentences
     return [s for s in sentences if s.strip()]
 
+def extract_json_block(content: str) -> Optional[str]:
+    """
+    Extract the first complete JSON object or array from an LLM response.
+    
+    Scans once, tracking bracket depth and skipping brackets inside strings,
+    so surrounding prose and code fences are left out and nested values are
+    kept whole.
+    
+    Args:
+        content: The LLM response content
+        
+    Returns:
+        Optional[str]: The JSON text, or None if the response has no complete block
+    """
+    start = None
+    depth = 0
+    in_string = False
+    escaped = False
+    
+    for i, char in enumerate(content):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char in '{[':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char in '}]' and depth:
+            depth -= 1
+            if depth == 0:
+                return content[start:i + 1]
+        elif char == '"' and depth:
+            in_string = True
+    
+    return None
+
+@functools.lru_cache(maxsize=None)
+def _token_encoding(model: str) -> Optional[Any]:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:  # unknown model or encoding files unavailable offline
+        return None
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Cut text down to a token budget.
+    
+    Args:
+        text: The text to truncate
+        max_tokens: Maximum number of tokens to keep
+        model: Model whose tokenizer defines the budget
+        
+    Returns:
+        str: The text, truncated if it was over the budget
+    """
+    encoding = _token_encoding(model)
+    if encoding is None:
+        # Rough estimate of four characters per token
+        return text[:max_tokens * 4]
+    
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+# Breathing instruction phrases in priority order, with the pattern and phase
+# they indicate. "inhale for 4" also opens box breathing, but has always been
+# reported as 4-7-8, so box breathing has no inhale rule of its own.
+BREATHING_PHRASES = [
+    (("inhala por 4", "inhale for 4", "breathe in for 4"), "4-7-8", "inhale"),
+    (("mantén por 7", "hold for 7", "hold your breath for 7"), "4-7-8", "hold"),
+    (("exhala por 8", "exhale for 8", "breathe out for 8"), "4-7-8", "exhale"),
+    (("mantén por 4", "hold for 4", "hold your breath for 4"), "box_breathing", "hold_in"),
+    (("exhala por 4", "exhale for 4", "breathe out for 4"), "box_breathing", "exhale"),
+    (("respiración profunda", "deep breath", "deep breathing"), "deep_breathing", "inhale"),
+]
+
+# One alternation with a named group per rule, so a single scan of the
+# sentence finds every rule that applies. Each rule sits in a lookahead so the
+# matches are zero-width and may overlap; otherwise a lower-priority phrase
+# ("deep breath") could consume text a higher-priority one needs ("breathe in for 4").
+_BREATHING_PHRASE_RE = re.compile("|".join(
+    f"(?=(?P<rule{index}>" + "|".join(re.escape(phrase) for phrase in phrases) + "))"
+    for index, (phrases, _, _) in enumerate(BREATHING_PHRASES)
+))
+
 def detect_breathing_pattern(sentence: str) -> Optional[Dict[str, Any]]:
     """
     Detect breathing pattern instructions in a sentence.
@@ -31,47 +128,12 @@ def detect_breathing_pattern(sentence: str) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: Information about the detected breathing pattern or None
     """
-    sentence_lower = sentence.lower()
-    
-    # 4-7-8 breathing pattern
-    if any(phrase in sentence_lower for phrase in ["inhala por 4", "inhale for 4", "breathe in for 4"]):
-        return {
-            "type": "4-7-8",
-            "phase": "inhale"
-        }
-    elif any(phrase in sentence_lower for phrase in ["mantén por 7", "hold for 7", "hold your breath for 7"]):
-        return {
-            "type": "4-7-8",
-            "phase": "hold"
-        }
-    elif any(phrase in sentence_lower for phrase in ["exhala por 8", "exhale for 8", "breathe out for 8"]):
-        return {
-            "type": "4-7-8",
-            "phase": "exhale"
-        }
-    
-    # Box breathing pattern
-    elif any(phrase in sentence_lower for phrase in ["inhala por 4", "inhale for 4", "breathe in for 4"]):
-        return {
-            "type": "box_breathing",
-            "phase": "inhale"
-        }
-    elif any(phrase in sentence_lower for phrase in ["mantén por 4", "hold for 4", "hold your breath for 4"]):
-        return {
-            "type": "box_breathing",
-            "phase": "hold_in"
-        }
-    elif any(phrase in sentence_lower for phrase in ["exhala por 4", "exhale for 4", "breathe out for 4"]):
-        return {
-            "type": "box_breathing",
-            "phase": "exhale"
-        }
-    
-    # Deep breathing pattern
-    elif any(phrase in sentence_lower for phrase in ["respiración profunda", "deep breath", "deep breathing"]):
-        return {
-            "type": "deep_breathing",
-            "phase": "inhale"
-        }
+    rules = [int(match.lastgroup[len("rule"):]) for match in _BREATHING_PHRASE_RE.finditer(sentence.lower())]
+    if not rules:
+        return None
     
-    return None 
\ No newline at end of file
+    _, pattern_type, phase = BREATHING_PHRASES[min(rules)]
+    return {
+        "type": pattern_type,
+        "phase": phase
+    }
@@ -0,0 +1,35 @@
+"""
+Timestamp utilities for the meditation TTS system.
+"""
+
+import time
+from typing import Tuple
+
+def timestamps() -> Tuple[str, str]:
+    """
+    Get a file name timestamp and an ISO 8601 timestamp from one clock read.
+    
+    Both strings are formatted with time.strftime, which is cheaper than
+    datetime.now(), and describe the same instant.
+    
+    Returns:
+        Tuple[str, str]: (YYYYmmdd_HHMMSS_xxxx, YYYY-mm-ddTHH:MM:SS.ffffff)
+    """
+    now_ns = time.time_ns()
+    local = time.localtime(now_ns // 1_000_000_000)
+    file_ts = f"{time.strftime('%Y%m%d_%H%M%S', local)}_{now_ns & 0xFFFF:04x}"
+    iso_ts = f"{time.strftime('%Y-%m-%dT%H:%M:%S', local)}.{now_ns // 1000 % 1_000_000:06d}"
+    return file_ts, iso_ts
+
+def file_timestamp() -> str:
+    """
+    Get a timestamp for output file names.
+    
+    Uses time.strftime, which is cheaper than datetime.now().strftime, and adds
+    a short hex suffix from the nanosecond clock so files written within the
+    same second get distinct names.
+    
+    Returns:
+        str: Timestamp in the form YYYYmmdd_HHMMSS_xxxx
+    """
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{time.time_ns() & 0xFFFF:04x}"
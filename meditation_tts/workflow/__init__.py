@@ -2,16 +2,30 @@
 Workflow components for the meditation TTS system.
 """
 
-from meditation_tts.workflow.graph import create_workflow_graph
+from meditation_tts.workflow.graph import create_workflow_graph, get_compiled_workflow, get_checkpointer
 from meditation_tts.workflow.runner import (
     run_workflow_step,
+    resume_workflow,
     run_single_step,
-    run_meditation_generation
+    run_meditation_generation,
+    run_workflow_step_async,
+    run_single_step_async,
+    run_meditation_generation_async,
+    run_meditation_batch_async,
+    run_meditation_batch
 )
 
 __all__ = [
     'create_workflow_graph',
+    'get_compiled_workflow',
+    'get_checkpointer',
     'run_workflow_step',
+    'resume_workflow',
     'run_single_step',
-    'run_meditation_generation'
+    'run_meditation_generation',
+    'run_workflow_step_async',
+    'run_single_step_async',
+    'run_meditation_generation_async',
+    'run_meditation_batch_async',
+    'run_meditation_batch'
 ]
@@ -2,42 +2,78 @@
 LangGraph workflow configuration for the meditation TTS system.
 """
 
-from langgraph.graph import StateGraph, END
+import os
+import sqlite3
+import functools
 
-from meditation_tts.config.constants import WORKFLOW_STEPS
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # optional, provided by langgraph-checkpoint-sqlite
+    SqliteSaver = None
+
+from meditation_tts.config.constants import WORKFLOW_STEPS, CHECKPOINT_DB
 from meditation_tts.models.state import GraphState
+from meditation_tts.utils.logging_utils import logger
 from meditation_tts.workflow.nodes import (
     generate_meditation_script,
+    agenerate_meditation_script,
     analyze_prosody_needs,
+    aanalyze_prosody_needs,
+    fused_prosody_enabled,
     generate_prosody_profile,
+    agenerate_prosody_profile,
+    speculate_prosody_profile,
+    aspeculate_prosody_profile,
+    speculative_profiles_enabled,
     generate_ssml,
+    agenerate_ssml,
     review_and_improve_ssml,
     generate_meditation_audio,
-    mix_with_soundscape
+    agenerate_meditation_audio,
+    mix_with_soundscape,
+    select_soundscape
 )
 
-def create_workflow_graph() -> StateGraph:
+def create_workflow_graph(entry_step: str = WORKFLOW_STEPS[0]) -> StateGraph:
     """
     Create the workflow graph for the meditation TTS system.
     
+    Args:
+        entry_step: The workflow step the graph starts at
+        
     Returns:
         StateGraph: The configured workflow graph
     """
     # Create workflow graph
     workflow = StateGraph(GraphState)
     
-    # Add all nodes
-    workflow.add_node("generate_script", generate_meditation_script)
-    workflow.add_node("analyze_prosody", analyze_prosody_needs)
-    workflow.add_node("create_profile", generate_prosody_profile)
-    workflow.add_node("generate_ssml", generate_ssml)
+    # Add all nodes; the LLM nodes carry an async implementation that is used
+    # when the graph is run with ainvoke
+    workflow.add_node("generate_script", RunnableLambda(generate_meditation_script, afunc=agenerate_meditation_script))
+    workflow.add_node("analyze_prosody", RunnableLambda(analyze_prosody_needs, afunc=aanalyze_prosody_needs))
+    workflow.add_node("create_profile", RunnableLambda(generate_prosody_profile, afunc=agenerate_prosody_profile))
+    workflow.add_node("generate_ssml", RunnableLambda(generate_ssml, afunc=agenerate_ssml))
     workflow.add_node("review_and_improve_ssml", review_and_improve_ssml)
-    workflow.add_node("generate_audio", generate_meditation_audio)
+    workflow.add_node("generate_audio", RunnableLambda(generate_meditation_audio, afunc=agenerate_meditation_audio))
     workflow.add_node("mix_audio", mix_with_soundscape)
+    workflow.add_node("find_soundscape", select_soundscape)
     
     # Configure the workflow edges
     workflow.add_edge("generate_script", "analyze_prosody")
-    workflow.add_edge("analyze_prosody", "create_profile")
+    
+    # With speculation on, a profile based on the request alone is generated
+    # from the start alongside the script and analysis; create_profile waits
+    # for both branches and reuses it instead of making its own call
+    if speculative_profiles_enabled() and not fused_prosody_enabled() and entry_step in WORKFLOW_STEPS[:2]:
+        workflow.add_node("speculate_profile", RunnableLambda(speculate_prosody_profile, afunc=aspeculate_prosody_profile))
+        workflow.add_edge(START, "speculate_profile")
+        workflow.add_edge(["analyze_prosody", "speculate_profile"], "create_profile")
+    else:
+        workflow.add_edge("analyze_prosody", "create_profile")
+    
     workflow.add_edge("create_profile", "generate_ssml")
     workflow.add_edge("generate_ssml", "review_and_improve_ssml")
     workflow.add_edge("review_and_improve_ssml", "generate_audio")
@@ -45,6 +81,46 @@ def create_workflow_graph() -> StateGraph:
     workflow.add_edge("mix_audio", END)
     
     # Set entry point
-    workflow.set_entry_point(WORKFLOW_STEPS[0])
+    workflow.set_entry_point(entry_step)
+    
+    # Soundscape selection has no dependency on the LLM/TTS steps, so run it
+    # as a parallel branch from the start; its result is merged into the
+    # state through the soundscape_file reducer
+    if entry_step != "mix_audio":
+        workflow.add_edge(START, "find_soundscape")
+        workflow.add_edge("find_soundscape", END)
+    
+    return workflow
+
+@functools.lru_cache(maxsize=1)
+def get_checkpointer():
+    """
+    Get the shared SQLite checkpointer for checkpointed workflow runs.
     
-    return workflow 
\ No newline at end of file
+    Returns:
+        The SqliteSaver for CHECKPOINT_DB, or None if langgraph-checkpoint-sqlite is not installed
+    """
+    if SqliteSaver is None:
+        logger.warning("langgraph-checkpoint-sqlite is not installed, workflow checkpointing is disabled")
+        return None
+    os.makedirs(os.path.dirname(CHECKPOINT_DB), exist_ok=True)
+    return SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False))
+
+@functools.lru_cache(maxsize=None)
+def get_compiled_workflow(entry_step: str = WORKFLOW_STEPS[0], checkpointed: bool = False):
+    """
+    Get the compiled workflow graph for an entry step.
+    
+    Compiled graphs hold no per-run state, so one graph per entry step is built
+    and compiled on first use and reused by every later run.
+    
+    Args:
+        entry_step: The workflow step the graph starts at
+        checkpointed: Compile with the SQLite checkpointer, so runs invoked with a
+            thread_id are checkpointed after every step and can be resumed
+        
+    Returns:
+        The compiled workflow graph
+    """
+    checkpointer = get_checkpointer() if checkpointed else None
+    return create_workflow_graph(entry_step).compile(checkpointer=checkpointer)
@@ -2,20 +2,46 @@
 Workflow node functions for the meditation TTS system.
 """
 
-from meditation_tts.workflow.nodes.script_generation import generate_meditation_script
-from meditation_tts.workflow.nodes.prosody_analysis import analyze_prosody_needs
-from meditation_tts.workflow.nodes.profile_generation import generate_prosody_profile
-from meditation_tts.workflow.nodes.ssml_generation import generate_ssml
+from meditation_tts.workflow.nodes.script_generation import (
+    generate_meditation_script,
+    agenerate_meditation_script,
+    generate_meditation_scripts_batch
+)
+from meditation_tts.workflow.nodes.prosody_analysis import (
+    analyze_prosody_needs,
+    aanalyze_prosody_needs,
+    fused_prosody_enabled
+)
+from meditation_tts.workflow.nodes.profile_generation import (
+    generate_prosody_profile,
+    agenerate_prosody_profile,
+    speculate_prosody_profile,
+    aspeculate_prosody_profile,
+    speculative_profiles_enabled
+)
+from meditation_tts.workflow.nodes.ssml_generation import generate_ssml, agenerate_ssml, sectioned_ssml_enabled
 from meditation_tts.workflow.nodes.ssml_review import review_and_improve_ssml
-from meditation_tts.workflow.nodes.audio_generation import generate_meditation_audio
-from meditation_tts.workflow.nodes.audio_mixing import mix_with_soundscape
+from meditation_tts.workflow.nodes.audio_generation import generate_meditation_audio, agenerate_meditation_audio
+from meditation_tts.workflow.nodes.audio_mixing import mix_with_soundscape, select_soundscape
 
 __all__ = [
     'generate_meditation_script',
+    'agenerate_meditation_script',
+    'generate_meditation_scripts_batch',
     'analyze_prosody_needs',
-    'generate_prosody_profile', 
+    'aanalyze_prosody_needs',
+    'fused_prosody_enabled',
+    'generate_prosody_profile',
+    'agenerate_prosody_profile',
+    'speculate_prosody_profile',
+    'aspeculate_prosody_profile',
+    'speculative_profiles_enabled',
     'generate_ssml',
+    'agenerate_ssml',
+    'sectioned_ssml_enabled',
     'review_and_improve_ssml',
     'generate_meditation_audio',
-    'mix_with_soundscape'
+    'agenerate_meditation_audio',
+    'mix_with_soundscape',
+    'select_soundscape'
 ]
@@ -4,14 +4,51 @@ Audio generation node for the workflow.
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from meditation_tts.models.state import GraphState
-from meditation_tts.models.enums import VoiceType
 from meditation_tts.utils.logging_utils import log_state_transition, logger
+from meditation_tts.utils.ledger import ledgered
 from meditation_tts.config.constants import AUDIO_OUTPUT_DIR
-from meditation_tts.services.audio_generator import AudioGenerator
+from meditation_tts.services.audio_generator import AudioGenerator, get_audio_generator
 
+def _get_generator_and_voice(request: Dict[str, Any]) -> Tuple[AudioGenerator, str, str]:
+    """
+    Get the shared AudioGenerator and resolve the Polly voice for the request.
+    
+    Args:
+        request: The meditation request parameters
+        
+    Returns:
+        Tuple of the generator, the Polly voice ID and the language code
+    """
+    # Reuse the AudioGenerator (and its Polly client) across runs
+    generator = get_audio_generator(
+        aws_profile=os.environ.get('AWS_PROFILE'),
+        aws_region=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        output_dir=AUDIO_OUTPUT_DIR
+    )
+    
+    # Get the appropriate voice ID from the voice maps (memoized per combination)
+    language_code = request["language_code"]
+    voice_id = generator.get_voice_id(request["voice_type"], language_code)
+    return generator, voice_id, language_code
+
+def _apply_audio_result(state: GraphState, audio_file: Optional[str]) -> GraphState:
+    if audio_file:
+        state["audio_output"] = {
+            "voice_file": audio_file,
+            "status": "generated"
+        }
+        logger.info(f"Generated audio file: {audio_file}")
+    else:
+        state["error"] = "Failed to generate audio"
+        logger.error("Failed to generate audio")
+        
+    log_state_transition("generate_meditation_audio_complete", state)
+    return state
+
+@ledgered("generate_audio")
 def generate_meditation_audio(state: GraphState) -> GraphState:
     """
     Generate audio from SSML using AWS Polly.
@@ -30,28 +67,7 @@ def generate_meditation_audio(state: GraphState) -> GraphState:
             logger.error(f"Skipping due to previous error: {state['error']}")
             return state
             
-        # Initialize AudioGenerator
-        generator = AudioGenerator(
-            aws_profile=os.environ.get('AWS_PROFILE'),
-            aws_region=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
-            output_dir=AUDIO_OUTPUT_DIR
-        )
-        
-        # Get the voice type and language code from the request
-        voice_type_str = state["request"]["voice_type"]
-        language_code = state["request"]["language_code"]
-        
-        # Map voice type string to enum
-        voice_type_map = {
-            'Male': VoiceType.MALE,
-            'Female': VoiceType.FEMALE,
-            'Neutral': VoiceType.NEUTRAL
-        }
-        voice_type = voice_type_map.get(voice_type_str, VoiceType.NEUTRAL)
-        
-        # Get the appropriate voice ID from the voice maps
-        voice_map = generator.VOICE_MAPS.get(language_code, generator.VOICE_MAPS['en-US'])
-        voice_id = voice_map.get(voice_type.value, voice_map[VoiceType.NEUTRAL.value])
+        generator, voice_id, language_code = _get_generator_and_voice(state["request"])
         
         # Check SSML length and use chunked audio generation if needed
         ssml_text = state["ssml_output"]
@@ -63,21 +79,45 @@ def generate_meditation_audio(state: GraphState) -> GraphState:
             voice_id=voice_id,
             language_code=language_code
         )
+        return _apply_audio_result(state, audio_file)
         
-        if audio_file:
-            state["audio_output"] = {
-                "voice_file": audio_file,
-                "status": "generated"
-            }
-            logger.info(f"Generated audio file: {audio_file}")
-        else:
-            state["error"] = "Failed to generate audio"
-            logger.error("Failed to generate audio")
-            
-        log_state_transition("generate_meditation_audio_complete", state)
+    except Exception as e:
+        logger.exception(f"Error generating audio: {str(e)}")
+        state["error"] = f"Error generating audio: {str(e)}"
         return state
+
+@ledgered("generate_audio")
+async def agenerate_meditation_audio(state: GraphState) -> GraphState:
+    """
+    Async version of generate_meditation_audio that synthesizes SSML chunks concurrently.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with audio output information
+    """
+    try:
+        logger.info("Starting audio generation")
+        log_state_transition("generate_meditation_audio", state)
+        
+        if "error" in state and state["error"]:
+            logger.error(f"Skipping due to previous error: {state['error']}")
+            return state
+            
+        generator, voice_id, language_code = _get_generator_and_voice(state["request"])
+        
+        ssml_text = state["ssml_output"]
+        logger.info(f"SSML length: {len(ssml_text)} characters")
+        
+        audio_file = await generator.agenerate_chunked_audio(
+            ssml_text=ssml_text,
+            voice_id=voice_id,
+            language_code=language_code
+        )
+        return _apply_audio_result(state, audio_file)
         
     except Exception as e:
         logger.exception(f"Error generating audio: {str(e)}")
         state["error"] = f"Error generating audio: {str(e)}"
-        return state 
\ No newline at end of file
+        return state
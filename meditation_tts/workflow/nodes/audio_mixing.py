@@ -3,40 +3,94 @@ Audio mixing node for the workflow.
 """
 
 import os
-import json
-import glob
-import random
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+import functools
+import threading
+from typing import Dict, Any, Optional, Tuple
 
 from meditation_tts.models.state import GraphState
 from meditation_tts.utils.logging_utils import log_state_transition, logger
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.json_utils import dumps_json
+from meditation_tts.utils.time_utils import file_timestamp
 from meditation_tts.config.constants import AUDIO_OUTPUT_DIR, JSON_OUTPUT_DIR, SOUNDSCAPE_DIR
-from src.ffmpeg_mixer import process_meditation_audio
+from meditation_tts.services.soundscape_index import find_background_file, get_soundscape_index
+from src.ffmpeg_mixer import _resolve_engine, preload_background, process_meditation_audio
 
-def find_background_file(soundscape_dir: str, soundscape_type: str) -> Optional[str]:
+# Background level in the final mix
+BACKGROUND_VOLUME = 0.3
+
+def _mix_engine() -> str:
+    """
+    Get the mixing engine from MIX_ENGINE ("ffmpeg", "numpy" or "auto", default "ffmpeg").
+    
+    The numpy engine mixes at 22.05 kHz mono with the voice at full level,
+    so it is louder than ffmpeg's amix and is opt-in.
+    """
+    return os.environ.get("MIX_ENGINE", "ffmpeg").lower()
+
+def _preloads_soundscapes() -> bool:
+    """Whether the configured engine mixes from the preloadable PCM cache (only the numpy engine does)."""
+    return _resolve_engine(_mix_engine()) == "numpy"
+
+def _preload_all(soundscape_files: Tuple[str, ...], engine: str) -> None:
+    for soundscape_file in soundscape_files:
+        if not preload_background(soundscape_file, BACKGROUND_VOLUME, engine):
+            # Decoding is failing (e.g. ffmpeg is missing), don't try the rest
+            return
+    logger.info(f"Prewarmed {len(soundscape_files)} soundscapes")
+
+@functools.lru_cache(maxsize=None)
+def prewarm_soundscapes(soundscape_dir: str = SOUNDSCAPE_DIR) -> Optional[threading.Thread]:
     """
-    Find a background soundscape file matching the type, or pick a random one.
+    Decode every soundscape into the mix cache on a background thread.
+    
+    Meant for long-running processes such as the UI, so the first request for
+    each soundscape doesn't wait for its decode. Only runs once per directory,
+    and only when the numpy engine is in use; the ffmpeg engine fills its own
+    cache on its first merge.
     
     Args:
         soundscape_dir: Directory containing soundscape files
-        soundscape_type: Type of soundscape to find
         
     Returns:
-        str or None: Path to the selected soundscape file or None if not found
+        threading.Thread or None: The daemon thread doing the decoding, or None
+            if there is nothing to decode
+    """
+    if not _preloads_soundscapes():
+        logger.info(f"Skipping soundscape prewarm, only the numpy mix engine is preloaded (MIX_ENGINE={_mix_engine()})")
+        return None
+    _, all_files = get_soundscape_index(soundscape_dir)
+    if not all_files:
+        return None
+    thread = threading.Thread(
+        target=_preload_all, args=(all_files, _mix_engine()), name="soundscape-prewarm", daemon=True
+    )
+    thread.start()
+    return thread
+
+def select_soundscape(state: GraphState) -> Dict[str, Any]:
+    """
+    Pick the background soundscape file for the request, decoding it ahead of the numpy mix.
+    
+    Runs as its own graph branch, in parallel with the LLM steps (or with
+    speech synthesis when the run starts there), and only writes the
+    soundscape_file field.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Dict[str, Any]: State update with the selected soundscape file
     """
-    # Try to find files matching the type
-    pattern = os.path.join(soundscape_dir, f"*{soundscape_type.lower()}*.mp3")
-    matches = glob.glob(pattern)
-    if matches:
-        return random.choice(matches)
-    # Fallback: pick any mp3 in the directory
-    all_files = glob.glob(os.path.join(soundscape_dir, "*.mp3"))
-    if all_files:
-        return random.choice(all_files)
-    return None
+    soundscape_type = state.get("request", {}).get("soundscape", "nature")
+    soundscape_file = find_background_file(SOUNDSCAPE_DIR, soundscape_type)
+    logger.info(f"Selected soundscape for type {soundscape_type}: {soundscape_file}")
+    if soundscape_file and _preloads_soundscapes():
+        preload_background(soundscape_file, BACKGROUND_VOLUME, _mix_engine())
+    return {"soundscape_file": soundscape_file}
 
+@ledgered("mix_audio")
 def mix_with_soundscape(state: GraphState) -> GraphState:
     """
     Mix generated audio with background soundscape using ffmpeg mixer.
@@ -59,20 +113,23 @@ def mix_with_soundscape(state: GraphState) -> GraphState:
             state["error"] = "No voice file to mix"
             return state
         
-        # Find a background soundscape file
+        # Use the soundscape selected earlier in the graph, or find one now
         soundscape_type = state["request"].get("soundscape", "nature")
-        background_file = find_background_file(SOUNDSCAPE_DIR, soundscape_type)
+        background_file = state.get("soundscape_file")
+        if not background_file or not os.path.exists(background_file):
+            background_file = find_background_file(SOUNDSCAPE_DIR, soundscape_type)
         if not background_file:
             state["error"] = f"No suitable soundscape file found for type: {soundscape_type}"
             return state
         
-        # Process audio with ffmpeg mixer
+        # Mix with the ffmpeg filter graph unless MIX_ENGINE selects the numpy engine
         full_audio, sample_audio = process_meditation_audio(
             voice_file=state["audio_output"]["voice_file"],
             background_file=background_file,
             output_dir=AUDIO_OUTPUT_DIR,
-            background_volume=0.3,
-            create_sample=True
+            background_volume=BACKGROUND_VOLUME,
+            create_sample=True,
+            engine=_mix_engine()
         )
         
         if full_audio:
@@ -84,23 +141,16 @@ def mix_with_soundscape(state: GraphState) -> GraphState:
             
             logger.info(f"Mixed audio files: Full={full_audio}, Sample={sample_audio}")
             
-            # Save the complete state to JSON
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_output = {
-                "request": state["request"],
-                "meditation_script": state["meditation_script"],
-                "prosody_analysis": state["prosody_analysis"],
-                "prosody_profile": state["prosody_profile"],
-                "audio_output": state["audio_output"]
-            }
-            
+            # Save the complete state to JSON; this is the run's final state record,
+            # so the runner doesn't write a separate state file for this step
+            timestamp = file_timestamp()
             json_file = os.path.join(JSON_OUTPUT_DIR, f"meditation_{timestamp}.json")
             os.makedirs(JSON_OUTPUT_DIR, exist_ok=True)
+            state["audio_output"]["json_file"] = json_file
             
-            with open(json_file, 'w') as f:
-                json.dump(json_output, f, indent=2)
+            with open(json_file, 'wb') as f:
+                f.write(dumps_json(dict(state), indent=True))
                 
-            state["audio_output"]["json_file"] = json_file
             logger.info(f"Saved complete state to JSON: {json_file}")
         else:
             state["error"] = "Failed to mix audio with soundscape (ffmpeg)"
@@ -2,41 +2,27 @@
 Prosody profile generation node for the workflow.
 """
 
-import re
-import json
-from typing import Dict, Any, List, Optional
+import os
+import copy
+import functools
+from typing import Dict, Any, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+from meditation_tts.models.prosody import (
+    DEFAULT_EMOTIONAL_CONTOURS,
+    DEFAULT_EMOTIONAL_RATES,
+    DEFAULT_EMOTIONAL_EMPHASIS
+)
 from meditation_tts.models.state import GraphState
+from meditation_tts.services.llm_client import get_chat_model, get_json_chat_model
+from meditation_tts.services.result_cache import result_cache_key, get_cached_result, store_result
 from meditation_tts.utils.logging_utils import log_state_transition, log_llm_interaction, logger
+from meditation_tts.utils.json_utils import dumps_json, loads_json
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.text_utils import extract_json_block
 
-def generate_prosody_profile(state: GraphState) -> GraphState:
-    """
-    Generate a comprehensive prosody profile using LLM to consider all contextual factors.
-    
-    Args:
-        state: The current workflow state
-        
-    Returns:
-        GraphState: The updated workflow state with prosody profile
-    """
-    try:
-        logger.info("Starting prosody profile generation")
-        log_state_transition("generate_prosody_profile", state)
-        
-        if "error" in state and state["error"]:
-            logger.error(f"Skipping due to previous error: {state['error']}")
-            return state
-            
-        request = state["request"]
-        analysis = state["prosody_analysis"]
-        
-        # First approach: Use LLM to generate the complete prosody profile
-        llm = ChatOpenAI(temperature=0.3, model="gpt-4o")
-        
-        system_prompt = """You are an expert in speech prosody for meditation, with deep knowledge of AWS Polly's SSML capabilities and Neural voices.
+PROFILE_SYSTEM_PROMPT = """You are an expert in speech prosody for meditation, with deep knowledge of AWS Polly's SSML capabilities and Neural voices.
 
 Your task is to create a comprehensive prosody profile that will guide SSML generation for a meditation narration.
 
@@ -58,7 +44,259 @@ Your profile should include precise values for:
 Use percentage values for rate/pitch (e.g., "80%", "-15%") and specific time values for pauses (e.g., "800ms", "2s").
 Remember that Neural voices cannot use emphasis tags, so adjust pitch/rate/volume instead."""
 
-        human_prompt = f"""Create a comprehensive prosody profile for this meditation:
+# Format instructions are specific to the required output structure
+PROFILE_FORMAT_INSTRUCTIONS = """
+Your response should be a JSON object representing a complete ProsodyProfile. Here's the expected format:
+
+{
+  "pitch": { "base_pitch": "-10%", "range": "moderate", "contour_pattern": "gradual downward drift with gentle rises" },
+  "rate": { "base_rate": "85%", "variation": "moderate", "special_sections": { "breathing": "70%", "introduction": "80%", "closing": "75%", "grounding": "65%", "body_scan": "60%", "affirmations": "75%", "visualization": "70%" } },
+  "pauses": { "short_pause": "800ms", "medium_pause": "2s", "long_pause": "4s", "breath_pause": "3s", "sentence_pattern": "medium after statements, long after guidance", "breathing_patterns": { "4-7-8": { "inhale": "4s", "hold": "7s", "exhale": "8s" }, "box_breathing": { "inhale": "4s", "hold_in": "4s", "exhale": "4s", "hold_out": "4s" }, "deep_breathing": { "inhale": "4s", "exhale": "6s" } } },
+  "emphasis": { "intensity": "moderate", "key_terms": ["awareness", "breath", "present"] },
+  "volume": "soft",
+  "voice_quality": "breathy",
+  "section_profiles": { "introduction": { "pitch": "-15%", "rate": "80%", "volume": "soft" }, "grounding": { "pitch": "-20%", "rate": "65%", "volume": "x-soft" }, "body_scan": { "pitch": "-18%", "rate": "60%", "volume": "x-soft" }, "breathing": { "pitch": "-15%", "rate": "70%", "volume": "soft" }, "visualization": { "pitch": "-12%", "rate": "75%", "volume": "soft" }, "affirmations": { "pitch": "-10%", "rate": "75%", "volume": "medium" }, "closing": { "pitch": "-15%", "rate": "75%", "volume": "soft" } },
+  "language_adjustments": { "es-ES": { "rate": "80%", "pitch": "-12%", "volume": "soft" }, "en-US": { "rate": "85%", "pitch": "-10%", "volume": "medium" } },
+  "progression": { "start": { "rate": "85%", "pitch": "-10%", "volume": "medium" }, "middle": { "rate": "75%", "pitch": "-15%", "volume": "soft" }, "end": { "rate": "70%", "pitch": "-20%", "volume": "x-soft" } }
+}
+"""
+
+# The static messages are built once and shared by every call. They lead the
+# message list so the provider's prompt prefix cache can reuse them.
+PROFILE_SYSTEM_MESSAGE = SystemMessage(content=PROFILE_SYSTEM_PROMPT)
+PROFILE_FORMAT_MESSAGE = HumanMessage(content=PROFILE_FORMAT_INSTRUCTIONS)
+
+# Key terms assumed before the analysis is available
+SPECULATIVE_KEY_TERMS = ["breath", "relax", "present", "awareness"]
+
+# Template profile used when the LLM response can't be parsed
+DEFAULT_PROSODY_PROFILE = {
+    "pitch": {
+        "base_pitch": "-10%",
+        "range": "moderate",
+        "contour_pattern": "natural with moderate variation",
+        "emotional_contours": {
+            "calm": "gradual downward drift with gentle rises",
+            "anxious": "higher baseline with more variation",
+            "energetic": "higher baseline with upward contours",
+            "tired": "lower baseline with minimal variation",
+            "happy": "moderate baseline with upward contours",
+            "sad": "lower baseline with downward contours",
+            "stressed": "higher baseline with tense contours"
+        }
+    },
+    "rate": {
+        "base_rate": "85%",
+        "variation": "moderate",
+        "special_sections": {
+            "breathing": "70%",
+            "introduction": "80%",
+            "closing": "75%",
+            "grounding": "65%",
+            "body_scan": "60%",
+            "affirmations": "75%",
+            "visualization": "70%"
+        },
+        "emotional_rates": {
+            "calm": "70%",
+            "anxious": "85%",
+            "energetic": "90%",
+            "tired": "65%",
+            "happy": "85%",
+            "sad": "70%",
+            "stressed": "80%"
+        }
+    },
+    "pauses": {
+        "short_pause": "800ms",
+        "medium_pause": "2s",
+        "long_pause": "4s",
+        "breath_pause": "3s",
+        "sentence_pattern": "medium after statements, long after guidance",
+        "breathing_patterns": {
+            "4-7-8": {
+                "inhale": "4s",
+                "hold": "7s",
+                "exhale": "8s"
+            },
+            "box_breathing": {
+                "inhale": "4s",
+                "hold_in": "4s",
+                "exhale": "4s",
+                "hold_out": "4s"
+            },
+            "deep_breathing": {
+                "inhale": "4s",
+                "exhale": "6s"
+            }
+        }
+    },
+    "emphasis": {
+        "intensity": "moderate",
+        "key_terms": ["breath", "relax", "present", "awareness"],
+        "emotional_emphasis": {
+            "calm": "reduced",
+            "anxious": "moderate",
+            "energetic": "strong",
+            "tired": "reduced",
+            "happy": "moderate",
+            "sad": "reduced",
+            "stressed": "moderate"
+        }
+    },
+    "volume": "soft",
+    "voice_quality": "breathy",
+    "section_profiles": {
+        "introduction": {
+            "pitch": "-15%",
+            "rate": "80%",
+            "volume": "soft"
+        },
+        "grounding": {
+            "pitch": "-20%",
+            "rate": "65%",
+            "volume": "x-soft"
+        },
+        "body_scan": {
+            "pitch": "-18%",
+            "rate": "60%",
+            "volume": "x-soft"
+        },
+        "breathing": {
+            "pitch": "-15%",
+            "rate": "70%",
+            "volume": "soft"
+        },
+        "visualization": {
+            "pitch": "-12%",
+            "rate": "75%",
+            "volume": "soft"
+        },
+        "affirmations": {
+            "pitch": "-10%",
+            "rate": "75%",
+            "volume": "medium"
+        },
+        "closing": {
+            "pitch": "-15%",
+            "rate": "75%",
+            "volume": "soft"
+        }
+    },
+    "language_adjustments": {
+        "es-ES": {
+            "rate": "80%",
+            "pitch": "-12%",
+            "volume": "soft"
+        },
+        "en-US": {
+            "rate": "85%",
+            "pitch": "-10%",
+            "volume": "medium"
+        }
+    },
+    "progression": {
+        "start": {
+            "rate": "85%",
+            "pitch": "-10%",
+            "volume": "medium"
+        },
+        "middle": {
+            "rate": "75%",
+            "pitch": "-15%",
+            "volume": "soft"
+        },
+        "end": {
+            "rate": "70%",
+            "pitch": "-20%",
+            "volume": "x-soft"
+        }
+    }
+}
+
+# Rule-based adjustments to the template profile, as leaf path -> value
+_EMOTIONAL_STATE_OVERRIDES: Dict[str, Dict[Tuple[str, ...], str]] = {
+    "anxious": {
+        ("pitch", "base_pitch"): "-15%",
+        ("rate", "base_rate"): "75%",
+        ("volume",): "x-soft"
+    },
+    "energetic": {
+        ("pitch", "base_pitch"): "-5%",
+        ("rate", "base_rate"): "90%",
+        ("volume",): "medium"
+    }
+}
+
+_MEDITATION_STYLE_OVERRIDES: Dict[str, Dict[Tuple[str, ...], str]] = {
+    "Mindfulness": {
+        ("rate", "base_rate"): "75%",
+        ("pauses", "medium_pause"): "2.5s",
+        ("pauses", "long_pause"): "5s"
+    },
+    "BreathFocus": {
+        ("section_profiles", "breathing", "rate"): "65%",
+        ("section_profiles", "breathing", "pitch"): "-15%",
+        ("section_profiles", "breathing", "volume"): "x-soft"
+    },
+    "BodyScan": {
+        ("rate", "base_rate"): "70%",
+        ("section_profiles", "body_scan", "rate"): "60%",
+        ("section_profiles", "body_scan", "pitch"): "-18%"
+    }
+}
+
+# Language adjustments come from the template's own language_adjustments table
+_LANGUAGE_OVERRIDES: Dict[str, Dict[Tuple[str, ...], str]] = {
+    language_code: {
+        ("rate", "base_rate"): adjustments["rate"],
+        ("pitch", "base_pitch"): adjustments["pitch"],
+        ("volume",): adjustments["volume"]
+    }
+    for language_code, adjustments in DEFAULT_PROSODY_PROFILE["language_adjustments"].items()
+}
+
+@functools.lru_cache(maxsize=None)
+def _adjusted_profile_template(emotional_state: str, meditation_style: str, language_code: str) -> Dict[str, Any]:
+    """
+    Apply the rule-based adjustments to the template profile, once per combination.
+    
+    Args:
+        emotional_state: The requested emotional state
+        meditation_style: The requested meditation style
+        language_code: The requested language code
+        
+    Returns:
+        Dict[str, Any]: The adjusted profile, shared between calls and not to be mutated
+    """
+    prosody_profile = copy.deepcopy(DEFAULT_PROSODY_PROFILE)
+    
+    # Later tables win: emotional state, then meditation style, then language
+    for overrides in (
+        _EMOTIONAL_STATE_OVERRIDES.get(emotional_state, {}),
+        _MEDITATION_STYLE_OVERRIDES.get(meditation_style, {}),
+        _LANGUAGE_OVERRIDES.get(language_code, {})
+    ):
+        for path, value in overrides.items():
+            target = prosody_profile
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+    
+    return prosody_profile
+
+def _build_profile_messages(request: Dict[str, Any], analysis: Dict[str, Any]) -> List[Any]:
+    """
+    Build the chat messages for the prosody profile call.
+    
+    Args:
+        request: The meditation request parameters
+        analysis: The prosody analysis to base the profile on
+        
+    Returns:
+        List of messages for the LLM, static prefix first and the request-specific prompt last
+    """
+    human_prompt = f"""Create a comprehensive prosody profile for this meditation:
 
 CONTEXT:
 - Emotional state: {request['emotional_state']}
@@ -69,7 +307,7 @@ CONTEXT:
 - Voice: {request['voice_type']} ({request['language_code']})
 
 PROSODY ANALYSIS:
-{json.dumps(analysis, indent=2)}
+{dumps_json(analysis, indent=True).decode()}
 
 The prosody profile should include:
 
@@ -77,13 +315,11 @@ The prosody profile should include:
    - base_pitch: Base pitch adjustment
    - range: Pitch range/variation
    - contour_pattern: Natural pitch contour description
-   - emotional_contours: Pitch patterns for different emotional states
 
 2. RateProfile:
    - base_rate: Base speaking rate
    - variation: Rate variation pattern
    - special_sections: Rate adjustments for different sections
-   - emotional_rates: Rate adjustments for different emotional states
 
 3. PauseProfile:
    - short_pause: Duration for short pauses
@@ -96,298 +332,315 @@ The prosody profile should include:
 4. EmphasisProfile:
    - intensity: Overall emphasis intensity (but implemented with prosody)
    - key_terms: Terms to emphasize
-   - emotional_emphasis: Emphasis patterns for different states
 
 5. Section profiles for different meditation parts
 6. Language-specific adjustments
 7. Progressive changes throughout the meditation
 
 Return a complete prosody profile optimized for AWS Polly Neural voices and the specific meditation context."""
+    
+    return [
+        PROFILE_SYSTEM_MESSAGE,
+        PROFILE_FORMAT_MESSAGE,
+        HumanMessage(content=human_prompt)
+    ]
 
-        format_instructions = """
-Your response should be a JSON object representing a complete ProsodyProfile. Here's the expected format:
+def complete_prosody_profile(prosody_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in the per-emotion tables, which are static and not requested from the LLM.
+    
+    Args:
+        prosody_profile: The profile parsed from the LLM response
+        
+    Returns:
+        Dict[str, Any]: The same profile with the emotional tables added where missing
+        
+    Raises:
+        ValueError: If the response is not a JSON object
+    """
+    if not isinstance(prosody_profile, dict):
+        raise ValueError(f"Expected a JSON object, got {type(prosody_profile).__name__}")
+    for section, field, table in (
+        ("pitch", "emotional_contours", DEFAULT_EMOTIONAL_CONTOURS),
+        ("rate", "emotional_rates", DEFAULT_EMOTIONAL_RATES),
+        ("emphasis", "emotional_emphasis", DEFAULT_EMOTIONAL_EMPHASIS)
+    ):
+        if isinstance(prosody_profile.get(section), dict):
+            prosody_profile[section].setdefault(field, dict(table))
+    return prosody_profile
 
-{
-  "pitch": { "base_pitch": "-10%", "range": "moderate", "contour_pattern": "gradual downward drift with gentle rises", "emotional_contours": { "calm": "gradual downward drift with gentle rises", "anxious": "higher baseline with more variation", "energetic": "higher baseline with upward contours", "tired": "lower baseline with minimal variation", "happy": "moderate baseline with upward contours", "sad": "lower baseline with downward contours", "stressed": "higher baseline with tense contours" } },
-  "rate": { "base_rate": "85%", "variation": "moderate", "special_sections": { "breathing": "70%", "introduction": "80%", "closing": "75%", "grounding": "65%", "body_scan": "60%", "affirmations": "75%", "visualization": "70%" }, "emotional_rates": { "calm": "70%", "anxious": "85%", "energetic": "90%", "tired": "65%", "happy": "85%", "sad": "70%", "stressed": "80%" } },
-  "pauses": { "short_pause": "800ms", "medium_pause": "2s", "long_pause": "4s", "breath_pause": "3s", "sentence_pattern": "medium after statements, long after guidance", "breathing_patterns": { "4-7-8": { "inhale": "4s", "hold": "7s", "exhale": "8s" }, "box_breathing": { "inhale": "4s", "hold_in": "4s", "exhale": "4s", "hold_out": "4s" }, "deep_breathing": { "inhale": "4s", "exhale": "6s" } } },
-  "emphasis": { "intensity": "moderate", "key_terms": ["awareness", "breath", "present"], "emotional_emphasis": { "calm": "reduced", "anxious": "moderate", "energetic": "strong", "tired": "reduced", "happy": "moderate", "sad": "reduced", "stressed": "moderate" } },
-  "volume": "soft",
-  "voice_quality": "breathy",
-  "section_profiles": { "introduction": { "pitch": "-15%", "rate": "80%", "volume": "soft" }, "grounding": { "pitch": "-20%", "rate": "65%", "volume": "x-soft" }, "body_scan": { "pitch": "-18%", "rate": "60%", "volume": "x-soft" }, "breathing": { "pitch": "-15%", "rate": "70%", "volume": "soft" }, "visualization": { "pitch": "-12%", "rate": "75%", "volume": "soft" }, "affirmations": { "pitch": "-10%", "rate": "75%", "volume": "medium" }, "closing": { "pitch": "-15%", "rate": "75%", "volume": "soft" } },
-  "language_adjustments": { "es-ES": { "rate": "80%", "pitch": "-12%", "volume": "soft" }, "en-US": { "rate": "85%", "pitch": "-10%", "volume": "medium" } },
-  "progression": { "start": { "rate": "85%", "pitch": "-10%", "volume": "medium" }, "middle": { "rate": "75%", "pitch": "-15%", "volume": "soft" }, "end": { "rate": "70%", "pitch": "-20%", "volume": "x-soft" } }
-}
-"""
+def _parse_profile_response(state: GraphState, content: str) -> bool:
+    """
+    Store the parsed profile in the state, falling back to the rule-based profile.
+    
+    Args:
+        state: The current workflow state
+        content: The profile response content
+        
+    Returns:
+        bool: Whether the response parsed, i.e. the profile is worth caching
+    """
+    # JSON mode guarantees well-formed JSON unless the reply was cut off
+    try:
+        state["prosody_profile"] = complete_prosody_profile(loads_json(extract_json_block(content) or content))
+        return True
+        
+    except (ValueError, KeyError, TypeError, AttributeError) as parsing_error:
+        # Fall back to a rule-based profile for the request
+        logger.warning(f"Could not parse prosody profile, using template: {str(parsing_error)}")
+        state["prosody_profile"] = build_fallback_prosody_profile(state["request"], state["prosody_analysis"])
+        state["profile_generation_error"] = f"Used template profile due to errors: {str(parsing_error)}"
+        return False
+
+def _use_prefetched_profile(state: GraphState) -> bool:
+    """
+    Adopt a profile produced ahead of this step, if one is available.
+    
+    The profile comes either from the speculative branch, generated before the
+    analysis existed, or from a fused analysis call; the analysis key terms are
+    merged into it either way.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        bool: Whether the prefetched profile was used
+    """
+    prefetched = state.get("prefetched_profile")
+    if not prefetched or prefetched.get("request") != state["request"] or state.get("parsing_error"):
+        return False
+    
+    prosody_profile = copy.deepcopy(prefetched["profile"])
+    key_terms = state["prosody_analysis"].get("key_terms") or SPECULATIVE_KEY_TERMS
+    prosody_profile.setdefault("emphasis", {})["key_terms"] = key_terms
+    state["prosody_profile"] = prosody_profile
+    logger.info("Using prefetched prosody profile")
+    return True
+
+def build_fallback_prosody_profile(request: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a rule-based prosody profile for the request without the LLM.
+    
+    Args:
+        request: The meditation request parameters
+        analysis: The prosody analysis, used for the key terms
+        
+    Returns:
+        Dict[str, Any]: A new prosody profile
+    """
+    prosody_profile = copy.deepcopy(_adjusted_profile_template(
+        request["emotional_state"],
+        request["meditation_style"],
+        request["language_code"]
+    ))
+    prosody_profile["emphasis"]["key_terms"] = analysis.get("key_terms", SPECULATIVE_KEY_TERMS)
+    return prosody_profile
 
-        # Generate the profile
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt),
-            HumanMessage(content=format_instructions)
-        ]
+def _prepare_profile_call(state: GraphState) -> Optional[Dict[str, Any]]:
+    """
+    Run the checks that come before the profile LLM call.
+    
+    Args:
+        state: The current workflow state
         
-        logger.info("Requesting prosody profile generation")
-        response = llm.invoke(messages)
+    Returns:
+        Optional[Dict[str, Any]]: The call's cache key and messages, or None if
+            the state is already complete (earlier error, prefetched or cached profile)
+    """
+    logger.info("Starting prosody profile generation")
+    log_state_transition("generate_prosody_profile", state)
+    # Clear the template-profile flag an earlier attempt may have left in a loaded state
+    state.pop("profile_generation_error", None)
+    
+    if "error" in state and state["error"]:
+        logger.error(f"Skipping due to previous error: {state['error']}")
+        return None
         
-        # Log the prosody profile interaction
-        log_llm_interaction(
-            prompt=human_prompt + "\n\n" + format_instructions,
-            response_content=response.content,
-            model=llm.model_name,
-            purpose="Prosody Profile Generation"
-        )
+    request = state["request"]
+    analysis = state["prosody_analysis"]
+    
+    if _use_prefetched_profile(state):
+        log_state_transition("generate_prosody_profile_complete", state, keys=("prosody_profile", "parsing_error"))
+        return None
+    
+    llm = get_chat_model(0.3)
+    
+    cache_key = result_cache_key("Prosody Profile Generation", llm, request=request, analysis=analysis)
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        logger.info("Using cached prosody profile")
+        state["prosody_profile"] = cached
+        log_state_transition("generate_prosody_profile_complete", state, keys=("prosody_profile", "parsing_error"))
+        return None
+    
+    logger.info("Requesting prosody profile generation")
+    return {
+        "cache_key": cache_key,
+        "messages": _build_profile_messages(request, analysis),
+        "model": llm.model_name
+    }
+
+def _complete_profile(state: GraphState, call: Dict[str, Any], content: str) -> GraphState:
+    """
+    Log the profile response, store the parsed profile and cache it if it parsed.
+    
+    Args:
+        state: The current workflow state
+        call: The call returned by _prepare_profile_call
+        content: The profile response content
         
-        # Extract and parse the profile
-        try:
-            # Try to parse JSON from the response
-            # Extract JSON content from the response
-            content = response.content
-            # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', content, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0).strip()
-            else:
-                # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1).strip()
-                else:
-                    # Assume the entire content is JSON
-                    json_str = content
-            
-            # Parse the JSON string
-            prosody_profile = json.loads(json_str)
-            state["prosody_profile"] = prosody_profile
-            
-        except Exception as parsing_error:
-            # Fallback approach: create a profile based on emotional state and analysis
-            try:
-                # Request a simpler format
-                fix_prompt = f"""The previous response couldn't be parsed as JSON. Please provide the prosody profile as valid JSON with no additional text or explanation. Use the following simplified structure:
-
-{{
-  "pitch": {{ "base_pitch": "-10%", "range": "moderate", "contour_pattern": "description" }},
-  "rate": {{ "base_rate": "85%", "variation": "moderate", "special_sections": {{ "breathing": "70%" }} }},
-  "pauses": {{ "short_pause": "800ms", "medium_pause": "2s", "long_pause": "4s", "breath_pause": "3s" }},
-  "emphasis": {{ "intensity": "moderate", "key_terms": ["term1", "term2"] }},
-  "volume": "soft",
-  "section_profiles": {{ "introduction": {{ "pitch": "-15%", "rate": "80%", "volume": "soft" }} }},
-  "language_adjustments": {{ "es-ES": {{ "rate": "80%", "pitch": "-12%" }} }},
-  "progression": {{ "start": {{ "rate": "85%", "pitch": "-10%" }} }}
-}}
-
-Just return the valid JSON."""
-                
-                fix_response = llm.invoke([HumanMessage(content=fix_prompt)])
-                fix_content = fix_response.content
-                
-                # Try to extract and parse JSON again
-                json_match = re.search(r'({.*}|\[.*\])', fix_content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0).strip()
-                else:
-                    json_match = re.search(r'({.+})', fix_content, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(1).strip()
-                    else:
-                        json_str = fix_content
-                
-                prosody_profile = json.loads(json_str)
-                state["prosody_profile"] = prosody_profile
-                state["parsing_warning"] = f"Used fallback parsing: {str(parsing_error)}"
-                
-            except Exception as fallback_error:
-                # If all else fails, use a rule-based approach
-                emotional_state = request["emotional_state"]
-                meditation_style = request["meditation_style"]
-                language_code = request["language_code"]
-                
-                # Default profile template
-                prosody_profile = {
-                    "pitch": {
-                        "base_pitch": "-10%",
-                        "range": "moderate",
-                        "contour_pattern": "natural with moderate variation",
-                        "emotional_contours": {
-                            "calm": "gradual downward drift with gentle rises",
-                            "anxious": "higher baseline with more variation",
-                            "energetic": "higher baseline with upward contours",
-                            "tired": "lower baseline with minimal variation",
-                            "happy": "moderate baseline with upward contours",
-                            "sad": "lower baseline with downward contours",
-                            "stressed": "higher baseline with tense contours"
-                        }
-                    },
-                    "rate": {
-                        "base_rate": "85%",
-                        "variation": "moderate",
-                        "special_sections": {
-                            "breathing": "70%",
-                            "introduction": "80%",
-                            "closing": "75%",
-                            "grounding": "65%",
-                            "body_scan": "60%",
-                            "affirmations": "75%",
-                            "visualization": "70%"
-                        },
-                        "emotional_rates": {
-                            "calm": "70%",
-                            "anxious": "85%",
-                            "energetic": "90%",
-                            "tired": "65%",
-                            "happy": "85%",
-                            "sad": "70%",
-                            "stressed": "80%"
-                        }
-                    },
-                    "pauses": {
-                        "short_pause": "800ms",
-                        "medium_pause": "2s",
-                        "long_pause": "4s",
-                        "breath_pause": "3s",
-                        "sentence_pattern": "medium after statements, long after guidance",
-                        "breathing_patterns": {
-                            "4-7-8": {
-                                "inhale": "4s",
-                                "hold": "7s",
-                                "exhale": "8s"
-                            },
-                            "box_breathing": {
-                                "inhale": "4s",
-                                "hold_in": "4s",
-                                "exhale": "4s",
-                                "hold_out": "4s"
-                            },
-                            "deep_breathing": {
-                                "inhale": "4s",
-                                "exhale": "6s"
-                            }
-                        }
-                    },
-                    "emphasis": {
-                        "intensity": "moderate",
-                        "key_terms": analysis.get("key_terms", ["breath", "relax", "present", "awareness"]),
-                        "emotional_emphasis": {
-                            "calm": "reduced",
-                            "anxious": "moderate",
-                            "energetic": "strong",
-                            "tired": "reduced",
-                            "happy": "moderate",
-                            "sad": "reduced",
-                            "stressed": "moderate"
-                        }
-                    },
-                    "volume": "soft",
-                    "voice_quality": "breathy",
-                    "section_profiles": {
-                        "introduction": {
-                            "pitch": "-15%",
-                            "rate": "80%",
-                            "volume": "soft"
-                        },
-                        "grounding": {
-                            "pitch": "-20%",
-                            "rate": "65%",
-                            "volume": "x-soft"
-                        },
-                        "body_scan": {
-                            "pitch": "-18%",
-                            "rate": "60%",
-                            "volume": "x-soft"
-                        },
-                        "breathing": {
-                            "pitch": "-15%",
-                            "rate": "70%",
-                            "volume": "soft"
-                        },
-                        "visualization": {
-                            "pitch": "-12%",
-                            "rate": "75%",
-                            "volume": "soft"
-                        },
-                        "affirmations": {
-                            "pitch": "-10%",
-                            "rate": "75%",
-                            "volume": "medium"
-                        },
-                        "closing": {
-                            "pitch": "-15%",
-                            "rate": "75%",
-                            "volume": "soft"
-                        }
-                    },
-                    "language_adjustments": {
-                        "es-ES": {
-                            "rate": "80%",
-                            "pitch": "-12%",
-                            "volume": "soft"
-                        },
-                        "en-US": {
-                            "rate": "85%",
-                            "pitch": "-10%",
-                            "volume": "medium"
-                        }
-                    },
-                    "progression": {
-                        "start": {
-                            "rate": "85%",
-                            "pitch": "-10%",
-                            "volume": "medium"
-                        },
-                        "middle": {
-                            "rate": "75%",
-                            "pitch": "-15%",
-                            "volume": "soft"
-                        },
-                        "end": {
-                            "rate": "70%",
-                            "pitch": "-20%",
-                            "volume": "x-soft"
-                        }
-                    }
-                }
-                
-                # Make specific adjustments based on emotional state
-                if emotional_state == "anxious":
-                    prosody_profile["pitch"]["base_pitch"] = "-15%"
-                    prosody_profile["rate"]["base_rate"] = "75%"
-                    prosody_profile["volume"] = "x-soft"
-                elif emotional_state == "energetic":
-                    prosody_profile["pitch"]["base_pitch"] = "-5%"
-                    prosody_profile["rate"]["base_rate"] = "90%"
-                    prosody_profile["volume"] = "medium"
-                
-                # Adjust for meditation style
-                if meditation_style == "Mindfulness":
-                    prosody_profile["rate"]["base_rate"] = "75%"
-                    prosody_profile["pauses"]["medium_pause"] = "2.5s"
-                    prosody_profile["pauses"]["long_pause"] = "5s"
-                elif meditation_style == "BreathFocus":
-                    prosody_profile["section_profiles"]["breathing"]["rate"] = "65%"
-                    prosody_profile["section_profiles"]["breathing"]["pitch"] = "-15%"
-                    prosody_profile["section_profiles"]["breathing"]["volume"] = "x-soft"
-                elif meditation_style == "BodyScan":
-                    prosody_profile["rate"]["base_rate"] = "70%"
-                    prosody_profile["section_profiles"]["body_scan"]["rate"] = "60%"
-                    prosody_profile["section_profiles"]["body_scan"]["pitch"] = "-18%"
-                
-                # Apply language-specific adjustments
-                if language_code in prosody_profile["language_adjustments"]:
-                    lang_adjustments = prosody_profile["language_adjustments"][language_code]
-                    prosody_profile["rate"]["base_rate"] = lang_adjustments["rate"]
-                    prosody_profile["pitch"]["base_pitch"] = lang_adjustments["pitch"]
-                    prosody_profile["volume"] = lang_adjustments["volume"]
-                
-                state["prosody_profile"] = prosody_profile
-                state["profile_generation_error"] = f"Used template profile due to errors: {str(parsing_error)} → {str(fallback_error)}"
+    Returns:
+        GraphState: The updated workflow state with prosody profile
+    """
+    log_llm_interaction(
+        prompt=PROFILE_FORMAT_INSTRUCTIONS + "\n\n" + call["messages"][-1].content,
+        response_content=content,
+        model=call["model"],
+        purpose="Prosody Profile Generation"
+    )
+    
+    if _parse_profile_response(state, content):
+        store_result(call["cache_key"], state["prosody_profile"])
+    
+    logger.info("Completed prosody profile generation")
+    log_state_transition("generate_prosody_profile_complete", state, keys=("prosody_profile", "parsing_error"))
+    return state
+
+@ledgered("create_profile")
+def generate_prosody_profile(state: GraphState) -> GraphState:
+    """
+    Generate a comprehensive prosody profile using LLM to consider all contextual factors.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with prosody profile
+    """
+    try:
+        call = _prepare_profile_call(state)
+        if call is None:
+            return state
         
-        logger.info("Completed prosody profile generation")
-        log_state_transition("generate_prosody_profile_complete", state)
+        response = get_json_chat_model(0.3).invoke(call["messages"])
+        return _complete_profile(state, call, response.content)
+        
+    except Exception as e:
+        logger.exception(f"Error generating prosody profile: {str(e)}")
+        state["error"] = f"Error generating prosody profile: {str(e)}"
         return state
+
+@ledgered("create_profile")
+async def agenerate_prosody_profile(state: GraphState) -> GraphState:
+    """
+    Async version of generate_prosody_profile using non-blocking LLM calls.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with prosody profile
+    """
+    try:
+        call = _prepare_profile_call(state)
+        if call is None:
+            return state
+        
+        response = await get_json_chat_model(0.3).ainvoke(call["messages"])
+        return _complete_profile(state, call, response.content)
         
     except Exception as e:
         logger.exception(f"Error generating prosody profile: {str(e)}")
         state["error"] = f"Error generating prosody profile: {str(e)}"
-        return state 
\ No newline at end of file
+        return state
+
+def speculative_profiles_enabled() -> bool:
+    """
+    Check whether speculative profile generation is enabled via SPECULATIVE_PROFILE=on.
+    
+    Returns:
+        bool: Whether the workflow graph should speculate the profile
+    """
+    return os.environ.get("SPECULATIVE_PROFILE", "off").lower() in ("on", "1", "true")
+
+def _speculative_cache_key(request: Dict[str, Any]) -> Optional[str]:
+    return result_cache_key("Speculative Prosody Profile", get_chat_model(0.3), request=request)
+
+def _speculative_profile_messages(request: Dict[str, Any]) -> List[Any]:
+    logger.info("Requesting speculative prosody profile")
+    return _build_profile_messages(request, {"key_terms": SPECULATIVE_KEY_TERMS})
+
+def _store_speculative_profile(cache_key: Optional[str], content: str) -> Dict[str, Any]:
+    """
+    Parse a speculative profile response and cache the profile.
+    
+    Args:
+        cache_key: The speculative profile's cache key
+        content: The profile response content
+        
+    Returns:
+        Dict[str, Any]: The completed profile
+        
+    Raises:
+        ValueError: If the response is not a valid JSON object
+    """
+    prosody_profile = complete_prosody_profile(loads_json(extract_json_block(content) or content))
+    store_result(cache_key, prosody_profile)
+    return prosody_profile
+
+def speculate_prosody_profile(state: GraphState) -> Dict[str, Any]:
+    """
+    Generate a prosody profile from the request alone, in parallel with the
+    script and analysis steps, so the profile step can skip its own LLM call.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Dict[str, Any]: State update with the speculative profile, empty on failure
+    """
+    if state.get("error") or not state.get("request"):
+        return {}
+    
+    try:
+        request = state["request"]
+        cache_key = _speculative_cache_key(request)
+        prosody_profile = get_cached_result(cache_key)
+        if prosody_profile is None:
+            response = get_json_chat_model(0.3).invoke(_speculative_profile_messages(request))
+            prosody_profile = _store_speculative_profile(cache_key, response.content)
+        
+        return {"prefetched_profile": {"request": request, "profile": prosody_profile}}
+        
+    except Exception as e:
+        # The profile node simply makes its own call without a speculative profile
+        logger.warning(f"Speculative prosody profile failed: {str(e)}")
+        return {}
+
+async def aspeculate_prosody_profile(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of speculate_prosody_profile.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Dict[str, Any]: State update with the speculative profile, empty on failure
+    """
+    if state.get("error") or not state.get("request"):
+        return {}
+    
+    try:
+        request = state["request"]
+        cache_key = _speculative_cache_key(request)
+        prosody_profile = get_cached_result(cache_key)
+        if prosody_profile is None:
+            response = await get_json_chat_model(0.3).ainvoke(_speculative_profile_messages(request))
+            prosody_profile = _store_speculative_profile(cache_key, response.content)
+        
+        return {"prefetched_profile": {"request": request, "profile": prosody_profile}}
+        
+    except Exception as e:
+        # The profile node simply makes its own call without a speculative profile
+        logger.warning(f"Speculative prosody profile failed: {str(e)}")
+        return {}
@@ -2,112 +2,25 @@
 Prosody analysis node for the workflow.
 """
 
+import os
 import re
-import json
 from typing import Dict, Any, List, Optional
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+from meditation_tts.config.constants import PROSODY_SCRIPT_TOKEN_BUDGET
 from meditation_tts.models.state import GraphState
+from meditation_tts.services.llm_client import get_chat_model, get_json_chat_model
+from meditation_tts.services.result_cache import result_cache_key, get_cached_result, store_result
+from meditation_tts.services.semantic_cache import cached_invoke, acached_invoke, is_semantic_hit
 from meditation_tts.utils.logging_utils import log_state_transition, log_llm_interaction, logger
+from meditation_tts.utils.json_utils import loads_json
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.text_utils import SENTENCE_SPLIT_RE, extract_json_block, truncate_to_tokens
+from meditation_tts.workflow.nodes.profile_generation import PROFILE_FORMAT_INSTRUCTIONS, complete_prosody_profile
 
-def analyze_prosody_needs(state: GraphState) -> GraphState:
-    """
-    Analyze the script to determine prosody needs using sophisticated LLM analysis.
-    
-    Args:
-        state: The current workflow state
-        
-    Returns:
-        GraphState: The updated workflow state with prosody analysis
-    """
-    try:
-        logger.info("Starting prosody needs analysis")
-        log_state_transition("analyze_prosody_needs", state)
-        
-        if "error" in state and state["error"]:
-            logger.error(f"Skipping due to previous error: {state['error']}")
-            return state
-            
-        # Initialize LLM with higher temperature for more creative analysis
-        llm = ChatOpenAI(temperature=0.3, model="gpt-4o")
-        
-        # Create a comprehensive prompt that leverages the LLM's capabilities
-        system_prompt = """You are a prosody analysis expert for meditation narration with deep expertise in SSML for AWS Polly. 
-        Your task is to analyze meditation scripts and provide detailed prosody recommendations.
-        
-        Analyze the script comprehensively, considering:
-        1. Emotional undertones and progression throughout the meditation
-        2. Natural speech patterns and appropriate pauses
-        3. Specific breathing patterns and their timing requirements
-        4. Sections that require changes in pace, pitch, or volume
-        5. Words or phrases that should receive emphasis
-        6. Appropriate pacing for deepening relaxation over time
-        
-        Consider how the script's structure affects vocal delivery:
-        - Introduction sections typically need a welcoming, moderate pace
-        - Grounding sections benefit from a slower, deeper voice
-        - Breathing instruction sections need careful timing and clear articulation
-        - Body scan sections work best with a gentle, methodical progression
-        - Visualization sections require an evocative, soothing quality
-        - Closing sections should provide gentle transition back to awareness
-        
-        For AWS Polly Neural voices, remember:
-        - Emphasis tags don't work, so suggest prosody alternatives
-        - Breathing sounds must be created with breaks, not auto-breaths
-        - Whispered effects aren't available, so suggest volume/rate alternatives
-        
-        Analyze the script deeply and create a comprehensive prosody profile."""
-        
-        human_prompt = f"""I need a detailed prosody analysis for this meditation script that will be narrated using AWS Polly Neural voices (primarily Joanna for English, Conchita for Spanish).
-
-Script context:
-- Emotional state: {state['request']['emotional_state']}
-- Meditation style: {state['request']['meditation_style']}
-- Theme: {state['request']['meditation_theme']}
-- Duration: {state['request']['duration_minutes']} minutes
-- Language: {state['request']['language_code']}
-
-Here is the meditation script:
-        {state['meditation_script']['content']}
-        
-Please provide a comprehensive prosody analysis that includes:
-
-1. Overall tone characterization
-2. Section identification with boundaries and characteristics:
-   - Introduction/welcome
-   - Grounding
-   - Body scan sections
-   - Breathing instruction sections (with pattern detection)
-   - Visualization sections
-   - Affirmation sections
-   - Closing/transition
-
-3. Breathing pattern detection:
-   - Identify specific breathing techniques (4-7-8, box breathing, etc.)
-   - Recommend appropriate pause timings for each phase
-   - Note where breathing guidance occurs
-
-4. Key terms for emphasis:
-   - Important words that deserve prosodic emphasis
-   - Terms central to the meditation's theme
-   - Repeated phrases or mantras
-
-5. Emotional progression stages:
-   - How voice quality should change from beginning to middle to end
-   - Moments of heightened guidance vs. deeper relaxation
-
-Your analysis should be detailed enough to guide SSML generation with appropriate prosody tags."""
-        
-        # Get detailed analysis
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
-        
-        # Format instructions are specific to the required output structure
-        format_instructions = """
+# Format instructions are specific to the required output structure
+PROSODY_FORMAT_INSTRUCTIONS = """
         Your response should be a JSON object with the following structure:
         {
           "overall_tone": "description of the overall tone",
@@ -156,142 +69,426 @@ Your analysis should be detailed enough to guide SSML generation with appropriat
           ]
         }
         """
+
+# Create a comprehensive prompt that leverages the LLM's capabilities
+PROSODY_SYSTEM_PROMPT = """You are a prosody analysis expert for meditation narration with deep expertise in SSML for AWS Polly. 
+    Your task is to analyze meditation scripts and provide detailed prosody recommendations.
+    
+    Analyze the script comprehensively, considering:
+    1. Emotional undertones and progression throughout the meditation
+    2. Natural speech patterns and appropriate pauses
+    3. Specific breathing patterns and their timing requirements
+    4. Sections that require changes in pace, pitch, or volume
+    5. Words or phrases that should receive emphasis
+    6. Appropriate pacing for deepening relaxation over time
+    
+    Consider how the script's structure affects vocal delivery:
+    - Introduction sections typically need a welcoming, moderate pace
+    - Grounding sections benefit from a slower, deeper voice
+    - Breathing instruction sections need careful timing and clear articulation
+    - Body scan sections work best with a gentle, methodical progression
+    - Visualization sections require an evocative, soothing quality
+    - Closing sections should provide gentle transition back to awareness
+    
+    For AWS Polly Neural voices, remember:
+    - Emphasis tags don't work, so suggest prosody alternatives
+    - Breathing sounds must be created with breaks, not auto-breaths
+    - Whispered effects aren't available, so suggest volume/rate alternatives
+    
+    Analyze the script deeply and create a comprehensive prosody profile."""
+
+# The static messages are built once and shared by every call. They lead the
+# message list so the provider's prompt prefix cache can reuse them.
+PROSODY_SYSTEM_MESSAGE = SystemMessage(content=PROSODY_SYSTEM_PROMPT)
+PROSODY_FORMAT_MESSAGE = HumanMessage(content=PROSODY_FORMAT_INSTRUCTIONS)
+
+# Extra static instructions for the fused analysis + profile call
+PROSODY_BUNDLE_MESSAGE = HumanMessage(content=f"""Also create the prosody profile for this meditation in the same response.
+Return a single JSON object with two fields: "analysis", holding the prosody analysis in the format above, and "profile", holding the prosody profile in the format below.
+{PROFILE_FORMAT_INSTRUCTIONS}""")
+
+def fused_prosody_enabled() -> bool:
+    """
+    Check whether the analysis and profile are requested in one call via FUSED_PROSODY=on.
+    
+    Returns:
+        bool: Whether analyze_prosody_needs also produces the prosody profile
+    """
+    return os.environ.get("FUSED_PROSODY", "off").lower() in ("on", "1", "true")
+
+# Lines with pacing cues are kept verbatim when a long script is condensed
+_PACING_CUE_RE = re.compile(
+    r'breath|inhale|exhale|hold|pause|notice|feel|respira|inhala|exhala|pausa|siente|nota',
+    re.IGNORECASE
+)
+_SECTION_HEADER_RE = re.compile(r'^(#|\[[^\]]+\]$)')
+
+def _summarize_script_for_prosody(content: str) -> str:
+    """
+    Condense a script to the parts that drive prosody: section headers, the
+    first sentence of each paragraph and every line with a pacing cue.
+    
+    Args:
+        content: The meditation script
         
-        # Generate the analysis
-        logger.info("Requesting prosody analysis")
-        response = llm.invoke(messages + [HumanMessage(content=format_instructions)])
+    Returns:
+        str: The condensed script
+    """
+    summary = []
+    for paragraph in content.split("\n\n"):
+        first_sentence_pending = True
+        for line in paragraph.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if _SECTION_HEADER_RE.match(line) or line.isupper():
+                summary.append(line)
+                continue
+            if _PACING_CUE_RE.search(line):
+                summary.append(line)
+            elif first_sentence_pending:
+                summary.append(SENTENCE_SPLIT_RE.split(line, 1)[0])
+            first_sentence_pending = False
+    return "\n".join(summary)
+
+def _script_for_prompt(content: str) -> str:
+    """
+    Fit the script into the prosody prompt's token budget.
+    
+    Args:
+        content: The meditation script
         
-        # Log the prosody analysis interaction
-        log_llm_interaction(
-            prompt=human_prompt + "\n\n" + format_instructions,
-            response_content=response.content,
-            model=llm.model_name,
-            purpose="Prosody Analysis"
-        )
+    Returns:
+        str: The full script if it fits, otherwise its condensed form cut to the budget
+    """
+    if len(truncate_to_tokens(content, PROSODY_SCRIPT_TOKEN_BUDGET)) == len(content):
+        return content
+    
+    logger.info("Script exceeds the prosody token budget, sending a condensed version")
+    summary = truncate_to_tokens(_summarize_script_for_prosody(content), PROSODY_SCRIPT_TOKEN_BUDGET)
+    return f"(Condensed to section headers, opening sentences and pacing cues)\n{summary}"
+
+def _build_prosody_messages(request: Dict[str, Any], script_content: str, fused: bool = False) -> List[Any]:
+    """
+    Build the chat messages for the prosody analysis call.
+    
+    Args:
+        request: The meditation request parameters
+        script_content: The meditation script to analyze
+        fused: Also ask for the prosody profile in the same response
         
-        # Extract the structured data
-        try:
-            # Try to parse JSON from the response
-            # Extract JSON content from the response
-            content = response.content
-            # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', content, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0).strip()
-            else:
-                # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1).strip()
-                else:
-                    # Assume the entire content is JSON
-                    json_str = content
-            
-            # Parse the JSON string
-            prosody_analysis = json.loads(json_str)
-            state["prosody_analysis"] = prosody_analysis
-            
-        except Exception as parsing_error:
-            # Create a more intelligent fallback by asking the LLM to fix the format
-            fallback_prompt = f"""I received the following analysis, but it's not in the correct JSON format. 
-            Please reformat it according to the required structure:
-            
-            {response.content}
-            
-            Required format:
-            {format_instructions}
-            
-            Just return the properly formatted JSON with no explanation."""
-            
-            try:
-                fallback_response = llm.invoke([HumanMessage(content=fallback_prompt)])
-                fallback_content = fallback_response.content
-                
-                # Try to extract and parse JSON again
-                json_match = re.search(r'({.*}|\[.*\])', fallback_content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0).strip()
-                else:
-                    json_match = re.search(r'({.+})', fallback_content, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(1).strip()
-                    else:
-                        json_str = fallback_content
-                
-                prosody_analysis = json.loads(json_str)
-                state["prosody_analysis"] = prosody_analysis
-                state["parsing_warning"] = f"Used fallback parsing: {str(parsing_error)}"
-                
-            except Exception as fallback_error:
-                # If all else fails, create a basic analysis structure
-                state["prosody_analysis"] = {
-                "overall_tone": "calming and soothing",
-                    "key_terms": ["breath", "relax", "present", "awareness", "gentle"],
-                    "breathing_patterns": [
-                        {
-                            "type": "deep_breathing",
-                            "phases": {
-                                "inhale": "4s",
-                                "exhale": "6s"
-                            }
-                        }
-                    ],
-                "section_characteristics": {
-                        "introduction": {
-                            "type": "grounding",
-                            "tone": "welcoming and grounding",
-                            "prosody": {
-                                "rate": "80%",
-                                "pitch": "-15%",
-                                "volume": "soft"
-                            }
-                        },
-                        "body": {
-                            "type": "guidance",
-                            "tone": "supportive and gentle",
-                            "prosody": {
-                                "rate": "70%",
-                                "pitch": "-18%",
-                                "volume": "x-soft"
-                            }
-                        },
-                        "closing": {
-                            "type": "transition",
-                            "tone": "gentle transition to awareness",
-                            "prosody": {
-                                "rate": "75%",
-                                "pitch": "-15%",
-                                "volume": "soft"
-                            }
-                        }
-                    },
-                    "progression": {
-                        "start": {
-                            "rate": "85%",
-                            "pitch": "-10%",
-                            "volume": "medium"
-                        },
-                        "middle": {
-                            "rate": "75%",
-                            "pitch": "-15%",
-                            "volume": "soft"
-                        },
-                        "end": {
-                            "rate": "70%",
-                            "pitch": "-20%",
-                            "volume": "x-soft"
-                        }
-                    },
-                    "recommended_emphasis_points": []
+    Returns:
+        List of messages for the LLM, static prefix first and the script-specific prompt last
+    """
+    human_prompt = f"""I need a detailed prosody analysis for this meditation script that will be narrated using AWS Polly Neural voices (primarily Joanna for English, Conchita for Spanish).
+
+Script context:
+- Emotional state: {request['emotional_state']}
+- Meditation style: {request['meditation_style']}
+- Theme: {request['meditation_theme']}
+- Duration: {request['duration_minutes']} minutes
+- Language: {request['language_code']}
+
+Here is the meditation script:
+    {_script_for_prompt(script_content)}
+    
+Please provide a comprehensive prosody analysis that includes:
+
+1. Overall tone characterization
+2. Section identification with boundaries and characteristics:
+   - Introduction/welcome
+   - Grounding
+   - Body scan sections
+   - Breathing instruction sections (with pattern detection)
+   - Visualization sections
+   - Affirmation sections
+   - Closing/transition
+
+3. Breathing pattern detection:
+   - Identify specific breathing techniques (4-7-8, box breathing, etc.)
+   - Recommend appropriate pause timings for each phase
+   - Note where breathing guidance occurs
+
+4. Key terms for emphasis:
+   - Important words that deserve prosodic emphasis
+   - Terms central to the meditation's theme
+   - Repeated phrases or mantras
+
+5. Emotional progression stages:
+   - How voice quality should change from beginning to middle to end
+   - Moments of heightened guidance vs. deeper relaxation
+
+Your analysis should be detailed enough to guide SSML generation with appropriate prosody tags."""
+    
+    static_messages = [PROSODY_SYSTEM_MESSAGE, PROSODY_FORMAT_MESSAGE]
+    if fused:
+        static_messages.append(PROSODY_BUNDLE_MESSAGE)
+    return static_messages + [HumanMessage(content=human_prompt)]
+
+def _fallback_prosody_analysis() -> Dict[str, Any]:
+    """
+    Basic prosody analysis used when the LLM response can't be parsed at all.
+    
+    Returns:
+        Dict[str, Any]: A generic calming prosody analysis
+    """
+    return {
+        "overall_tone": "calming and soothing",
+        "key_terms": ["breath", "relax", "present", "awareness", "gentle"],
+        "breathing_patterns": [
+            {
+                "type": "deep_breathing",
+                "phases": {
+                    "inhale": "4s",
+                    "exhale": "6s"
+                }
+            }
+        ],
+        "section_characteristics": {
+            "introduction": {
+                "type": "grounding",
+                "tone": "welcoming and grounding",
+                "prosody": {
+                    "rate": "80%",
+                    "pitch": "-15%",
+                    "volume": "soft"
+                }
+            },
+            "body": {
+                "type": "guidance",
+                "tone": "supportive and gentle",
+                "prosody": {
+                    "rate": "70%",
+                    "pitch": "-18%",
+                    "volume": "x-soft"
+                }
+            },
+            "closing": {
+                "type": "transition",
+                "tone": "gentle transition to awareness",
+                "prosody": {
+                    "rate": "75%",
+                    "pitch": "-15%",
+                    "volume": "soft"
                 }
-                state["parsing_error"] = f"Could not parse response: {str(parsing_error)} → {str(fallback_error)}"
-            
-        logger.info("Completed prosody analysis")
-        log_state_transition("analyze_prosody_needs_complete", state)
+            }
+        },
+        "progression": {
+            "start": {
+                "rate": "85%",
+                "pitch": "-10%",
+                "volume": "medium"
+            },
+            "middle": {
+                "rate": "75%",
+                "pitch": "-15%",
+                "volume": "soft"
+            },
+            "end": {
+                "rate": "70%",
+                "pitch": "-20%",
+                "volume": "x-soft"
+            }
+        },
+        "recommended_emphasis_points": []
+    }
+
+def _analysis_cache_key(llm: Any, state: GraphState, fused: bool) -> Optional[str]:
+    """
+    Build the result cache key for a prosody analysis.
+    
+    Args:
+        llm: The chat model used for the analysis
+        state: The current workflow state
+        fused: Whether the result also holds the prosody profile
+        
+    Returns:
+        Optional[str]: The cache key, or None if the analysis shouldn't be cached
+    """
+    return result_cache_key(
+        "Prosody Bundle" if fused else "Prosody Analysis",
+        llm,
+        request=state['request'],
+        script=state['meditation_script']['content']
+    )
+
+def _store_analysis(state: GraphState, result: Dict[str, Any], fused: bool) -> None:
+    """
+    Store a parsed analysis result in the state.
+    
+    A fused result also carries the prosody profile, which is handed to the
+    create_profile step as a prefetched profile.
+    
+    Args:
+        state: The current workflow state
+        result: The parsed analysis, or the {"analysis", "profile"} bundle
+        fused: Whether the result is a bundle
+    """
+    if fused:
+        state["prefetched_profile"] = {
+            "request": state["request"],
+            "profile": complete_prosody_profile(result["profile"])
+        }
+        result = result["analysis"]
+    state["prosody_analysis"] = result
+
+def _prepare_analysis_call(state: GraphState) -> Optional[Dict[str, Any]]:
+    """
+    Run the checks that come before the prosody analysis LLM call.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Optional[Dict[str, Any]]: The call's settings, cache key and messages, or
+            None if the state is already complete (earlier error or cached analysis)
+    """
+    logger.info("Starting prosody needs analysis")
+    log_state_transition("analyze_prosody_needs", state)
+    # A flag loaded from an earlier failed attempt must not outlive this one
+    state.pop("parsing_error", None)
+    
+    if "error" in state and state["error"]:
+        logger.error(f"Skipping due to previous error: {state['error']}")
+        return None
+        
+    # Initialize LLM with higher temperature for more creative analysis
+    llm = get_chat_model(0.3)
+    
+    fused = fused_prosody_enabled()
+    
+    cache_key = _analysis_cache_key(llm, state, fused)
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        logger.info("Using cached prosody analysis")
+        _store_analysis(state, cached, fused)
+        log_state_transition("analyze_prosody_needs_complete", state, keys=("prosody_analysis", "parsing_error"))
+        return None
+    
+    logger.info("Requesting prosody analysis")
+    return {
+        "fused": fused,
+        "purpose": "Prosody Bundle" if fused else "Prosody Analysis",
+        "cache_key": cache_key,
+        "messages": _build_prosody_messages(state['request'], state['meditation_script']['content'], fused),
+        "model": llm.model_name
+    }
+
+def _drop_foreign_quotes(analysis: Dict[str, Any], script_content: str) -> None:
+    """
+    Remove the parts of a reused analysis that quote the script it was written for.
+    
+    Key terms and emphasis points are kept only if they occur in this script;
+    section boundaries, which quote the other script's lines, are dropped.
+    
+    Args:
+        analysis: The prosody analysis reused from a similar prompt
+        script_content: The script being analyzed
+    """
+    script = script_content.lower()
+    if isinstance(analysis.get("key_terms"), list):
+        analysis["key_terms"] = [
+            term for term in analysis["key_terms"] if isinstance(term, str) and term.lower() in script
+        ]
+    if isinstance(analysis.get("recommended_emphasis_points"), list):
+        analysis["recommended_emphasis_points"] = [
+            point for point in analysis["recommended_emphasis_points"]
+            if isinstance(point, dict) and str(point.get("phrase", "")).lower() in script
+        ]
+    for characteristics in (analysis.get("section_characteristics") or {}).values():
+        if isinstance(characteristics, dict):
+            characteristics.pop("boundaries", None)
+
+def _complete_analysis(state: GraphState, call: Dict[str, Any], response: Any) -> GraphState:
+    """
+    Log the analysis response, store the parsed analysis and cache it if it parsed.
+    
+    A response the semantic cache reused from a similar script has that
+    script's quotes removed and is not written to the result cache, which
+    is keyed by this script.
+    
+    Args:
+        state: The current workflow state
+        call: The call returned by _prepare_analysis_call
+        response: The analysis response
+        
+    Returns:
+        GraphState: The updated workflow state with prosody analysis
+    """
+    content = response.content
+    semantic_hit = is_semantic_hit(response)
+    log_llm_interaction(
+        prompt=PROSODY_FORMAT_INSTRUCTIONS + "\n\n" + call["messages"][-1].content,
+        response_content=content,
+        model=call["model"],
+        purpose=call["purpose"]
+    )
+    
+    # JSON mode guarantees well-formed JSON unless the reply was cut off
+    try:
+        result = loads_json(extract_json_block(content) or content)
+        if semantic_hit:
+            _drop_foreign_quotes(result["analysis"] if call["fused"] else result, state['meditation_script']['content'])
+        _store_analysis(state, result, call["fused"])
+        parsed = True
+        
+    except (ValueError, KeyError, TypeError, AttributeError) as parsing_error:
+        logger.warning(f"Could not parse prosody analysis, using fallback: {str(parsing_error)}")
+        state["prosody_analysis"] = _fallback_prosody_analysis()
+        state["parsing_error"] = f"Could not parse response: {str(parsing_error)}"
+        parsed = False
+    
+    if parsed and not semantic_hit:
+        store_result(call["cache_key"], result)
+        
+    logger.info("Completed prosody analysis")
+    log_state_transition("analyze_prosody_needs_complete", state, keys=("prosody_analysis", "parsing_error"))
+    return state
+
+@ledgered("analyze_prosody")
+def analyze_prosody_needs(state: GraphState) -> GraphState:
+    """
+    Analyze the script to determine prosody needs using sophisticated LLM analysis.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with prosody analysis
+    """
+    try:
+        call = _prepare_analysis_call(state)
+        if call is None:
+            return state
+        
+        response = cached_invoke(get_json_chat_model(0.3), call["messages"], call["purpose"], state['request'])
+        return _complete_analysis(state, call, response)
+        
+    except Exception as e:
+        logger.exception(f"Error analyzing prosody needs: {str(e)}")
+        state["error"] = f"Error analyzing prosody needs: {str(e)}"
         return state
+
+@ledgered("analyze_prosody")
+async def aanalyze_prosody_needs(state: GraphState) -> GraphState:
+    """
+    Async version of analyze_prosody_needs using non-blocking LLM calls.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with prosody analysis
+    """
+    try:
+        call = _prepare_analysis_call(state)
+        if call is None:
+            return state
+        
+        response = await acached_invoke(get_json_chat_model(0.3), call["messages"], call["purpose"], state['request'])
+        return _complete_analysis(state, call, response)
         
     except Exception as e:
         logger.exception(f"Error analyzing prosody needs: {str(e)}")
         state["error"] = f"Error analyzing prosody needs: {str(e)}"
-        return state 
\ No newline at end of file
+        return state
@@ -5,37 +5,24 @@ Meditation script generation node for the workflow.
 import re
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import functools
+from typing import Dict, Any, List, Optional, Callable, Tuple
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:  # Older langgraph without custom stream support
+    get_stream_writer = None
+
+from meditation_tts.config.constants import FAST_LLM_MODEL, MAX_CONCURRENT_RUNS
 from meditation_tts.models.state import GraphState
+from meditation_tts.services.llm_client import get_chat_model
 from meditation_tts.utils.logging_utils import log_state_transition, log_llm_interaction, logger
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.text_utils import extract_json_block
 
-def generate_meditation_script(state: GraphState) -> GraphState:
-    """
-    Generate a detailed meditation script with LLM including section identification.
-    
-    Args:
-        state: The current workflow state
-        
-    Returns:
-        GraphState: The updated workflow state with meditation script
-    """
-    try:
-        logger.info("Starting meditation script generation")
-        log_state_transition("generate_meditation_script", state)
-        
-        if "error" in state and state["error"]:
-            logger.error(f"Skipping due to previous error: {state['error']}")
-            return state
-
-        # Initialize LLM with higher temperature for more creative script generation
-        llm = ChatOpenAI(temperature=0.7, model="gpt-4o")
-        
-        # Create a detailed system prompt with meditation expertise
-        system_prompt = """You are an expert meditation script writer with a background in mindfulness, psychology, and therapeutic communication.
+SCRIPT_SYSTEM_PROMPT = """You are an expert meditation script writer with a background in mindfulness, psychology, and therapeutic communication.
 
 Your task is to create a guided meditation script that is highly effective, engaging, and tailored to specific needs. Each script should include:
 
@@ -61,49 +48,109 @@ Your language should be:
 
 Explicitly mark each section with its type (e.g., [INTRODUCTION], [BODY_SCAN], [BREATHING], [CLOSING]) to aid in prosody processing."""
 
-        # Create a detailed human prompt with all context
-        human_prompt = f"""Create a {state["request"]["duration_minutes"]}-minute {state["request"]["meditation_style"]} meditation script focused on {state["request"]["meditation_theme"]} for someone feeling {state["request"]["emotional_state"]}.
+# The system prompt is static, so its message is built once and shared by every
+# call. It always goes first so the provider's prompt prefix cache can reuse it.
+SCRIPT_SYSTEM_MESSAGE = SystemMessage(content=SCRIPT_SYSTEM_PROMPT)
 
-The script should be in {state["request"]["language_code"]} and voiced by a {state["request"]["voice_type"]} voice.
+def _build_script_messages(request: Dict[str, Any]) -> List[Any]:
+    """
+    Build the chat messages for the script generation call.
+    
+    Args:
+        request: The meditation request parameters
+        
+    Returns:
+        List of messages for the LLM
+    """
+    human_prompt = f"""Create a {request["duration_minutes"]}-minute {request["meditation_style"]} meditation script focused on {request["meditation_theme"]} for someone feeling {request["emotional_state"]}.
+
+The script should be in {request["language_code"]} and voiced by a {request["voice_type"]} voice.
 
 Include these essential components:
 1. A welcoming introduction (30-45 seconds)
 2. Grounding/centering instructions
 3. Breathing guidance appropriate for this style and emotional state
-4. The main practice section specific to {state["request"]["meditation_style"]}
+4. The main practice section specific to {request["meditation_style"]}
 5. A gentle closing with integration (30-45 seconds)
 
 Structure the script clearly with section markers like [INTRODUCTION], [BREATHING], [BODY_SCAN], etc., to enable appropriate prosody processing.
 
 Timing guidance:
-- For a {state["request"]["duration_minutes"]}-minute meditation, the script should be approximately {state["request"]["duration_minutes"] * 125} words
+- For a {request["duration_minutes"]}-minute meditation, the script should be approximately {request["duration_minutes"] * 125} words
 - Allow for natural pauses and breathing spaces
 - Pace the script to avoid rushing while maintaining engagement
 
 Remember that this script will be processed with SSML for voice synthesis, so maintain a natural speaking rhythm."""
 
-        # Generate the script
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
-        
-        logger.info(f"Requesting script generation for {state['request']['meditation_style']} meditation on {state['request']['meditation_theme']}")
-        response = llm.invoke(messages)
-        script_content = response.content
+    return [
+        SCRIPT_SYSTEM_MESSAGE,
+        HumanMessage(content=human_prompt)
+    ]
+
+def _get_token_writer() -> Optional[Callable[[Any], None]]:
+    """
+    Get the LangGraph custom stream writer when running inside a graph.
+    
+    Returns:
+        Optional callable forwarding partial output to stream_mode="custom" consumers
+    """
+    if get_stream_writer is None:
+        return None
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (e.g. run_single_step)
+        return None
+
+def _stream_script(llm: Any, messages: List[Any]) -> str:
+    """
+    Stream the script from the LLM, forwarding tokens as they arrive.
+    
+    Args:
+        llm: Chat model to stream from
+        messages: Messages for the script generation call
         
-        # Log the LLM interaction
-        log_llm_interaction(
-            prompt=human_prompt,
-            response_content=script_content,
-            model=llm.model_name,
-            purpose="Meditation Script Generation"
-        )
+    Returns:
+        str: The complete script
+    """
+    writer = _get_token_writer()
+    chunks = []
+    for chunk in llm.stream(messages):
+        chunks.append(chunk.content)
+        if writer is not None and chunk.content:
+            writer({"step": "generate_script", "token": chunk.content})
+    return "".join(chunks)
+
+async def _astream_script(llm: Any, messages: List[Any]) -> str:
+    """
+    Async version of _stream_script.
+    
+    Args:
+        llm: Chat model to stream from
+        messages: Messages for the script generation call
         
-        logger.info(f"Generated script with {len(script_content)} characters")
+    Returns:
+        str: The complete script
+    """
+    writer = _get_token_writer()
+    chunks = []
+    async for chunk in llm.astream(messages):
+        chunks.append(chunk.content)
+        if writer is not None and chunk.content:
+            writer({"step": "generate_script", "token": chunk.content})
+    return "".join(chunks)
+
+def _build_section_analysis_prompt(script_content: str) -> str:
+    """
+    Build the prompt asking the LLM to split a script into sections.
+    
+    Args:
+        script_content: The generated meditation script
         
-        # Use LLM to analyze script sections rather than simple text splitting
-        section_analysis_prompt = f"""Analyze this meditation script and identify distinct sections with their boundaries.
+    Returns:
+        str: The section analysis prompt
+    """
+    section_analysis_prompt = f"""Analyze this meditation script and identify distinct sections with their boundaries.
 
 SCRIPT:
 {script_content}
@@ -115,34 +162,19 @@ For each section, determine:
 
 Return the analysis as a JSON structure with each section containing the section type, content, and function."""
 
-        # Get detailed section analysis
-        logger.info("Requesting section analysis")
-        section_analysis_response = llm.invoke([HumanMessage(content=section_analysis_prompt)])
-        
-        # Log the section analysis interaction
-        log_llm_interaction(
-            prompt=section_analysis_prompt,
-            response_content=section_analysis_response.content,
-            model=llm.model_name,
-            purpose="Script Section Analysis"
-        )
+    return section_analysis_prompt
+
+def _build_section_fix_prompt(analysis_content: str) -> str:
+    """
+    Build the prompt asking the LLM to reformat an unparseable section analysis.
+    
+    Args:
+        analysis_content: The section analysis response that couldn't be parsed
         
-        # Extract sections and create structured script
-        try:
-            # Try to parse JSON from the section analysis
-            # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', section_analysis_response.content, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0).strip()
-            else:
-                # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', section_analysis_response.content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1).strip()
-                else:
-                    # Use LLM to fix the format
-                    fix_prompt = f"""The previous section analysis couldn't be parsed as JSON. Please reformat it as a valid JSON array of section objects like this:
+    Returns:
+        str: The reformatting prompt
+    """
+    fix_prompt = f"""The previous section analysis couldn't be parsed as JSON. Please reformat it as a valid JSON array of section objects like this:
 
 [
   {{
@@ -159,101 +191,488 @@ Return the analysis as a JSON structure with each section containing the section
 ]
 
 Original response:
-{section_analysis_response.content}
+{analysis_content}
 
 Just return the valid JSON with no explanation."""
-                    
-                    fix_response = llm.invoke([HumanMessage(content=fix_prompt)])
-                    fix_content = fix_response.content
-                    
-                    # Try to extract JSON again
-                    json_match = re.search(r'({.*}|\[.*\])', fix_content, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0).strip()
-                    else:
-                        json_match = re.search(r'(\[{.+}\])', fix_content, re.DOTALL)
-                        if json_match:
-                            json_str = json_match.group(1).strip()
-                        else:
-                            json_str = fix_content
-            
-            # Parse section data
-            section_data = json.loads(json_str)
+
+    return fix_prompt
+
+def _find_section_json(content: str) -> Optional[str]:
+    """
+    Find the JSON part of a section analysis response.
+    
+    Args:
+        content: The section analysis response
+        
+    Returns:
+        str or None: The JSON string, or None if the response contains no JSON
+    """
+    return extract_json_block(content)
+
+def _find_fixed_section_json(fix_content: str) -> str:
+    """
+    Find the JSON part of a reformatted section analysis response.
+    
+    Args:
+        fix_content: The reformatting response
+        
+    Returns:
+        str: The JSON string, or the whole response if no JSON was found
+    """
+    return extract_json_block(fix_content) or fix_content
+
+def _parse_script_sections(json_str: str) -> List[Dict[str, Any]]:
+    """
+    Parse the section analysis JSON into script sections.
+    
+    Args:
+        json_str: The section analysis JSON
+        
+    Returns:
+        List of sections with type and content
+    """
+    section_data = json.loads(json_str)
+    
+    script_sections = []
+    for section in section_data:
+        script_sections.append({
+            "type": section["type"],
+            "content": section["content"]
+        })
+    return script_sections
+
+# Section marker keywords mapped to standardized types, checked in order;
+# every keyword of an entry must appear in the marker
+SECTION_MARKER_ALIASES = (
+    (("intro",), "introduction"),
+    (("breath",), "breathing"),
+    (("body", "scan"), "body_scan"),
+    (("visual",), "visualization"),
+    (("affirm",), "affirmations"),
+    (("clos",), "closing"),
+    (("ground",), "grounding"),
+)
+
+# Paragraph content patterns for scripts without section markers, checked in order
+SECTION_KEYWORD_PATTERNS = (
+    ("breathing", re.compile(r'inhala|exhala|respira|breathe|inhale|exhale', re.IGNORECASE)),
+    ("body_scan", re.compile(r'body|cuerpo|scan|muscles|músculos', re.IGNORECASE)),
+    ("visualization", re.compile(r'imagine|visualize|visualiza|imagina', re.IGNORECASE)),
+)
+
+# Bracketed section markers, e.g. "[BREATHING]"
+_SECTION_MARKER_RE = re.compile(r'\[([^\]]+)\]')
+
+# Scripts with at least this many markers skip the LLM section analysis
+MIN_SECTION_MARKERS = 3
+
+@functools.lru_cache(maxsize=256)
+def _canonical_section_type(marker: str) -> str:
+    """
+    Map a section marker to its standardized type.
+    
+    Scripts reuse a handful of marker names, so results are cached and
+    each distinct marker is matched against the aliases only once.
+    
+    Args:
+        marker: The text inside the marker brackets
+        
+    Returns:
+        str: The standardized section type, or the normalized marker if none matches
+    """
+    section_type = marker.lower().strip()
+    for keywords, standard_type in SECTION_MARKER_ALIASES:
+        if all(keyword in section_type for keyword in keywords):
+            return standard_type
+    return section_type
+
+def _find_section_markers(script_content: str) -> List[Tuple[str, str]]:
+    """
+    Find the section markers of a script and the text following each one.
+    
+    Scans marker positions once and slices the text between them, which
+    stays linear on long scripts.
+    
+    Args:
+        script_content: The generated meditation script
+        
+    Returns:
+        List of (marker, content) pairs
+    """
+    markers = list(_SECTION_MARKER_RE.finditer(script_content))
+    # Each section runs until the next marker, the last one to the end
+    ends = [match.start() for match in markers[1:]] + [len(script_content)]
+    return [(match.group(1), script_content[match.end():end]) for match, end in zip(markers, ends)]
+
+def _marker_sections(section_markers: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Build script sections from bracketed section markers.
+    
+    Args:
+        section_markers: (marker, content) pairs found in the script
+        
+    Returns:
+        List of sections with type and content
+    """
+    return [
+        {"type": _canonical_section_type(marker), "content": content.strip()}
+        for marker, content in section_markers
+    ]
+
+def _sections_from_markers(script_content: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the script sections straight from its markers when there are enough.
+    
+    The system prompt asks for [SECTION] markers, so a well-formed script
+    needs no LLM section analysis.
+    
+    Args:
+        script_content: The generated meditation script
+        
+    Returns:
+        List of sections, or None if the script has fewer than MIN_SECTION_MARKERS markers
+    """
+    section_markers = _find_section_markers(script_content)
+    if len(section_markers) < MIN_SECTION_MARKERS:
+        return None
+    return _marker_sections(section_markers)
+
+def _fallback_script_sections(script_content: str) -> List[Dict[str, Any]]:
+    """
+    Split a script into sections without the LLM, from markers or paragraphs.
+    
+    Args:
+        script_content: The generated meditation script
+        
+    Returns:
+        List of sections with type and content
+    """
+    # Fallback manual section extraction using regex
+    # Look for section markers in brackets [SECTION_NAME]
+    section_markers = _find_section_markers(script_content)
+    
+    if section_markers:
+        script_sections = _marker_sections(section_markers)
+    else:
+        # If no section markers, fall back to simple paragraph splitting
+        sections = script_content.split("\n\n")
+        
+        script_sections = []
+        for i, section in enumerate(sections):
+            if not section.strip():
+                continue
             
-            # Extract sections from parsed data
-            script_sections = []
-            for section in section_data:
-                script_sections.append({
-                    "type": section["type"],
-                    "content": section["content"]
-                })
-                
-        except Exception as parsing_error:
-            # Fallback manual section extraction using regex
-            # Look for section markers in brackets [SECTION_NAME]
-            section_markers = re.findall(r'\[(.*?)\](.*?)(?=\[|$)', script_content, re.DOTALL)
+            section_type = "introduction" if i == 0 else "closing" if i == len(sections) - 1 else "body"
             
-            if section_markers:
-                script_sections = []
-                for marker, content in section_markers:
-                    section_type = marker.lower().strip()
-                    # Map common section names to standardized types
-                    if "intro" in section_type:
-                        section_type = "introduction"
-                    elif "breath" in section_type:
-                        section_type = "breathing"
-                    elif "body" in section_type and "scan" in section_type:
-                        section_type = "body_scan"
-                    elif "visual" in section_type:
-                        section_type = "visualization"
-                    elif "affirm" in section_type:
-                        section_type = "affirmations"
-                    elif "clos" in section_type:
-                        section_type = "closing"
-                    elif "ground" in section_type:
-                        section_type = "grounding"
-                    
-                    script_sections.append({
-                        "type": section_type,
-                        "content": content.strip()
-                    })
-            else:
-                # If no section markers, fall back to simple paragraph splitting
-                sections = script_content.split("\n\n")
-                
-                script_sections = []
-                for i, section in enumerate(sections):
-                    if not section.strip():
-                        continue
-                    
-                    section_type = "introduction" if i == 0 else "closing" if i == len(sections) - 1 else "body"
-                    
-                    # Simple heuristic detection
-                    if re.search(r'(inhala|exhala|respira|breathe|inhale|exhale)', section.lower()):
-                        section_type = "breathing"
-                    elif re.search(r'(body|cuerpo|scan|muscles|músculos)', section.lower()):
-                        section_type = "body_scan"
-                    elif re.search(r'(imagine|visualize|visualiza|imagina)', section.lower()):
-                        section_type = "visualization"
-                    
-                    script_sections.append({
-                        "type": section_type,
-                        "content": section.strip()
-                    })
+            # Simple heuristic detection
+            for keyword_type, pattern in SECTION_KEYWORD_PATTERNS:
+                if pattern.search(section):
+                    section_type = keyword_type
+                    break
             
-            state["section_parsing_error"] = f"Used fallback section parsing: {str(parsing_error)}"
+            script_sections.append({
+                "type": section_type,
+                "content": section.strip()
+            })
+    
+    return script_sections
+
+def _section_fix_messages(analysis_content: str) -> List[Any]:
+    return [HumanMessage(content=_build_section_fix_prompt(analysis_content))]
+
+def _store_parsed_sections(state: GraphState, script_content: str, json_str: str) -> GraphState:
+    """
+    Parse the section JSON and store the structured script, falling back to
+    splitting the script without the LLM.
+    
+    Args:
+        state: The current workflow state
+        script_content: The generated script
+        json_str: The section analysis JSON
         
-        # Create and return the updated state
-        state["meditation_script"] = {
-            "content": script_content,
-            "sections": script_sections
-        }
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    try:
+        script_sections = _parse_script_sections(json_str)
+    except Exception as parsing_error:
+        return _store_fallback_sections(state, script_content, parsing_error)
+    return _store_script(state, script_content, script_sections)
+
+def _store_fallback_sections(state: GraphState, script_content: str, parsing_error: Exception) -> GraphState:
+    state["section_parsing_error"] = f"Used fallback section parsing: {str(parsing_error)}"
+    return _store_script(state, script_content, _fallback_script_sections(script_content))
+
+def _apply_section_analysis(state: GraphState, script_content: str,
+                            analysis_content: str, structure_llm: Any) -> GraphState:
+    """
+    Parse the section analysis and store the structured script in the state.
+    
+    Args:
+        state: The current workflow state
+        script_content: The generated script
+        analysis_content: The section analysis response
+        structure_llm: Chat model used to repair malformed section JSON
+        
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    json_str = _find_section_json(analysis_content)
+    if json_str is None:
+        # Use LLM to fix the format
+        try:
+            fix_response = structure_llm.invoke(_section_fix_messages(analysis_content))
+        except Exception as fix_error:
+            return _store_fallback_sections(state, script_content, fix_error)
+        json_str = _find_fixed_section_json(fix_response.content)
+    return _store_parsed_sections(state, script_content, json_str)
+
+async def _aapply_section_analysis(state: GraphState, script_content: str,
+                                   analysis_content: str, structure_llm: Any) -> GraphState:
+    """
+    Async version of _apply_section_analysis.
+    
+    Args:
+        state: The current workflow state
+        script_content: The generated script
+        analysis_content: The section analysis response
+        structure_llm: Chat model used to repair malformed section JSON
         
-        logger.info(f"Completed script generation with {len(script_sections)} sections")
-        log_state_transition("generate_meditation_script_complete", state)
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    json_str = _find_section_json(analysis_content)
+    if json_str is None:
+        try:
+            fix_response = await structure_llm.ainvoke(_section_fix_messages(analysis_content))
+        except Exception as fix_error:
+            return _store_fallback_sections(state, script_content, fix_error)
+        json_str = _find_fixed_section_json(fix_response.content)
+    return _store_parsed_sections(state, script_content, json_str)
+
+def _store_script(state: GraphState, script_content: str,
+                  script_sections: List[Dict[str, Any]]) -> GraphState:
+    """
+    Store the generated script and its sections in the state.
+    
+    Args:
+        state: The current workflow state
+        script_content: The generated script
+        script_sections: The script's sections
+        
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    state["meditation_script"] = {
+        "content": script_content,
+        "sections": script_sections
+    }
+    
+    logger.info(f"Completed script generation with {len(script_sections)} sections")
+    log_state_transition("generate_meditation_script_complete", state)
+    return state
+
+def _prepare_script_call(state: GraphState) -> Optional[Dict[str, Any]]:
+    """
+    Run the checks that come before the script LLM call.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Optional[Dict[str, Any]]: The script and structure models and the script
+            messages, or None if an earlier step failed
+    """
+    logger.info("Starting meditation script generation")
+    log_state_transition("generate_meditation_script", state)
+    # Drop the fallback flag of an earlier run of this step (e.g. from a loaded state)
+    state.pop("section_parsing_error", None)
+    
+    if "error" in state and state["error"]:
+        logger.error(f"Skipping due to previous error: {state['error']}")
+        return None
+    
+    logger.info(f"Requesting script generation for {state['request']['meditation_style']} meditation on {state['request']['meditation_theme']}")
+    return {
+        # Initialize LLM with higher temperature for more creative script generation
+        "llm": get_chat_model(0.7),
+        # Section extraction is mechanical, so a smaller deterministic model handles it
+        "structure_llm": get_chat_model(0.0, FAST_LLM_MODEL),
+        "messages": _build_script_messages(state["request"])
+    }
+
+def _section_analysis_messages(state: GraphState, call: Dict[str, Any], script_content: str) -> Optional[List[Any]]:
+    """
+    Log the generated script and store it right away if its markers give the sections.
+    
+    Args:
+        state: The current workflow state
+        call: The call returned by _prepare_script_call
+        script_content: The generated script
+        
+    Returns:
+        Optional[List[Any]]: The section analysis messages, or None if the
+            script was stored from its own section markers
+    """
+    log_llm_interaction(
+        prompt=call["messages"][-1].content,
+        response_content=script_content,
+        model=call["llm"].model_name,
+        purpose="Meditation Script Generation"
+    )
+    
+    logger.info(f"Generated script with {len(script_content)} characters")
+    
+    # Well-formed scripts carry their own section markers
+    script_sections = _sections_from_markers(script_content)
+    if script_sections is not None:
+        logger.info("Using the script's section markers, skipping section analysis")
+        _store_script(state, script_content, script_sections)
+        return None
+    
+    # Use LLM to analyze script sections rather than simple text splitting. The
+    # reply copies the script into each section, so it never goes through the
+    # semantic cache, where a similar script's sections would be narrated instead.
+    logger.info("Requesting section analysis")
+    return [HumanMessage(content=_build_section_analysis_prompt(script_content))]
+
+def _log_section_analysis(call: Dict[str, Any], messages: List[Any], response: Any) -> None:
+    log_llm_interaction(
+        prompt=messages[-1].content,
+        response_content=response.content,
+        model=call["structure_llm"].model_name,
+        purpose="Script Section Analysis"
+    )
+
+@ledgered("generate_script")
+def generate_meditation_script(state: GraphState) -> GraphState:
+    """
+    Generate a detailed meditation script with LLM including section identification.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    try:
+        call = _prepare_script_call(state)
+        if call is None:
+            return state
+        
+        script_content = _stream_script(call["llm"], call["messages"])
+        analysis_messages = _section_analysis_messages(state, call, script_content)
+        if analysis_messages is None:
+            return state
+        
+        response = call["structure_llm"].invoke(analysis_messages)
+        _log_section_analysis(call, analysis_messages, response)
+        return _apply_section_analysis(state, script_content, response.content, call["structure_llm"])
+        
+    except Exception as e:
+        logger.exception(f"Error generating meditation script: {str(e)}")
+        state["error"] = f"Error generating meditation script: {str(e)}"
         return state
+
+@ledgered("generate_script")
+async def agenerate_meditation_script(state: GraphState) -> GraphState:
+    """
+    Async version of generate_meditation_script using non-blocking LLM calls.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with meditation script
+    """
+    try:
+        call = _prepare_script_call(state)
+        if call is None:
+            return state
+        
+        script_content = await _astream_script(call["llm"], call["messages"])
+        analysis_messages = _section_analysis_messages(state, call, script_content)
+        if analysis_messages is None:
+            return state
+        
+        response = await call["structure_llm"].ainvoke(analysis_messages)
+        _log_section_analysis(call, analysis_messages, response)
+        return await _aapply_section_analysis(state, script_content, response.content, call["structure_llm"])
         
     except Exception as e:
         logger.exception(f"Error generating meditation script: {str(e)}")
         state["error"] = f"Error generating meditation script: {str(e)}"
-        return state 
\ No newline at end of file
+        return state
+
+def generate_meditation_scripts_batch(states: List[GraphState],
+                                      max_concurrency: int = MAX_CONCURRENT_RUNS) -> List[GraphState]:
+    """
+    Generate scripts for several workflow states with batched LLM calls.
+    
+    The script and section analysis calls for all states are sent with
+    llm.batch, so they run concurrently instead of one request at a time.
+    
+    Args:
+        states: Workflow states, one per meditation request
+        max_concurrency: Maximum number of concurrent LLM requests
+        
+    Returns:
+        List[GraphState]: The updated states, in the same order
+    """
+    active = [state for state in states if not state.get("error")]
+    if not active:
+        return states
+    
+    llm = get_chat_model(0.7)
+    structure_llm = get_chat_model(0.0, FAST_LLM_MODEL)
+    config = {"max_concurrency": max_concurrency}
+    
+    logger.info(f"Requesting script generation for {len(active)} meditations")
+    messages_list = [_build_script_messages(state["request"]) for state in active]
+    responses = llm.batch(messages_list, config=config, return_exceptions=True)
+    
+    scripted = []
+    for state, messages, response in zip(active, messages_list, responses):
+        if isinstance(response, Exception):
+            logger.error(f"Error generating meditation script: {str(response)}")
+            state["error"] = f"Error generating meditation script: {str(response)}"
+            continue
+        
+        log_llm_interaction(
+            prompt=messages[-1].content,
+            response_content=response.content,
+            model=llm.model_name,
+            purpose="Meditation Script Generation"
+        )
+        
+        script_sections = _sections_from_markers(response.content)
+        if script_sections is not None:
+            _store_script(state, response.content, script_sections)
+        else:
+            scripted.append((state, response.content))
+    
+    if not scripted:
+        return states
+    
+    analysis_prompts = [_build_section_analysis_prompt(script_content) for _, script_content in scripted]
+    analysis_responses = structure_llm.batch(
+        [[HumanMessage(content=prompt)] for prompt in analysis_prompts],
+        config=config,
+        return_exceptions=True
+    )
+    
+    for (state, script_content), prompt, response in zip(scripted, analysis_prompts, analysis_responses):
+        if isinstance(response, Exception):
+            logger.error(f"Error analyzing script sections: {str(response)}")
+            state["error"] = f"Error generating meditation script: {str(response)}"
+            continue
+        
+        log_llm_interaction(
+            prompt=prompt,
+            response_content=response.content,
+            model=structure_llm.model_name,
+            purpose="Script Section Analysis"
+        )
+        _apply_section_analysis(state, script_content, response.content, structure_llm)
+    
+    return states
@@ -2,44 +2,22 @@
 SSML generation node for the workflow.
 """
 
-import re
-import json
+import os
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
 from meditation_tts.models.state import GraphState
+from meditation_tts.services.llm_client import get_chat_model
+from meditation_tts.services.result_cache import result_cache_key, get_cached_result, store_result
+from meditation_tts.utils.json_utils import dumps_json
 from meditation_tts.utils.logging_utils import log_state_transition, log_llm_interaction, logger
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.ssml_utils import find_speak_block, validate_ssml
 
-def generate_ssml(state: GraphState) -> GraphState:
-    """
-    Generate optimized SSML markup using LLM with comprehensive SSML knowledge.
-    
-    Args:
-        state: The current workflow state
-        
-    Returns:
-        GraphState: The updated workflow state with SSML output
-    """
-    try:
-        logger.info("Starting SSML generation")
-        log_state_transition("generate_ssml", state)
-        
-        if "error" in state and state["error"]:
-            logger.error(f"Skipping due to previous error: {state['error']}")
-            return state
-            
-        script = state["meditation_script"]
-        profile = state["prosody_profile"]
-        analysis = state["prosody_analysis"]
-        
-        # Use a more powerful LLM for SSML generation
-        llm = ChatOpenAI(temperature=0.2, model="gpt-4o")
-        
-        # Create a system prompt with detailed SSML knowledge
-        system_prompt = """You are an expert SSML generator for AWS Polly Neural voices. Your task is to create optimized SSML markup for meditation narration that will be synthesized using AWS Polly.
+SSML_SYSTEM_PROMPT = """You are an expert SSML generator for AWS Polly Neural voices. Your task is to create optimized SSML markup for meditation narration that will be synthesized using AWS Polly.
 
 IMPORTANT CONSTRAINTS FOR AWS POLLY NEURAL VOICES:
 1. Use only fully supported tags: <speak>, <break>, <prosody>, <p>, <s>
@@ -82,25 +60,7 @@ SSML TECHNIQUES FOR MEDITATION:
 
 Your SSML should create a natural, soothing meditation experience appropriate for the requested emotional state and style."""
 
-        # Create a detailed human prompt with all relevant context
-        human_prompt = f"""Generate optimal SSML markup for this meditation script that will be synthesized using AWS Polly Neural voices.
-
-CONTEXT:
-- Emotional state: {state['request']['emotional_state']}
-- Meditation style: {state['request']['meditation_style']}
-- Theme: {state['request']['meditation_theme']}
-- Duration: {state['request']['duration_minutes']} minutes
-- Language: {state['request']['language_code']}
-- Voice: {state['request']['voice_type']} ({state['request']['language_code']})
-
-PROSODY PROFILE:
-{json.dumps(profile, indent=2)}
-
-PROSODY ANALYSIS:
-{json.dumps(analysis, indent=2)}
-
-MEDITATION SCRIPT:
-{script['content']}
+SSML_INSTRUCTIONS = """Generate optimal SSML markup for the meditation script in the next message. It will be synthesized using AWS Polly Neural voices.
 
 Please generate complete, well-structured SSML with:
 1. Appropriate prosody tags for each section based on the analysis
@@ -113,48 +73,408 @@ Please generate complete, well-structured SSML with:
 
 Return only the complete SSML markup inside <speak> tags, fully ready for AWS Polly Neural voice synthesis."""
 
-        # Generate the SSML
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_prompt)
-        ]
+# Built once so every request sends a byte-identical prefix
+SSML_SYSTEM_MESSAGE = SystemMessage(content=SSML_SYSTEM_PROMPT)
+SSML_INSTRUCTIONS_MESSAGE = HumanMessage(content=SSML_INSTRUCTIONS)
+
+SSML_SECTION_INSTRUCTIONS = """Generate optimal SSML markup for one section of a meditation script, given in the next message. It will be synthesized using AWS Polly Neural voices.
+
+The sections are generated separately and joined afterwards, each wrapped in its own <p> tag with a pause between sections, so:
+1. Do not use <p> tags; use <s> tags for sentences
+2. Follow the section's prosody settings and its stage in the meditation's progression (slower/softer toward the end)
+3. Use strategic breaks for natural pacing and breathing guidance
+4. Emphasize key terms with prosody adjustments (not emphasis tags)
+5. Give breathing instructions appropriate pause durations
+6. MOST IMPORTANTLY: Ensure all tags are balanced and properly nested
+
+Return only the SSML for this section inside <speak> tags."""
+
+SSML_SECTION_INSTRUCTIONS_MESSAGE = HumanMessage(content=SSML_SECTION_INSTRUCTIONS)
+
+# Pause inserted between separately generated sections
+SECTION_BREAK = '<break time="3s"/>'
+
+def sectioned_ssml_enabled() -> bool:
+    """
+    Check whether SSML is generated per script section via SECTIONED_SSML=on.
+    
+    Returns:
+        bool: Whether generate_ssml makes one concurrent LLM call per section
+    """
+    return os.environ.get("SECTIONED_SSML", "off").lower() in ("on", "1", "true")
+
+def extract_ssml(content: str) -> str:
+    """
+    Extract the <speak> block from an LLM response.
+    
+    Args:
+        content: The raw LLM response
         
-        logger.info("Requesting SSML generation")
-        response = llm.invoke(messages)
+    Returns:
+        str: The SSML document, wrapping the whole response in <speak> tags if none were found
+    """
+    ssml = find_speak_block(content)
+    if ssml:
+        return ssml
+    
+    # Bare markup without the root element only needs wrapping
+    if "<prosody" not in content or "<break" not in content:
+        logger.warning("Could not extract proper SSML - creating basic wrapper")
+    return f"<speak>\n{content}\n</speak>"
+
+def _ssml_cache_key(llm: Any, state: GraphState, sectioned: bool) -> Optional[str]:
+    """
+    Build the result cache key for a whole SSML document.
+    
+    Args:
+        llm: The chat model used for generation
+        state: The current workflow state
+        sectioned: Whether the document is generated per section
+        
+    Returns:
+        Optional[str]: The cache key, or None if the SSML shouldn't be cached
+    """
+    return result_cache_key(
+        "SSML Generation",
+        llm,
+        request=state['request'],
+        script=state['meditation_script']['content'],
+        profile=state['prosody_profile'],
+        analysis=state['prosody_analysis'],
+        sectioned=sectioned
+    )
+
+def _build_ssml_messages(state: GraphState) -> List[Any]:
+    """
+    Build the messages asking for the SSML of the whole script.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        List of messages, static ones first
+    """
+    request = state['request']
+    
+    # Create a detailed human prompt with all relevant context
+    human_prompt = f"""CONTEXT:
+- Emotional state: {request['emotional_state']}
+- Meditation style: {request['meditation_style']}
+- Theme: {request['meditation_theme']}
+- Duration: {request['duration_minutes']} minutes
+- Language: {request['language_code']}
+- Voice: {request['voice_type']} ({request['language_code']})
+
+PROSODY PROFILE:
+{dumps_json(state['prosody_profile'], indent=True).decode()}
+
+PROSODY ANALYSIS:
+{dumps_json(state['prosody_analysis'], indent=True).decode()}
+
+MEDITATION SCRIPT:
+{state['meditation_script']['content']}"""
+    
+    # Static messages first so the provider can reuse the cached prefix
+    return [
+        SSML_SYSTEM_MESSAGE,
+        SSML_INSTRUCTIONS_MESSAGE,
+        HumanMessage(content=human_prompt)
+    ]
+
+def _script_sections(state: GraphState) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the script sections to generate SSML for separately.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        The sections, or None to generate the whole script in one call
+    """
+    if not sectioned_ssml_enabled():
+        return None
+    sections = [
+        section for section in state['meditation_script'].get('sections', [])
+        if section.get('content', '').strip()
+    ]
+    return sections if len(sections) > 1 else None
+
+def _section_stage(index: int, count: int) -> str:
+    if index == 0:
+        return "start"
+    return "end" if index == count - 1 else "middle"
+
+def _section_context(profile: Dict[str, Any], analysis: Dict[str, Any],
+                     section_type: str, stage: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Pick the parts of the profile and analysis that apply to one section.
+    
+    Args:
+        profile: The prosody profile
+        analysis: The prosody analysis
+        section_type: The section's type, e.g. "breathing"
+        stage: "start", "middle" or "end" of the meditation
+        
+    Returns:
+        Tuple of the profile and analysis excerpts
+    """
+    rate = profile.get("rate") if isinstance(profile.get("rate"), dict) else {}
+    profile_excerpt = {
+        "base_rate": (rate.get("special_sections") or {}).get(section_type, rate.get("base_rate")),
+        "section_profile": (profile.get("section_profiles") or {}).get(section_type),
+        "progression": (profile.get("progression") or {}).get(stage),
+        "pauses": profile.get("pauses"),
+        "emphasis": profile.get("emphasis"),
+        "volume": profile.get("volume")
+    }
+    analysis_excerpt = {
+        "overall_tone": analysis.get("overall_tone"),
+        "key_terms": analysis.get("key_terms"),
+        "section_characteristics": (analysis.get("section_characteristics") or {}).get(section_type),
+        "progression": (analysis.get("progression") or {}).get(stage)
+    }
+    if section_type == "breathing":
+        analysis_excerpt["breathing_patterns"] = analysis.get("breathing_patterns")
+    return profile_excerpt, analysis_excerpt
+
+def _plan_section_calls(llm: Any, state: GraphState, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Prepare one SSML call per script section, reusing cached sections.
+    
+    Args:
+        llm: The chat model used for generation
+        state: The current workflow state
+        sections: The script sections
+        
+    Returns:
+        List of calls with their cache key, messages and SSML (None until generated)
+    """
+    request = state['request']
+    calls = []
+    for index, section in enumerate(sections):
+        stage = _section_stage(index, len(sections))
+        profile_excerpt, analysis_excerpt = _section_context(
+            state['prosody_profile'], state['prosody_analysis'], section['type'], stage
+        )
+        cache_key = result_cache_key(
+            "SSML Section",
+            llm,
+            request=request,
+            section=section,
+            stage=stage,
+            profile=profile_excerpt,
+            analysis=analysis_excerpt
+        )
+        cached = get_cached_result(cache_key)
+        
+        human_prompt = f"""CONTEXT:
+- Emotional state: {request['emotional_state']}
+- Meditation style: {request['meditation_style']}
+- Language: {request['language_code']}
+- Section {index + 1} of {len(sections)}: {section['type']} ({stage} of the meditation)
+
+SECTION PROSODY PROFILE:
+{dumps_json(profile_excerpt, indent=True).decode()}
+
+SECTION PROSODY ANALYSIS:
+{dumps_json(analysis_excerpt, indent=True).decode()}
+
+SECTION SCRIPT:
+{section['content']}"""
+        
+        calls.append({
+            "cache_key": cache_key,
+            "ssml": cached["ssml"] if cached is not None else None,
+            "messages": [SSML_SYSTEM_MESSAGE, SSML_SECTION_INSTRUCTIONS_MESSAGE, HumanMessage(content=human_prompt)],
+            "purpose": f"SSML Section {index + 1}"
+        })
+    return calls
+
+def _section_fragment(content: str) -> str:
+    """
+    Get the markup inside a section's <speak> element.
+    
+    Args:
+        content: The raw LLM response for one section
         
-        # Log the SSML generation interaction
+    Returns:
+        str: The section's SSML without the root element
+    """
+    ssml = extract_ssml(content)
+    return ssml[len("<speak>"):-len("</speak>")].strip()
+
+def _join_sections(llm: Any, calls: List[Dict[str, Any]], responses: List[Any]) -> str:
+    """
+    Store the generated sections and join all of them into one SSML document.
+    
+    Args:
+        llm: The chat model used for generation
+        calls: The planned section calls
+        responses: Responses for the calls that had no cached SSML, in order
+        
+    Returns:
+        str: The complete SSML document
+    """
+    pending = [call for call in calls if call["ssml"] is None]
+    for call, response in zip(pending, responses):
         log_llm_interaction(
-            prompt=human_prompt,
+            prompt=call["messages"][-1].content,
             response_content=response.content,
             model=llm.model_name,
-            purpose="SSML Generation"
+            purpose=call["purpose"],
+            usage_metadata=getattr(response, "usage_metadata", None)
         )
+        call["ssml"] = _section_fragment(response.content)
+        store_result(call["cache_key"], {"ssml": call["ssml"]})
+    
+    paragraphs = f"\n{SECTION_BREAK}\n".join(f"<p>{call['ssml']}</p>" for call in calls)
+    ssml = f"<speak>\n{paragraphs}\n</speak>"
+    
+    valid, issues = validate_ssml(ssml)
+    if not valid:
+        logger.warning(f"Joined section SSML has {len(issues)} issues, leaving them to the review step")
+    return ssml
+
+def _finish_ssml(llm: Any, messages: List[Any], response: Any) -> str:
+    """
+    Log a whole-script SSML response and extract the SSML from it.
+    
+    Args:
+        llm: The chat model used for generation
+        messages: The messages that were sent
+        response: The LLM response
+        
+    Returns:
+        str: The SSML document
+    """
+    log_llm_interaction(
+        prompt=messages[-1].content,
+        response_content=response.content,
+        model=llm.model_name,
+        purpose="SSML Generation",
+        usage_metadata=getattr(response, "usage_metadata", None)
+    )
+    
+    # Simple extraction of SSML - we'll rely on the review step for fixing any issues
+    return extract_ssml(response.content)
+
+def _prepare_ssml_call(state: GraphState) -> Optional[Dict[str, Any]]:
+    """
+    Run the checks that come before the SSML LLM calls and plan the calls.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        Optional[Dict[str, Any]]: The chat model, the document's cache key and
+            either the planned section calls or the whole-script messages, or
+            None if the state is already complete (earlier error or cached SSML)
+    """
+    logger.info("Starting SSML generation")
+    log_state_transition("generate_ssml", state)
+    
+    if "error" in state and state["error"]:
+        logger.error(f"Skipping due to previous error: {state['error']}")
+        return None
+    
+    # Use a more powerful LLM for SSML generation
+    llm = get_chat_model(0.2)
+    sections = _script_sections(state)
+    
+    cache_key = _ssml_cache_key(llm, state, sections is not None)
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        logger.info("Using cached SSML")
+        state["ssml_output"] = cached["ssml"]
+        log_state_transition("generate_ssml_complete", state)
+        return None
+    
+    call = {"llm": llm, "cache_key": cache_key, "sections": None, "messages": None}
+    if sections:
+        call["sections"] = _plan_section_calls(llm, state, sections)
+        call["pending"] = [section["messages"] for section in call["sections"] if section["ssml"] is None]
+        logger.info(f"Requesting SSML for {len(call['pending'])} of {len(call['sections'])} sections concurrently")
+    else:
+        call["messages"] = _build_ssml_messages(state)
+        logger.info("Requesting SSML generation")
+    return call
+
+def _complete_ssml(state: GraphState, call: Dict[str, Any], responses: List[Any]) -> GraphState:
+    """
+    Build the SSML from the responses, store it in the state and cache it.
+    
+    Args:
+        state: The current workflow state
+        call: The call returned by _prepare_ssml_call
+        responses: The pending section responses, or the single whole-script response
         
-        # Extract SSML from response
-        content = response.content
+    Returns:
+        GraphState: The updated workflow state with SSML output
+    """
+    if call["sections"] is not None:
+        ssml = _join_sections(call["llm"], call["sections"], responses)
+    else:
+        ssml = _finish_ssml(call["llm"], call["messages"], responses[0])
+    
+    # Store the SSML for review in the next step
+    state["ssml_output"] = ssml
+    store_result(call["cache_key"], {"ssml": ssml})
+    logger.info(f"Completed initial SSML generation with {len(ssml)} characters")
+    logger.info("The SSML will be reviewed and improved in the next step")
+    log_state_transition("generate_ssml_complete", state)
+    return state
+
+@ledgered("generate_ssml")
+def generate_ssml(state: GraphState) -> GraphState:
+    """
+    Generate optimized SSML markup using LLM with comprehensive SSML knowledge.
+    
+    Args:
+        state: The current workflow state
         
-        # Simple extraction of SSML - we'll rely on the review step for fixing any issues
-        ssml_match = re.search(r'<speak>.*?</speak>', content, re.DOTALL)
+    Returns:
+        GraphState: The updated workflow state with SSML output
+    """
+    try:
+        call = _prepare_ssml_call(state)
+        if call is None:
+            return state
         
-        if ssml_match:
-            ssml = ssml_match.group(0)
+        if call["sections"] is not None:
+            # batch runs the calls on a thread pool
+            responses = call["llm"].batch(call["pending"]) if call["pending"] else []
         else:
-            # If no tags found, wrap the content in speak tags
-            if "<prosody" in content and "<break" in content:
-                ssml = f"<speak>\n{content}\n</speak>"
-            else:
-                # If extraction fails, create a simple SSML wrapper
-                ssml = f"<speak>\n{content}\n</speak>"
-                logger.warning("Could not extract proper SSML - creating basic wrapper")
-        
-        # Store the SSML for review in the next step
-        state["ssml_output"] = ssml
-        logger.info(f"Completed initial SSML generation with {len(ssml)} characters")
-        logger.info("The SSML will be reviewed and improved in the next step")
-        log_state_transition("generate_ssml_complete", state)
+            responses = [call["llm"].invoke(call["messages"])]
+        return _complete_ssml(state, call, responses)
+        
+    except Exception as e:
+        logger.exception(f"Error generating SSML: {str(e)}")
+        state["error"] = f"Error generating SSML: {str(e)}"
         return state
+
+@ledgered("generate_ssml")
+async def agenerate_ssml(state: GraphState) -> GraphState:
+    """
+    Async version of generate_ssml using non-blocking LLM calls.
+    
+    Args:
+        state: The current workflow state
+        
+    Returns:
+        GraphState: The updated workflow state with SSML output
+    """
+    try:
+        call = _prepare_ssml_call(state)
+        if call is None:
+            return state
+        
+        if call["sections"] is not None:
+            responses = await asyncio.gather(*(call["llm"].ainvoke(messages) for messages in call["pending"]))
+        else:
+            responses = [await call["llm"].ainvoke(call["messages"])]
+        return _complete_ssml(state, call, responses)
         
     except Exception as e:
         logger.exception(f"Error generating SSML: {str(e)}")
         state["error"] = f"Error generating SSML: {str(e)}"
-        return state 
\ No newline at end of file
+        return state
@@ -2,16 +2,89 @@
 SSML review and improvement node for the workflow.
 """
 
-import re
+import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
+from meditation_tts.config.constants import FAST_LLM_MODEL
 from meditation_tts.models.state import GraphState
+from meditation_tts.services.llm_client import get_chat_model
+from meditation_tts.services.result_cache import result_cache_key, get_cached_result, store_result
 from meditation_tts.utils.logging_utils import log_state_transition, log_llm_interaction, logger
+from meditation_tts.utils.ledger import ledgered
+from meditation_tts.utils.ssml_utils import (
+    autofix_ssml,
+    find_fenced_speak_block,
+    find_speak_block,
+    validate_ssml
+)
+from meditation_tts.utils.text_utils import MARKUP_TAG_RE
 
+REVIEW_SYSTEM_PROMPT = """You are an expert SSML reviewer and fixer specializing in meditation audio. Your task is to analyze SSML markup, identify and fix any issues, particularly for AWS Polly Neural voices used in meditation applications.
+
+When reviewing SSML, focus first on technical correctness:
+
+1. Technical Correctness (HIGHEST PRIORITY):
+   - Fix any unbalanced tags (unclosed <prosody>, <p>, or <s> tags)
+   - Fix duplicate closing tags or incorrect nesting order
+   - Fix improper value formats (e.g., missing % symbol in percentages)
+   - Fix missing units in <break> durations (should use "ms" or "s")
+   - Fix invalid attribute values (e.g., outside supported ranges)
+   - Ensure compatibility with AWS Polly Neural voices
+
+2. Tag compatibility with Neural voices:
+   - Neural voices support: <speak>, <break>, <prosody>, <p>, <s>, <say-as>, <phoneme>, <w>, <lang>, <mark>, <sub>
+   - Neural voices DO NOT support: <emphasis>, <amazon:auto-breaths>, <amazon:effect name="whispered">, <phonation>
+   - Replace unsupported tags with allowed alternatives
+
+3. Meditation-specific best practices:
+   - Progressive slowing of rate throughout meditation (<prosody rate> gradually decreasing)
+   - Appropriate pause durations after breathing instructions (<break> of 3-6s)
+   - Lower pitch for relaxation sections (<prosody pitch> between -10% and -20%)
+   - Softer volume for deeper sections (<prosody volume> using "soft" or "x-soft")
+   - Proper pacing for body scan sections (slower rate, longer breaks)
+
+Provide a corrected and improved version of the SSML that maintains the meditation's content and intent while ensuring technical correctness."""
+
+REVIEW_INSTRUCTIONS = """Review and fix the SSML for a meditation given in the next message.
+
+The SSML is followed by the issues an automatic validator found in it. Fix exactly those issues:
+1. Technical correctness - Fix ALL unbalanced tags, nesting issues, or invalid values (CRITICAL)
+2. AWS Polly Neural voice compatibility - Replace any unsupported tags
+
+Leave everything the validator did not flag unchanged.
+
+Return a short analysis followed by the complete corrected SSML. The SSML MUST be valid XML that can be parsed without errors."""
+
+# Built once so every review iteration sends a byte-identical prefix
+REVIEW_SYSTEM_MESSAGE = SystemMessage(content=REVIEW_SYSTEM_PROMPT)
+REVIEW_INSTRUCTIONS_MESSAGE = HumanMessage(content=REVIEW_INSTRUCTIONS)
+
+def _validate_with_autofix(ssml: str) -> Tuple[str, bool, List[str]]:
+    """
+    Validate SSML, repairing mechanical defects locally before giving up on it.
+    
+    Args:
+        ssml: The SSML document
+        
+    Returns:
+        Tuple[str, bool, List[str]]: The (possibly repaired) SSML, whether it
+            passed validation, and the issues still remaining
+    """
+    valid, issues = validate_ssml(ssml)
+    if valid:
+        return ssml, True, []
+    
+    fixed_ssml = autofix_ssml(ssml)
+    fixed_valid, fixed_issues = validate_ssml(fixed_ssml)
+    if fixed_valid or len(fixed_issues) < len(issues):
+        logger.info(f"Repaired {len(issues) - len(fixed_issues)} SSML issues locally")
+        return fixed_ssml, fixed_valid, fixed_issues
+    return ssml, False, issues
+
+@ledgered("review_and_improve_ssml")
 def review_and_improve_ssml(state: GraphState) -> GraphState:
     """
     Review generated SSML for issues and improve it according to best practices.
@@ -37,38 +110,34 @@ def review_and_improve_ssml(state: GraphState) -> GraphState:
         # Get the current SSML
         ssml = state["ssml_output"]
         
-        # Initialize LLM for review
-        llm = ChatOpenAI(temperature=0.2, model="gpt-4o")
+        # Well-formed, Neural-compatible SSML doesn't need an LLM review
+        original_ssml = ssml
+        ssml, valid, validation_issues = _validate_with_autofix(ssml)
+        if valid:
+            logger.info("SSML passed local validation, skipping LLM review")
+            state["ssml_output"] = ssml
+            state["ssml_review"] = {
+                "iterations": 0,
+                "issues_fixed": ["Passed local validation" if ssml == original_ssml else "Repaired locally"]
+            }
+            log_state_transition("review_and_improve_ssml_complete", state)
+            return state
+        logger.info(f"Local validation found {len(validation_issues)} SSML issues")
         
-        # Create system prompt with SSML best practices knowledge
-        system_prompt = """You are an expert SSML reviewer and fixer specializing in meditation audio. Your task is to analyze SSML markup, identify and fix any issues, particularly for AWS Polly Neural voices used in meditation applications.
-
-When reviewing SSML, focus first on technical correctness:
-
-1. Technical Correctness (HIGHEST PRIORITY):
-   - Fix any unbalanced tags (unclosed <prosody>, <p>, or <s> tags)
-   - Fix duplicate closing tags or incorrect nesting order
-   - Fix improper value formats (e.g., missing % symbol in percentages)
-   - Fix missing units in <break> durations (should use "ms" or "s")
-   - Fix invalid attribute values (e.g., outside supported ranges)
-   - Ensure compatibility with AWS Polly Neural voices
-
-2. Tag compatibility with Neural voices:
-   - Neural voices support: <speak>, <break>, <prosody>, <p>, <s>, <say-as>, <phoneme>, <w>, <lang>, <mark>, <sub>
-   - Neural voices DO NOT support: <emphasis>, <amazon:auto-breaths>, <amazon:effect name="whispered">, <phonation>
-   - Replace unsupported tags with allowed alternatives
-
-3. Meditation-specific best practices:
-   - Progressive slowing of rate throughout meditation (<prosody rate> gradually decreasing)
-   - Appropriate pause durations after breathing instructions (<break> of 3-6s)
-   - Lower pitch for relaxation sections (<prosody pitch> between -10% and -20%)
-   - Softer volume for deeper sections (<prosody volume> using "soft" or "x-soft")
-   - Proper pacing for body scan sections (slower rate, longer breaks)
-
-Provide a corrected and improved version of the SSML that maintains the meditation's content and intent while ensuring technical correctness."""
-
-        # Iterative improvement cycle
-        max_iterations = 3
+        # Patching flagged XML issues doesn't need the generation model
+        llm = get_chat_model(0.2, os.environ.get("SSML_REVIEW_MODEL", FAST_LLM_MODEL))
+        
+        # The review only depends on the SSML it starts from
+        cache_key = result_cache_key("SSML Review", llm, ssml=ssml)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            logger.info("Using cached SSML review")
+            state.update(cached)
+            log_state_transition("review_and_improve_ssml_complete", state)
+            return state
+        
+        # Iterative improvement cycle, stopping as soon as the SSML validates
+        max_iterations = 2
         iteration_count = 0
         issues_fixed = []
         
@@ -77,26 +146,17 @@ Provide a corrected and improved version of the SSML that maintains the meditati
             logger.info(f"Starting SSML review iteration {iteration_count}")
             
             # Create review prompt with current SSML
-            review_prompt = f"""Review and fix the following SSML for a meditation:
-
-```xml
+            review_prompt = f"""```xml
 {ssml}
 ```
 
-Focus on these priorities in order:
-1. Technical correctness - Fix ALL unbalanced tags, nesting issues, or invalid values (CRITICAL)
-2. AWS Polly Neural voice compatibility - Replace any unsupported tags
-3. Meditation experience enhancement - Improve pacing, prosody, pauses
-
-If you find technical issues, fix them ALL and provide a complete corrected SSML.
-If there are no technical issues but you find opportunities to enhance the meditation experience, make those improvements.
-If the SSML looks technically correct and well-optimized, state that no improvements are needed.
-
-Return your analysis followed by the complete improved SSML. The SSML MUST be valid XML that can be parsed without errors."""
+Issues found by the validator:
+""" + "\n".join(f"- {issue}" for issue in validation_issues)
             
-            # Get the review and improved SSML
+            # Static messages first so the provider can reuse the cached prefix
             messages = [
-                SystemMessage(content=system_prompt),
+                REVIEW_SYSTEM_MESSAGE,
+                REVIEW_INSTRUCTIONS_MESSAGE,
                 HumanMessage(content=review_prompt)
             ]
             
@@ -108,34 +168,30 @@ Return your analysis followed by the complete improved SSML. The SSML MUST be va
                 prompt=review_prompt,
                 response_content=response.content,
                 model=llm.model_name,
-                purpose=f"SSML Review Iteration {iteration_count}"
+                purpose=f"SSML Review Iteration {iteration_count}",
+                usage_metadata=getattr(response, "usage_metadata", None)
             )
             
             # Extract the analysis and improved SSML
             content = response.content
             
-            # Check if no improvements needed
-            if "no improvements are needed" in content.lower() or "ssml looks good" in content.lower():
-                logger.info("SSML review complete - No further improvements needed")
-                issues_fixed.append(f"Iteration {iteration_count}: No issues found")
-                break
-                
-            # Try to extract improved SSML
-            ssml_match = re.search(r'```xml\s*(<speak>.*?</speak>)\s*```', content, re.DOTALL)
+            # The validator, not the model's prose, decides when the review is done
+            # Try to extract improved SSML, falling back to the format without code blocks
+            improved_ssml = find_fenced_speak_block(content) or find_speak_block(content)
             
-            if not ssml_match:
-                # Try alternative format without code blocks
-                ssml_match = re.search(r'<speak>.*?</speak>', content, re.DOTALL)
-            
-            if ssml_match:
+            if improved_ssml:
                 # Extract issues identified
                 analysis_text = content.split("```xml")[0] if "```xml" in content else "Improvements made to SSML"
                 issues_fixed.append(f"Iteration {iteration_count}: {analysis_text.strip()}")
                 
                 # Update the SSML
-                improved_ssml = ssml_match.group(1) if "```xml" in content else ssml_match.group(0)
                 ssml = improved_ssml
                 logger.info(f"SSML updated in iteration {iteration_count}")
+                
+                ssml, valid, validation_issues = _validate_with_autofix(ssml)
+                if valid:
+                    logger.info("Improved SSML passed local validation")
+                    break
             else:
                 # If no improved SSML found, make a direct request for valid SSML
                 fix_prompt = f"""I need ONLY the complete fixed SSML for the meditation with no explanation. The SSML must be syntactically valid XML with balanced tags and proper nesting.
@@ -149,12 +205,16 @@ Return only the complete SSML, surrounded by <speak> tags."""
                 fix_content = fix_response.content
                 
                 # Try to extract again
-                ssml_match = re.search(r'<speak>.*?</speak>', fix_content, re.DOTALL)
-                if ssml_match:
-                    improved_ssml = ssml_match.group(0)
+                improved_ssml = find_speak_block(fix_content)
+                if improved_ssml:
                     ssml = improved_ssml
                     issues_fixed.append(f"Iteration {iteration_count}: Extracted fixed SSML")
                     logger.info(f"SSML extracted in iteration {iteration_count}")
+                    
+                    ssml, valid, validation_issues = _validate_with_autofix(ssml)
+                    if valid:
+                        logger.info("Fixed SSML passed local validation")
+                        break
                 else:
                     # Last resort: Simplify the SSML structure completely
                     logger.warning("Could not extract improved SSML, creating simplified version")
@@ -163,15 +223,15 @@ Return only the complete SSML, surrounded by <speak> tags."""
                     final_fix_prompt = f"""Create a simplified but valid SSML for this meditation text, using only basic paragraph and prosody tags. Return only valid SSML:
 
 Text:
-{re.sub(r'<[^>]+>', '', ssml)}"""
+{MARKUP_TAG_RE.sub('', ssml)}"""
                     
                     final_response = llm.invoke([HumanMessage(content=final_fix_prompt)])
                     final_content = final_response.content
                     
                     # Extract one more time
-                    final_match = re.search(r'<speak>.*?</speak>', final_content, re.DOTALL)
-                    if final_match:
-                        ssml = final_match.group(0)
+                    final_ssml = find_speak_block(final_content)
+                    if final_ssml:
+                        ssml = final_ssml
                         issues_fixed.append(f"Iteration {iteration_count}: Created simplified SSML structure")
                         logger.info("Created simplified SSML structure")
                         break
@@ -186,6 +246,13 @@ Text:
             "iterations": iteration_count,
             "issues_fixed": issues_fixed
         }
+        # Only cache SSML that validates, so a failed review is retried next time
+        # (the loop can run out of iterations, and the simplified SSML is unchecked)
+        valid, _ = validate_ssml(ssml)
+        if valid:
+            store_result(cache_key, {"ssml_output": ssml, "ssml_review": state["ssml_review"]})
+        else:
+            logger.warning("Reviewed SSML still fails validation, not caching the review")
         
         logger.info(f"Completed SSML review after {iteration_count} iterations")
         log_state_transition("review_and_improve_ssml_complete", state)
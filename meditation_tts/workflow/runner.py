@@ -4,32 +4,77 @@ Workflow runner for executing the meditation TTS workflow.
 
 import os
 import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 
-from meditation_tts.config.constants import WORKFLOW_STEPS, JSON_OUTPUT_DIR
+from meditation_tts.config.constants import WORKFLOW_STEPS, JSON_OUTPUT_DIR, MAX_CONCURRENT_RUNS
 from meditation_tts.models.state import GraphState
 from meditation_tts.utils.state_utils import save_state, load_state, get_latest_state_file
 from meditation_tts.utils.logging_utils import log_state_transition, logger
-from meditation_tts.workflow.graph import create_workflow_graph
+from meditation_tts.workflow.graph import get_compiled_workflow, get_checkpointer
 from meditation_tts.workflow.nodes import (
     generate_meditation_script,
+    agenerate_meditation_script,
+    generate_meditation_scripts_batch,
     analyze_prosody_needs,
+    aanalyze_prosody_needs,
     generate_prosody_profile,
+    agenerate_prosody_profile,
     generate_ssml,
+    agenerate_ssml,
     review_and_improve_ssml,
     generate_meditation_audio,
-    mix_with_soundscape
+    agenerate_meditation_audio,
+    mix_with_soundscape,
+    select_soundscape
 )
 
-def run_workflow_step(step: str, state: Optional[GraphState] = None) -> GraphState:
+def _log_present_fields(label: str, state: GraphState) -> None:
+    """
+    Log which state fields hold a value, at DEBUG level.
+    
+    Args:
+        label: Describes the point in the run, e.g. "State before step X"
+        state: The workflow state
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{label}: {', '.join(key for key, value in state.items() if value is not None)}")
+
+def _save_step_state(state: GraphState, step: str, full: bool = False, final: bool = False) -> str:
+    """
+    Save the state after a step, unless the workflow finished and the mix step
+    already wrote the complete state to its meditation JSON file.
+    
+    Args:
+        state: The state after the step
+        step: The workflow step name
+        full: Write the whole state instead of the step's delta
+        final: Whether the run ended with the last workflow step
+        
+    Returns:
+        str: Path to the file holding the saved state
+    """
+    json_file = (state.get("audio_output") or {}).get("json_file")
+    if final and json_file and not state.get("error"):
+        logger.info(f"Final state already saved to: {json_file}")
+        return json_file
+    
+    state_file = save_state(state, step, full=full)
+    logger.info(f"Saved state after step {step} to: {state_file}")
+    return state_file
+
+def run_workflow_step(step: str, state: Optional[GraphState] = None,
+                      thread_id: Optional[str] = None) -> GraphState:
     """
     Run a single step of the workflow.
     
     Args:
         step: The workflow step to run
         state: Optional state to use (otherwise load from previous step)
+        thread_id: Optional run ID; when given and the SQLite checkpointer is
+            available, the run is checkpointed per step instead of saved to a state file
         
     Returns:
         GraphState: The updated state after running the step
@@ -75,25 +120,43 @@ def run_workflow_step(step: str, state: Optional[GraphState] = None) -> GraphSta
         }
     
     # Log the state before running
-    logger.info(f"State before workflow step {step}: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
-    
-    # Create workflow graph
-    workflow = create_workflow_graph()
+    _log_present_fields(f"State before workflow step {step}", state)
     
-    # Set entry point to specified step
-    workflow.set_entry_point(step)
+    # Get the (cached) compiled workflow starting at the specified step
+    if thread_id and get_checkpointer() is not None:
+        compiled_workflow = get_compiled_workflow(step, checkpointed=True)
+        config = {"configurable": {"thread_id": thread_id}}
+        logger.info(f"Invoking checkpointed workflow at step: {step} (thread: {thread_id})")
+        return compiled_workflow.invoke(state, config=config)
     
-    # Compile and run
-    compiled_workflow = workflow.compile()
+    compiled_workflow = get_compiled_workflow(step)
     logger.info(f"Invoking workflow at step: {step}")
     result = compiled_workflow.invoke(state)
     
     # Save state after step completion
-    state_file = save_state(result, step)
-    logger.info(f"Saved state to: {state_file}")
+    _save_step_state(result, step, full=True, final=True)
     
     return result
 
+def resume_workflow(thread_id: str, entry_step: str = WORKFLOW_STEPS[0]) -> Optional[GraphState]:
+    """
+    Resume a checkpointed workflow run from its last completed step.
+    
+    Args:
+        thread_id: The run ID the workflow was started with
+        entry_step: The step the run was started at
+        
+    Returns:
+        Optional[GraphState]: The final state, or None if checkpointing is unavailable
+    """
+    if get_checkpointer() is None:
+        logger.error("Cannot resume workflow: checkpointing is not available")
+        return None
+    
+    compiled_workflow = get_compiled_workflow(entry_step, checkpointed=True)
+    logger.info(f"Resuming workflow thread {thread_id} (entry step: {entry_step})")
+    return compiled_workflow.invoke(None, config={"configurable": {"thread_id": thread_id}})
+
 def run_single_step(step: str, state: GraphState) -> GraphState:
     """
     Run a single step of the workflow without chaining to the next step.
@@ -119,16 +182,15 @@ def run_single_step(step: str, state: GraphState) -> GraphState:
     }
     
     # Log state before running
-    logger.info(f"State before single step {step}: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
+    _log_present_fields(f"State before single step {step}", state)
     
     # Run the step
     if step in step_functions:
         state = step_functions[step](state)
-        save_state_path = save_state(state, step)
-        logger.info(f"Saved state after step {step} to: {save_state_path}")
+        _save_step_state(state, step, final=step == WORKFLOW_STEPS[-1])
         
         # Log state after running
-        logger.info(f"State after single step {step}: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
+        _log_present_fields(f"State after single step {step}", state)
         
         return state
     else:
@@ -138,7 +200,8 @@ def run_single_step(step: str, state: GraphState) -> GraphState:
 def run_meditation_generation(request_data: Dict[str, Any], 
                           start_step: Optional[str] = None, 
                           end_step: Optional[str] = None,
-                          initial_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                          initial_state: Optional[Dict[str, Any]] = None,
+                          thread_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Run the meditation generation process, optionally starting from a specific step.
     
@@ -147,6 +210,7 @@ def run_meditation_generation(request_data: Dict[str, Any],
         start_step: Optional step to start from (default is first step)
         end_step: Optional step to end at (default is the last step)
         initial_state: Optional initial state (used when resuming from a saved state)
+        thread_id: Optional run ID for checkpointed graph runs (see run_workflow_step)
         
     Returns:
         Dict[str, Any]: The result state after workflow completion
@@ -206,7 +270,7 @@ def run_meditation_generation(request_data: Dict[str, Any],
         for step in steps_to_run:
             state["current_step"] = step
             logger.info(f"Running step: {step}")
-            logger.info(f"State before step: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
+            _log_present_fields("State before step", state)
             state = run_single_step(step, state)
             if state.get("error"):
                 logger.error(f"Error in step {step}: {state.get('error')}")
@@ -252,9 +316,9 @@ def run_meditation_generation(request_data: Dict[str, Any],
                 state["error"] = None
             
         # Log what's in the state before running
-        logger.info(f"State before running step {start_step}: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
+        _log_present_fields(f"State before running step {start_step}", state)
         
-        return run_workflow_step(start_step, state)
+        return run_workflow_step(start_step, state, thread_id=thread_id)
     else:
         # Full workflow from beginning
         state = initial_state or {
@@ -267,4 +331,251 @@ def run_meditation_generation(request_data: Dict[str, Any],
             "error": None,
             "current_step": WORKFLOW_STEPS[0]
         }
-        return run_workflow_step(WORKFLOW_STEPS[0], state)
\ No newline at end of file
+        return run_workflow_step(WORKFLOW_STEPS[0], state, thread_id=thread_id)
+
+# Steps with a native async implementation; the others run in a worker thread
+ASYNC_STEP_FUNCTIONS = {
+    "generate_script": agenerate_meditation_script,
+    "analyze_prosody": aanalyze_prosody_needs,
+    "create_profile": agenerate_prosody_profile,
+    "generate_ssml": agenerate_ssml,
+    "generate_audio": agenerate_meditation_audio
+}
+
+def _load_or_create_state(request_data: Dict[str, Any],
+                          start_step: str,
+                          initial_state: Optional[Dict[str, Any]] = None) -> GraphState:
+    """
+    Get the state to start a run from.
+    
+    Uses the provided state, or the latest saved state of the step before
+    start_step, or a fresh state for the request.
+    
+    Args:
+        request_data: The request parameters for meditation generation
+        start_step: The step the run starts at
+        initial_state: Optional initial state
+        
+    Returns:
+        GraphState: The state to start from
+    """
+    state = initial_state
+    if state is None and WORKFLOW_STEPS.index(start_step) > 0:
+        prev_step = WORKFLOW_STEPS[WORKFLOW_STEPS.index(start_step) - 1]
+        prev_state_file = get_latest_state_file(prev_step)
+        
+        if prev_state_file:
+            logger.info(f"Loading state from previous step: {prev_step} (file: {prev_state_file})")
+            state = load_state(prev_state_file)
+            if state:
+                logger.info(f"Successfully loaded state from previous step: {prev_step}")
+            else:
+                logger.warning(f"Failed to load state from previous step: {prev_step}")
+    
+    if state is None:
+        return {
+            "request": request_data,
+            "meditation_script": None,
+            "prosody_analysis": None,
+            "prosody_profile": None,
+            "ssml_output": None,
+            "audio_output": None,
+            "error": None,
+            "current_step": start_step
+        }
+    
+    # Update request data in loaded state and clear any error to allow rerunning
+    state["request"] = request_data
+    state["current_step"] = start_step
+    if "error" in state:
+        state["error"] = None
+    return state
+
+async def run_single_step_async(step: str, state: GraphState) -> GraphState:
+    """
+    Async version of run_single_step.
+    
+    Args:
+        step: The workflow step to run
+        state: The current state
+        
+    Returns:
+        GraphState: The updated state after running the step
+    """
+    if step in ASYNC_STEP_FUNCTIONS:
+        logger.info(f"Running single step: {step}")
+        state = await ASYNC_STEP_FUNCTIONS[step](state)
+        await asyncio.to_thread(_save_step_state, state, step)
+        return state
+    return await asyncio.to_thread(run_single_step, step, state)
+
+async def run_workflow_step_async(step: str, state: GraphState) -> GraphState:
+    """
+    Async version of run_workflow_step, running the compiled graph with ainvoke.
+    
+    Args:
+        step: The workflow step to start at
+        state: The state to start from
+        
+    Returns:
+        GraphState: The updated state after the workflow completes
+        
+    Raises:
+        ValueError: If the step is invalid
+    """
+    logger.info(f"Running workflow step: {step}")
+    
+    if step not in WORKFLOW_STEPS:
+        error_msg = f"Invalid step: {step}. Must be one of {WORKFLOW_STEPS}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    
+    compiled_workflow = get_compiled_workflow(step)
+    logger.info(f"Invoking workflow at step: {step}")
+    result = await compiled_workflow.ainvoke(state)
+    
+    await asyncio.to_thread(_save_step_state, result, step, full=True, final=True)
+    
+    return result
+
+async def run_meditation_generation_async(request_data: Dict[str, Any],
+                                          start_step: Optional[str] = None,
+                                          end_step: Optional[str] = None,
+                                          initial_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Async version of run_meditation_generation.
+    
+    LLM calls don't block the event loop, so several meditations can be
+    generated concurrently in one process.
+    
+    Args:
+        request_data: The request parameters for meditation generation
+        start_step: Optional step to start from (default is first step)
+        end_step: Optional step to end at (default is the last step)
+        initial_state: Optional initial state (used when resuming from a saved state)
+        
+    Returns:
+        Dict[str, Any]: The result state after workflow completion
+    """
+    logger.info(f"Starting meditation generation process from step: {start_step or WORKFLOW_STEPS[0]}")
+    
+    if start_step not in WORKFLOW_STEPS:
+        start_step = None
+    
+    if end_step and end_step in WORKFLOW_STEPS:
+        start_idx = WORKFLOW_STEPS.index(start_step) if start_step else 0
+        steps_to_run = WORKFLOW_STEPS[start_idx:WORKFLOW_STEPS.index(end_step) + 1]
+        logger.info(f"Running steps: {steps_to_run}")
+        
+        state = _load_or_create_state(request_data, steps_to_run[0], initial_state)
+        
+        # Pick and decode the soundscape while the earlier steps run, like the
+        # graph's parallel branch does; the worker thread gets a snapshot since
+        # the steps keep changing the state
+        soundscape_task = None
+        if "mix_audio" in steps_to_run and not state.get("soundscape_file"):
+            soundscape_task = asyncio.create_task(asyncio.to_thread(select_soundscape, dict(state)))
+        
+        try:
+            for step in steps_to_run:
+                state["current_step"] = step
+                if step == "mix_audio" and soundscape_task is not None:
+                    task, soundscape_task = soundscape_task, None
+                    try:
+                        state.update(await task)
+                    except Exception as e:
+                        # The mix step finds a soundscape itself when none was selected
+                        logger.warning(f"Soundscape selection failed: {str(e)}")
+                state = await run_single_step_async(step, state)
+                if state.get("error"):
+                    logger.error(f"Error in step {step}: {state.get('error')}")
+                    return state
+            return state
+        finally:
+            # Reached the mix step's await only on success; otherwise collect
+            # the task so its outcome isn't lost
+            if soundscape_task is not None:
+                soundscape_task.cancel()
+                try:
+                    await soundscape_task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    logger.warning(f"Soundscape selection failed: {str(e)}")
+    elif start_step:
+        state = _load_or_create_state(request_data, start_step, initial_state)
+        return await run_workflow_step_async(start_step, state)
+    else:
+        state = initial_state or _load_or_create_state(request_data, WORKFLOW_STEPS[0])
+        return await run_workflow_step_async(WORKFLOW_STEPS[0], state)
+
+async def run_meditation_batch_async(requests: List[Dict[str, Any]],
+                                     max_concurrency: int = MAX_CONCURRENT_RUNS) -> List[Dict[str, Any]]:
+    """
+    Generate several meditations concurrently.
+    
+    Each request runs the full async workflow; a semaphore caps how many run
+    at once so the LLM provider's rate limits aren't exceeded.
+    
+    Args:
+        requests: Request parameters, one per meditation
+        max_concurrency: Maximum number of workflows running at the same time
+        
+    Returns:
+        List[Dict[str, Any]]: The result states, in the same order as requests
+    """
+    logger.info(f"Starting batch of {len(requests)} meditations (max {max_concurrency} concurrent)")
+    return await _run_batch_from_async(requests, None, [None] * len(requests), max_concurrency)
+
+async def _run_batch_from_async(requests: List[Dict[str, Any]],
+                                start_step: Optional[str],
+                                initial_states: List[Optional[Dict[str, Any]]],
+                                max_concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Run the async workflow for several requests under a shared concurrency limit.
+    
+    Args:
+        requests: Request parameters, one per meditation
+        start_step: Step to start each run from, or None for the first step
+        initial_states: Starting state per request (None to create or load one)
+        max_concurrency: Maximum number of workflows running at the same time
+        
+    Returns:
+        List[Dict[str, Any]]: The result states, in the same order as requests
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(request_data: Dict[str, Any], initial_state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if initial_state is not None and initial_state.get("error"):
+            return initial_state
+        async with semaphore:
+            return await run_meditation_generation_async(request_data, start_step, initial_state=initial_state)
+    
+    return await asyncio.gather(*(
+        run_one(request_data, initial_state)
+        for request_data, initial_state in zip(requests, initial_states)
+    ))
+
+def run_meditation_batch(requests: List[Dict[str, Any]],
+                         max_concurrency: int = MAX_CONCURRENT_RUNS) -> List[Dict[str, Any]]:
+    """
+    Generate several meditations, batching the script generation LLM calls.
+    
+    Scripts for all requests are generated with one llm.batch call; the
+    remaining steps then run concurrently through the async workflow.
+    
+    Args:
+        requests: Request parameters, one per meditation
+        max_concurrency: Maximum number of concurrent LLM requests / workflows
+        
+    Returns:
+        List[Dict[str, Any]]: The result states, in the same order as requests
+    """
+    logger.info(f"Starting batched generation of {len(requests)} meditations")
+    
+    states = [_load_or_create_state(request_data, WORKFLOW_STEPS[0]) for request_data in requests]
+    states = generate_meditation_scripts_batch(states, max_concurrency)
+    for state in states:
+        _save_step_state(state, WORKFLOW_STEPS[0])
+    
+    return asyncio.run(_run_batch_from_async(requests, WORKFLOW_STEPS[1], states, max_concurrency))
@@ -8,8 +8,6 @@ import os
 import sys
 import argparse
 import json
-import glob
-import random
 from pathlib import Path
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
@@ -20,76 +18,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import after path setup
 from meditation_tts.workflow.runner import run_meditation_generation
-from meditation_tts.utils.logging_utils import logger
+from meditation_tts.utils.state_utils import get_latest_state_file, load_state
 from meditation_tts.config.constants import WORKFLOW_STEPS, STATE_DIR, JSON_OUTPUT_DIR, AUDIO_OUTPUT_DIR, SOUNDSCAPE_DIR
+from meditation_tts.services.soundscape_index import find_background_file
 from src.ffmpeg_mixer import process_meditation_audio, check_ffmpeg_installed
 
-def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
-    """Get the path to the latest state file, optionally filtered by step"""
-    try:
-        if not os.path.exists(STATE_DIR):
-            logger.warning(f"State directory does not exist: {STATE_DIR}")
-            return None
-            
-        logger.info(f"Looking for latest state file{f' for step {step}' if step else ''}")
-        
-        # List all state files
-        all_files = [f for f in os.listdir(STATE_DIR) if f.startswith("state_")]
-        logger.info(f"Found {len(all_files)} total state files")
-        
-        if not all_files:
-            logger.warning("No state files found")
-            return None
-            
-        # Filter by step if requested
-        if step:
-            # Match the exact step (state_step_timestamp.json format)
-            matching_files = [f for f in all_files if f.startswith(f"state_{step}_")]
-            if not matching_files:
-                logger.warning(f"No state files found for step: {step}")
-                return None
-                
-            logger.info(f"Found {len(matching_files)} state files for step {step}")
-            
-            # Sort by timestamp in filename (most recent last)
-            latest_file = sorted(matching_files)[-1]
-            logger.info(f"Latest state file for step {step}: {latest_file}")
-            return os.path.join(STATE_DIR, latest_file)
-        else:
-            # Get all steps in order
-            step_prefixes = [f"state_{s}_" for s in WORKFLOW_STEPS]
-            
-            # Find the latest file for each step
-            latest_step_files = []
-            for prefix in step_prefixes:
-                matching_files = [f for f in all_files if f.startswith(prefix)]
-                if matching_files:
-                    latest_step_files.append(sorted(matching_files)[-1])
-            
-            if not latest_step_files:
-                logger.warning("No matching state files found")
-                return None
-                
-            # Sort by step order in workflow
-            latest_file = sorted(latest_step_files, 
-                               key=lambda f: WORKFLOW_STEPS.index(f.split('_')[1]))[-1]
-            
-            logger.info(f"Latest overall state file: {latest_file}")
-            return os.path.join(STATE_DIR, latest_file)
-            
-    except Exception as e:
-        logger.error(f"Error finding latest state file: {str(e)}")
-        return None
-
-def load_state(filepath: str) -> Optional[Dict[str, Any]]:
-    """Load state from a JSON file"""
-    try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading state from {filepath}: {str(e)}")
-        return None
-
 def mix_audio_directly(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Mix the generated voice audio with a background soundscape.
@@ -337,19 +270,6 @@ def run_from_step(step: str, state_file: Optional[str] = None, end_step: Optiona
     
     return result
 
-def find_background_file(soundscape_dir: str, soundscape_type: str) -> Optional[str]:
-    """Find a background soundscape file matching the type, or pick a random one."""
-    # Try to find files matching the type
-    pattern = os.path.join(soundscape_dir, f"*{soundscape_type.lower()}*.mp3")
-    matches = glob.glob(pattern)
-    if matches:
-        return random.choice(matches)
-    # Fallback: pick any mp3 in the directory
-    all_files = glob.glob(os.path.join(soundscape_dir, "*.mp3"))
-    if all_files:
-        return random.choice(all_files)
-    return None
-
 def main():
     """Main function to parse arguments and run the script."""
     parser = argparse.ArgumentParser(description='Run the meditation workflow from a specific step')
@@ -8,11 +8,24 @@ instead of relying on pydub. This is useful when pydub installation is problemat
 
 import os
 import sys
+import asyncio
+import mmap
 import random
+import shutil
+import hashlib
+import functools
+import tempfile
 import subprocess
+import threading
+import json
 import logging
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the in-process mixing engine
+    np = None
 
 # Setup logging
 logging.basicConfig(
@@ -21,19 +34,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ffmpeg_mixer')
 
+# Module-level generator for background offsets and sample starts; numpy's
+# PCG64 when available. Pass a seed to the public entry points for
+# reproducible output.
+_RNG = np.random.default_rng() if np is not None else random.Random()
+
+def _get_rng(seed: Optional[int] = None):
+    """Return the module generator, or a fresh one when a seed is given."""
+    if seed is None:
+        return _RNG
+    return np.random.default_rng(seed) if np is not None else random.Random(seed)
+
+# PCM format used by the in-process (numpy) mixing engine. Narrated meditation
+# audio gains nothing from mixing at full rate in stereo (Polly voices are
+# 22-24 kHz mono), so the mix runs at 22.05 kHz mono and is only resampled
+# to the export rate by the encoder.
+MIX_SAMPLE_RATE = 22050
+MIX_CHANNELS = 1
+EXPORT_SAMPLE_RATE = 44100
+# Decoded soundscapes are cached here as raw PCM
+PCM_CACHE_DIR = os.path.join("output", "cache", "pcm")
+# PCM format of the decoded soundscapes the ffmpeg engine reads; unlike the
+# numpy engine's entries these are not attenuated, since that engine applies
+# the volume in its own filter graph
+FFMPEG_BACKGROUND_SAMPLE_RATE = EXPORT_SAMPLE_RATE
+FFMPEG_BACKGROUND_CHANNELS = 2
+# Frames mixed and handed to the encoder at a time (~3s at MIX_SAMPLE_RATE)
+MIX_BLOCK_FRAMES = 1 << 16
+# Index of finished mixes in each output directory (disable with MIX_CACHE=off)
+MIX_CACHE_FILE = ".mix_cache.json"
+_mix_cache_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
 def check_ffmpeg_installed() -> bool:
-    """Check if ffmpeg is installed on the system."""
-    try:
-        subprocess.run(
-            ["ffmpeg", "-version"], 
-            stdout=subprocess.DEVNULL, 
-            stderr=subprocess.DEVNULL
-        )
-        return True
-    except FileNotFoundError:
+    """Check if ffmpeg is installed on the system (cached for the process)."""
+    if shutil.which("ffmpeg") is None:
         logger.error("ffmpeg not found. Install it with 'brew install ffmpeg' on macOS or "
                      "follow instructions at https://ffmpeg.org/download.html")
         return False
+    return True
+
+@functools.lru_cache(maxsize=1)
+def check_ffprobe_installed() -> bool:
+    """Check if ffprobe is installed on the system (cached for the process)."""
+    if shutil.which("ffprobe") is None:
+        logger.error("ffprobe not found. It ships with ffmpeg, see "
+                     "https://ffmpeg.org/download.html")
+        return False
+    return True
 
 def create_output_dir(output_dir: str) -> bool:
     """Create output directory if it doesn't exist."""
@@ -47,16 +95,20 @@ def create_output_dir(output_dir: str) -> bool:
             return False
     return True
 
-def merge_audio_with_ffmpeg(
+def _prepare_ffmpeg_merge(
     voice_file: str,
     background_file: str,
     output_file: str,
-    background_volume: float = 0.3,  # 0.0 to 1.0
-    create_sample: bool = True,
-    sample_duration: int = 30
-) -> Tuple[Optional[str], Optional[str]]:
+    background_volume: float,
+    create_sample: bool,
+    sample_duration: int,
+    rng=_RNG
+) -> Optional[Callable[[], Tuple[Optional[str], Optional[str]]]]:
     """
-    Merge voice audio with background soundscape using ffmpeg directly.
+    Validate and probe the inputs and build the ffmpeg merge command.
+    
+    This is the I/O-bound half of merge_audio_with_ffmpeg; the returned callable
+    runs the (CPU-bound) filter graph and encode.
     
     Args:
         voice_file: Path to voice meditation audio file
@@ -65,44 +117,63 @@ def merge_audio_with_ffmpeg(
         background_volume: Volume of background (0.0 to 1.0)
         create_sample: Whether to create a short sample for preview
         sample_duration: Duration of sample in seconds
+        rng: Random generator for the background offset and sample start
         
     Returns:
-        Tuple of (path to full merged audio, path to sample) or (None, None) on error
+        Callable producing (path to full merged audio, path to sample), or None if the inputs are unusable
     """
+    if not check_ffmpeg_installed():
+        logger.error("Cannot merge audio: ffmpeg is not installed")
+        return None
+    
+    if not check_ffprobe_installed():
+        logger.error("Cannot merge audio: ffprobe is not installed")
+        return None
+        
+    # Check if files exist
+    if not os.path.exists(voice_file):
+        logger.error(f"Voice file not found: {voice_file}")
+        return None
+        
+    if not os.path.exists(background_file):
+        logger.error(f"Background file not found: {background_file}")
+        return None
+        
+    # Create output directory if needed
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        
+    # Get duration of voice file for looping background if needed
+    voice_duration_cmd = [
+        'ffprobe', 
+        '-v', 'error', 
+        '-show_entries', 'format=duration', 
+        '-of', 'default=noprint_wrappers=1:nokey=1', 
+        voice_file
+    ]
+    voice_duration_result = subprocess.run(
+        voice_duration_cmd,
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE, 
+        universal_newlines=True
+    )
+    voice_duration = float(voice_duration_result.stdout.strip())
+    
+    # Read the background from the decoded PCM cache so the soundscape is not
+    # decoded again on every merge; its duration follows from the file size
     try:
-        if not check_ffmpeg_installed():
-            logger.error("Cannot merge audio: ffmpeg is not installed")
-            return None, None
-            
-        # Check if files exist
-        if not os.path.exists(voice_file):
-            logger.error(f"Voice file not found: {voice_file}")
-            return None, None
-            
-        if not os.path.exists(background_file):
-            logger.error(f"Background file not found: {background_file}")
-            return None, None
-            
-        # Create output directory if needed
-        output_dir = os.path.dirname(output_file)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        # Get duration of voice file for looping background if needed
-        voice_duration_cmd = [
-            'ffprobe', 
-            '-v', 'error', 
-            '-show_entries', 'format=duration', 
-            '-of', 'default=noprint_wrappers=1:nokey=1', 
-            voice_file
+        background_pcm = _ffmpeg_background_cache(background_file)
+        background_input = [
+            '-f', 's16le',
+            '-ar', str(FFMPEG_BACKGROUND_SAMPLE_RATE),
+            '-ac', str(FFMPEG_BACKGROUND_CHANNELS),
+            '-i', background_pcm
         ]
-        voice_duration_result = subprocess.run(
-            voice_duration_cmd,
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            universal_newlines=True
-        )
-        voice_duration = float(voice_duration_result.stdout.strip())
+        bg_duration = os.path.getsize(background_pcm) / (2 * FFMPEG_BACKGROUND_CHANNELS * FFMPEG_BACKGROUND_SAMPLE_RATE)
+    except Exception as e:
+        logger.warning(f"Could not cache decoded background {background_file}, decoding it in the merge: {str(e)}")
+        background_input = ['-i', background_file]
         
         # Get duration of background file
         bg_duration_cmd = [
@@ -119,98 +190,798 @@ def merge_audio_with_ffmpeg(
             universal_newlines=True
         )
         bg_duration = float(bg_duration_result.stdout.strip())
+    
+    logger.info(f"Voice duration: {voice_duration:.2f}s")
+    logger.info(f"Background duration: {bg_duration:.2f}s")
+    
+    # Determine filter_complex arguments based on durations
+    filter_complex = ""
+    
+    if bg_duration >= voice_duration:
+        # If background is longer, just trim it
+        random_start = rng.uniform(0, max(0, bg_duration - voice_duration))
+        filter_complex = (
+            f"[1:a]atrim=start={random_start}:duration={voice_duration},"
+            f"asetpts=PTS-STARTPTS,volume={background_volume}[bg];"
+            f"[0:a][bg]amix=inputs=2:duration=first"
+        )
+    else:
+        # If background is shorter, loop it
+        loops_needed = int(voice_duration / bg_duration) + 1
+        filter_complex = (
+            f"[1:a]aloop=loop={loops_needed}:size={int(bg_duration*FFMPEG_BACKGROUND_SAMPLE_RATE)},"
+            f"atrim=duration={voice_duration},asetpts=PTS-STARTPTS,"
+            f"volume={background_volume}[bg];"
+            f"[0:a][bg]amix=inputs=2:duration=first"
+        )
+    
+    # Build the ffmpeg command; the sample (if requested) is cut from the
+    # same mix in this single call instead of re-reading the encoded file
+    merge_cmd = [
+        'ffmpeg',
+        '-y',  # Overwrite output file
+        '-i', voice_file,
+        *background_input
+    ]
+    
+    sample_file = None
+    if create_sample:
+        # Create output path for sample
+        output_base = os.path.basename(output_file)
+        sample_file = os.path.join(output_dir, f"sample_{output_base}")
         
-        logger.info(f"Voice duration: {voice_duration:.2f}s")
-        logger.info(f"Background duration: {bg_duration:.2f}s")
-        
-        # Determine filter_complex arguments based on durations
-        filter_complex = ""
-        
-        if bg_duration >= voice_duration:
-            # If background is longer, just trim it
-            random_start = random.uniform(0, max(0, bg_duration - voice_duration))
-            filter_complex = (
-                f"[1:a]atrim=start={random_start}:duration={voice_duration},"
-                f"asetpts=PTS-STARTPTS,volume={background_volume}[bg];"
-                f"[0:a][bg]amix=inputs=2:duration=first"
-            )
+        # Determine sample start time (random within the first 2/3 of the file)
+        max_start_time = max(0, voice_duration - sample_duration)
+        if max_start_time > 10:  # If file is long enough, don't start at the very beginning
+            sample_start = rng.uniform(10, max_start_time)
         else:
-            # If background is shorter, loop it
-            loops_needed = int(voice_duration / bg_duration) + 1
-            filter_complex = (
-                f"[1:a]aloop=loop={loops_needed}:size={int(bg_duration*44100)},"
-                f"atrim=duration={voice_duration},asetpts=PTS-STARTPTS,"
-                f"volume={background_volume}[bg];"
-                f"[0:a][bg]amix=inputs=2:duration=first"
-            )
-            
-        # Run ffmpeg command to merge audio
-        merge_cmd = [
-            'ffmpeg',
-            '-y',  # Overwrite output file
-            '-i', voice_file,
-            '-i', background_file,
+            sample_start = 0
+        
+        # Split the mix so one branch feeds the full output and the other the sample
+        filter_complex += (
+            "[mix];[mix]asplit=2[full][smp];"
+            f"[smp]atrim=start={sample_start}:duration={sample_duration},"
+            "asetpts=PTS-STARTPTS[sample]"
+        )
+        merge_cmd += [
+            '-filter_complex', filter_complex,
+            '-map', '[full]', '-codec:a', 'libmp3lame', '-q:a', '2', output_file,
+            '-map', '[sample]', '-codec:a', 'libmp3lame', '-q:a', '2', sample_file
+        ]
+        logger.info(f"Creating sample from {sample_start:.2f}s to {sample_start+sample_duration:.2f}s")
+    else:
+        merge_cmd += [
             '-filter_complex', filter_complex,
             '-codec:a', 'libmp3lame',
             '-q:a', '2',
             output_file
         ]
+    
+    return functools.partial(_run_merge_command, merge_cmd, output_file, sample_file)
+
+def _run_merge_command(
+    merge_cmd: List[str],
+    output_file: str,
+    sample_file: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Run a prepared ffmpeg merge command.
+    
+    Args:
+        merge_cmd: ffmpeg command built by _prepare_ffmpeg_merge
+        output_file: Path the full merged audio is written to
+        sample_file: Path the sample is written to, if any
         
-        logger.info(f"Running ffmpeg command to merge audio files")
-        subprocess.run(merge_cmd, check=True)
-        logger.info(f"Merged audio saved as {output_file}")
+    Returns:
+        Tuple of (path to full merged audio, path to sample)
+    """
+    logger.info(f"Running ffmpeg command to merge audio files")
+    subprocess.run(merge_cmd, check=True)
+    logger.info(f"Merged audio saved as {output_file}")
+    if sample_file:
+        logger.info(f"Sample audio saved as {sample_file}")
         
-        # Create sample if requested
-        sample_file = None
-        if create_sample:
-            # Create output path for sample
-            output_base = os.path.basename(output_file)
-            sample_file = os.path.join(output_dir, f"sample_{output_base}")
-            
-            # Determine sample start time (random within the first 2/3 of the file)
-            max_start_time = max(0, voice_duration - sample_duration)
-            if max_start_time > 10:  # If file is long enough, don't start at the very beginning
-                sample_start = random.uniform(10, max_start_time)
-            else:
-                sample_start = 0
-                
-            # Create sample with ffmpeg
-            sample_cmd = [
-                'ffmpeg',
-                '-y',
-                '-i', output_file,
-                '-ss', f"{sample_start}",
-                '-t', f"{sample_duration}",
-                '-acodec', 'copy',
-                sample_file
+    return output_file, sample_file
+
+def merge_audio_with_ffmpeg(
+    voice_file: str,
+    background_file: str,
+    output_file: str,
+    background_volume: float = 0.3,  # 0.0 to 1.0
+    create_sample: bool = True,
+    sample_duration: int = 30,
+    seed: Optional[int] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Merge voice audio with background soundscape using ffmpeg directly.
+    
+    Args:
+        voice_file: Path to voice meditation audio file
+        background_file: Path to background soundscape file
+        output_file: Path to save the merged audio
+        background_volume: Volume of background (0.0 to 1.0)
+        create_sample: Whether to create a short sample for preview
+        sample_duration: Duration of sample in seconds
+        seed: Optional seed for the background offset and sample start
+        
+    Returns:
+        Tuple of (path to full merged audio, path to sample) or (None, None) on error
+    """
+    try:
+        finish = _prepare_ffmpeg_merge(
+            voice_file, background_file, output_file, background_volume, create_sample, sample_duration,
+            _get_rng(seed)
+        )
+        if finish is None:
+            return None, None
+        return finish()
+        
+    except Exception as e:
+        logger.error(f"Error merging audio: {str(e)}")
+        return None, None
+
+def _decode_to_int16(
+    audio_file: str,
+    sample_rate: int = MIX_SAMPLE_RATE,
+    channels: int = MIX_CHANNELS
+) -> "np.ndarray":
+    """
+    Decode an audio file to interleaved 16-bit PCM using ffmpeg.
+    
+    ffmpeg writes the PCM straight into an anonymous temporary file which is
+    then memory-mapped, so the samples are demand-paged from the page cache
+    instead of being copied through a pipe into a Python bytes object.
+    
+    Args:
+        audio_file: Path to the audio file to decode
+        sample_rate: Output sample rate in Hz
+        channels: Number of output channels
+        
+    Returns:
+        int16 array of shape (frames, channels)
+    """
+    decode_cmd = [
+        'ffmpeg',
+        '-v', 'error',
+        '-i', audio_file,
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', str(channels),
+        '-ar', str(sample_rate),
+        'pipe:1'
+    ]
+    with tempfile.TemporaryFile() as pcm_file:
+        subprocess.run(decode_cmd, stdout=pcm_file, stderr=subprocess.PIPE, check=True)
+        if os.fstat(pcm_file.fileno()).st_size == 0:
+            return np.empty((0, channels), dtype=np.int16)
+        # The mapping outlives the file object; the array keeps it alive
+        pcm_map = mmap.mmap(pcm_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(pcm_map, dtype=np.int16).reshape(-1, channels)
+
+def _fit_background(background: "np.ndarray", frames: int, rng=_RNG) -> "np.ndarray":
+    """
+    Trim (from a random offset) or loop the background to exactly `frames` frames.
+    
+    Args:
+        background: int16 background PCM of shape (frames, channels)
+        frames: Number of frames required
+        rng: numpy random generator for the trim offset
+        
+    Returns:
+        int16 array of shape (frames, channels)
+    """
+    if len(background) >= frames:
+        start = int(rng.integers(0, len(background) - frames + 1))
+        return background[start:start + frames]
+    
+    loops_needed = frames // len(background) + 1
+    return np.tile(background, (loops_needed, 1))[:frames]
+
+def _scale_int16(pcm: "np.ndarray", volume: float) -> "np.ndarray":
+    """
+    Attenuate int16 PCM by a volume factor.
+    
+    Args:
+        pcm: int16 PCM of shape (frames, channels)
+        volume: Volume factor (0.0 to 1.0)
+        
+    Returns:
+        Attenuated int16 PCM with the same shape
+    """
+    # Apply the gain in Q15 fixed point so the arithmetic stays in int32
+    gain = int(round(min(max(volume, 0.0), 1.0) * 32768))
+    scaled = pcm.astype(np.int32)
+    np.multiply(scaled, gain, out=scaled)
+    np.right_shift(scaled, 15, out=scaled)
+    return scaled.astype(np.int16)
+
+def _pcm_cache_path(background_file: str, background_volume: float, sample_rate: int, channels: int) -> str:
+    """
+    Get the cache path for a decoded soundscape.
+    
+    The path is keyed by the file's path, size and modification time together
+    with the volume and PCM format, so an edited soundscape or a new volume
+    maps to a new entry.
+    
+    Args:
+        background_file: Path to background soundscape file
+        background_volume: Volume baked into the PCM (0.0 to 1.0)
+        sample_rate: Sample rate of the PCM
+        channels: Channel count of the PCM
+        
+    Returns:
+        Path of the raw s16le cache entry (which may not exist yet)
+    """
+    stat = os.stat(background_file)
+    cache_key = (
+        f"{os.path.abspath(background_file)}|{stat.st_size}|{stat.st_mtime_ns}|"
+        f"{background_volume:.4f}|{sample_rate}|{channels}"
+    )
+    return os.path.join(PCM_CACHE_DIR, f"{hashlib.sha1(cache_key.encode()).hexdigest()}.s16le.raw")
+
+def _background_pcm_cache(
+    background_file: str,
+    background_volume: float,
+    sample_rate: int = MIX_SAMPLE_RATE,
+    channels: int = MIX_CHANNELS
+) -> str:
+    """
+    Get the path of the decoded, attenuated background PCM, creating it if needed.
+    
+    Args:
+        background_file: Path to background soundscape file
+        background_volume: Volume of background (0.0 to 1.0)
+        sample_rate: Sample rate of the cached PCM
+        channels: Channel count of the cached PCM
+        
+    Returns:
+        Path to a raw s16le file holding the background PCM
+    """
+    cache_path = _pcm_cache_path(background_file, background_volume, sample_rate, channels)
+    if os.path.exists(cache_path):
+        return cache_path
+    
+    os.makedirs(PCM_CACHE_DIR, exist_ok=True)
+    scaled = _scale_int16(_decode_to_int16(background_file, sample_rate, channels), background_volume)
+    
+    # Write to a temporary file first so concurrent jobs never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=PCM_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            scaled.tofile(f)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Cached background PCM for {background_file} at {cache_path}")
+    return cache_path
+
+def _ffmpeg_background_cache(background_file: str) -> str:
+    """
+    Get the path of the decoded background PCM for the ffmpeg engine, creating it if needed.
+    
+    The soundscape is decoded once with ffmpeg; later merges read the raw PCM
+    instead of decoding the compressed file again. No numpy is needed.
+    
+    Args:
+        background_file: Path to background soundscape file
+        
+    Returns:
+        Path to a raw s16le file at FFMPEG_BACKGROUND_SAMPLE_RATE with FFMPEG_BACKGROUND_CHANNELS
+    """
+    cache_path = _pcm_cache_path(
+        background_file, 1.0, FFMPEG_BACKGROUND_SAMPLE_RATE, FFMPEG_BACKGROUND_CHANNELS
+    )
+    if os.path.exists(cache_path):
+        return cache_path
+    
+    os.makedirs(PCM_CACHE_DIR, exist_ok=True)
+    # Decode to a temporary file first so concurrent jobs never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=PCM_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    decode_cmd = [
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', background_file,
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', str(FFMPEG_BACKGROUND_CHANNELS),
+        '-ar', str(FFMPEG_BACKGROUND_SAMPLE_RATE),
+        tmp_path
+    ]
+    try:
+        subprocess.run(decode_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Cached decoded background for {background_file} at {cache_path}")
+    return cache_path
+
+def _load_background_pcm(
+    background_file: str,
+    background_volume: float,
+    sample_rate: int = MIX_SAMPLE_RATE,
+    channels: int = MIX_CHANNELS
+) -> "np.ndarray":
+    """
+    Load the attenuated background PCM from the on-disk cache.
+    
+    Args:
+        background_file: Path to background soundscape file
+        background_volume: Volume of background (0.0 to 1.0)
+        sample_rate: Sample rate of the PCM
+        channels: Channel count of the PCM
+        
+    Returns:
+        Read-only int16 array of shape (frames, channels)
+    """
+    cache_path = _background_pcm_cache(background_file, background_volume, sample_rate, channels)
+    if os.path.getsize(cache_path) == 0:
+        return np.empty((0, channels), dtype=np.int16)
+    return np.memmap(cache_path, dtype=np.int16, mode='r').reshape(-1, channels)
+
+def preload_background(background_file: str, background_volume: float = 0.3, engine: str = "auto") -> bool:
+    """
+    Decode a soundscape into the numpy engine's PCM cache ahead of the mix.
+    
+    Lets callers overlap the decode with other work (e.g. speech synthesis);
+    the later mix then only memory-maps the cached PCM. The ffmpeg engine
+    fills its own decoded-background cache on its first merge, so nothing is
+    done for it.
+    
+    Args:
+        background_file: Path to background soundscape file
+        background_volume: Volume the mix will use (0.0 to 1.0)
+        engine: The engine the mix will use, see process_meditation_audio
+        
+    Returns:
+        bool: True if the decoded PCM is now cached
+    """
+    if _resolve_engine(engine) != "numpy" or not check_ffmpeg_installed():
+        return False
+    try:
+        _background_pcm_cache(background_file, background_volume)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not preload background {background_file}: {str(e)}")
+        return False
+
+def _mix_gain(voice: "np.ndarray", background: "np.ndarray") -> int:
+    """
+    Find the gain that keeps the mix of voice and background within int16 range.
+    
+    Scans the mix block by block for its peak; mixes that already fit are
+    left at their level rather than being made louder.
+    
+    Args:
+        voice: int16 voice PCM of shape (frames, channels)
+        background: Attenuated int16 background PCM with the same shape as voice
+        
+    Returns:
+        int: Gain in Q15 fixed point (32768 is unity)
+    """
+    peak = 0
+    for start in range(0, len(voice), MIX_BLOCK_FRAMES):
+        end = start + MIX_BLOCK_FRAMES
+        mixed = voice[start:end].astype(np.int32)
+        np.add(mixed, background[start:end], out=mixed)
+        peak = max(peak, int(np.abs(mixed).max()))
+    if peak <= 32767:
+        return 32768
+    return 32767 * 32768 // peak
+
+def _mix_int16(voice: "np.ndarray", background: "np.ndarray", gain: int = 32768) -> "np.ndarray":
+    """
+    Mix an already attenuated background into voice as int16.
+    
+    Unlike ffmpeg's amix, the voice is kept at its original level unless the
+    gain from _mix_gain scales the mix down to avoid clipping.
+    
+    Args:
+        voice: int16 voice PCM of shape (frames, channels)
+        background: Attenuated int16 background PCM with the same shape as voice
+        gain: Gain in Q15 fixed point applied to the mix (32768 is unity)
+        
+    Returns:
+        Mixed int16 PCM with the same shape as voice
+    """
+    mixed = voice.astype(np.int32)
+    np.add(mixed, background, out=mixed)
+    if gain != 32768:
+        # Peaks reach 65534, so widen before the Q15 multiply
+        mixed = mixed.astype(np.int64)
+        np.multiply(mixed, gain, out=mixed)
+        np.right_shift(mixed, 15, out=mixed)
+    np.clip(mixed, -32768, 32767, out=mixed)
+    return mixed.astype(np.int16)
+
+class MP3EncoderWorker:
+    """
+    ffmpeg/libmp3lame encoder process fed with raw PCM over stdin.
+    
+    The encoder is started once per job and kept alive while PCM blocks are
+    written to it, so encoding overlaps with producing the remaining blocks and
+    the full output and the optional sample share a single encoder start-up.
+    A worker is not reused across jobs: the encoder's delay and bit reservoir
+    span block boundaries, so per-job MP3 streams cannot be split back out of
+    one long-running process.
+    """
+    
+    def __init__(
+        self,
+        output_file: str,
+        sample_rate: int = MIX_SAMPLE_RATE,
+        channels: int = MIX_CHANNELS,
+        sample_file: Optional[str] = None,
+        sample_start: float = 0,
+        sample_duration: float = 30
+    ):
+        """
+        Start the encoder process.
+        
+        Args:
+            output_file: Path to save the full MP3
+            sample_rate: Sample rate of the PCM that will be written
+            channels: Channel count of the PCM that will be written
+            sample_file: Optional path to also save a preview sample
+            sample_start: Start of the sample in seconds
+            sample_duration: Duration of the sample in seconds
+        """
+        self.cmd = [
+            'ffmpeg',
+            '-y',  # Overwrite output file
+            '-v', 'error',
+            '-f', 's16le',
+            '-ar', str(sample_rate),
+            '-ac', str(channels),
+            '-i', 'pipe:0',
+            '-ar', str(EXPORT_SAMPLE_RATE),
+            '-map', '0:a', '-codec:a', 'libmp3lame', '-q:a', '2', output_file
+        ]
+        if sample_file:
+            self.cmd += [
+                '-map', '0:a', '-ss', f"{sample_start}", '-t', f"{sample_duration}",
+                '-ar', str(EXPORT_SAMPLE_RATE), '-codec:a', 'libmp3lame', '-q:a', '2', sample_file
             ]
-            
-            logger.info(f"Creating sample from {sample_start:.2f}s to {sample_start+sample_duration:.2f}s")
-            subprocess.run(sample_cmd, check=True)
-            logger.info(f"Sample audio saved as {sample_file}")
-            
-        return output_file, sample_file
+        self.proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def write(self, pcm: "np.ndarray") -> None:
+        """
+        Feed a block of int16 PCM to the encoder.
+        
+        Args:
+            pcm: int16 PCM of shape (frames, channels)
+        """
+        self.proc.stdin.write(pcm.tobytes())
+    
+    def close(self) -> None:
+        """
+        Flush the encoder and wait for it to finish writing its outputs.
+        
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg exits with an error
+        """
+        self.proc.stdin.close()
+        stderr = self.proc.stderr.read()
+        if self.proc.wait() != 0:
+            raise subprocess.CalledProcessError(self.proc.returncode, self.cmd, stderr=stderr)
+    
+    def __enter__(self) -> "MP3EncoderWorker":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.proc.kill()
+            self.proc.wait()
+
+def _prepare_numpy_merge(
+    voice_file: str,
+    background_file: str,
+    output_file: str,
+    background_volume: float,
+    create_sample: bool,
+    sample_duration: int,
+    rng=_RNG
+) -> Optional[Callable[[], Tuple[Optional[str], Optional[str]]]]:
+    """
+    Validate and decode the inputs for the numpy engine.
+    
+    This is the I/O-bound half of merge_audio_with_numpy; the returned callable
+    does the (CPU-bound) mix and encode.
+    
+    Args:
+        voice_file: Path to voice meditation audio file
+        background_file: Path to background soundscape file
+        output_file: Path to save the merged audio
+        background_volume: Volume of background (0.0 to 1.0)
+        create_sample: Whether to create a short sample for preview
+        sample_duration: Duration of sample in seconds
+        rng: Random generator for the background offset and sample start
+        
+    Returns:
+        Callable producing (path to full merged audio, path to sample), or None if the inputs are unusable
+    """
+    if np is None:
+        logger.error("Cannot merge audio: numpy is not installed")
+        return None
+    
+    if not check_ffmpeg_installed():
+        logger.error("Cannot merge audio: ffmpeg is not installed")
+        return None
+        
+    # Check if files exist
+    if not os.path.exists(voice_file):
+        logger.error(f"Voice file not found: {voice_file}")
+        return None
+        
+    if not os.path.exists(background_file):
+        logger.error(f"Background file not found: {background_file}")
+        return None
+        
+    # Create output directory if needed
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    voice = _decode_to_int16(voice_file)
+    background = _load_background_pcm(background_file, background_volume)
+    if len(voice) == 0 or len(background) == 0:
+        logger.error("Cannot merge audio: decoded voice or background is empty")
+        return None
+    
+    voice_duration = len(voice) / MIX_SAMPLE_RATE
+    logger.info(f"Voice duration: {voice_duration:.2f}s")
+    logger.info(f"Background duration: {len(background) / MIX_SAMPLE_RATE:.2f}s")
+    
+    fitted_background = _fit_background(background, len(voice), rng)
+    
+    sample_file = None
+    sample_start = 0
+    if create_sample:
+        output_base = os.path.basename(output_file)
+        sample_file = os.path.join(output_dir, f"sample_{output_base}")
+        
+        max_start_time = max(0, voice_duration - sample_duration)
+        if max_start_time > 10:  # If file is long enough, don't start at the very beginning
+            sample_start = rng.uniform(10, max_start_time)
+        logger.info(f"Creating sample from {sample_start:.2f}s to {sample_start+sample_duration:.2f}s")
+    
+    return functools.partial(
+        _encode_numpy_mix, voice, fitted_background, output_file, sample_file, sample_start, sample_duration
+    )
+
+def _encode_numpy_mix(
+    voice: "np.ndarray",
+    fitted_background: "np.ndarray",
+    output_file: str,
+    sample_file: Optional[str],
+    sample_start: float,
+    sample_duration: int
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Mix prepared PCM and encode the full output and optional sample.
+    
+    Args:
+        voice: int16 voice PCM
+        fitted_background: Attenuated int16 background PCM, same shape as voice
+        output_file: Path to save the merged audio
+        sample_file: Path to save the sample, if any
+        sample_start: Start of the sample in seconds
+        sample_duration: Duration of sample in seconds
+        
+    Returns:
+        Tuple of (path to full merged audio, path to sample)
+    """
+    gain = _mix_gain(voice, fitted_background)
+    if gain != 32768:
+        logger.info(f"Scaling mix by {gain / 32768:.3f} to avoid clipping")
+    
+    logger.info("Encoding mixed audio with ffmpeg")
+    with MP3EncoderWorker(
+        output_file,
+        sample_file=sample_file,
+        sample_start=sample_start,
+        sample_duration=sample_duration
+    ) as encoder:
+        # Mix block by block so the encoder works on earlier blocks
+        # while later ones are still being mixed
+        for start in range(0, len(voice), MIX_BLOCK_FRAMES):
+            end = start + MIX_BLOCK_FRAMES
+            encoder.write(_mix_int16(voice[start:end], fitted_background[start:end], gain))
+    
+    logger.info(f"Merged audio saved as {output_file}")
+    if sample_file:
+        logger.info(f"Sample audio saved as {sample_file}")
+    
+    return output_file, sample_file
+
+def merge_audio_with_numpy(
+    voice_file: str,
+    background_file: str,
+    output_file: str,
+    background_volume: float = 0.3,  # 0.0 to 1.0
+    create_sample: bool = True,
+    sample_duration: int = 30,
+    seed: Optional[int] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Merge voice audio with background soundscape by mixing decoded PCM in numpy.
+    
+    ffmpeg is still used to decode the inputs and encode the MP3 output, but the
+    trimming/looping and mixing happen in-process on int16 buffers.
+    
+    Args:
+        voice_file: Path to voice meditation audio file
+        background_file: Path to background soundscape file
+        output_file: Path to save the merged audio
+        background_volume: Volume of background (0.0 to 1.0)
+        create_sample: Whether to create a short sample for preview
+        sample_duration: Duration of sample in seconds
+        seed: Optional seed for the background offset and sample start
+        
+    Returns:
+        Tuple of (path to full merged audio, path to sample) or (None, None) on error
+    """
+    try:
+        finish = _prepare_numpy_merge(
+            voice_file, background_file, output_file, background_volume, create_sample, sample_duration,
+            _get_rng(seed)
+        )
+        if finish is None:
+            return None, None
+        return finish()
         
     except Exception as e:
         logger.error(f"Error merging audio: {str(e)}")
         return None, None
 
+def _resolve_engine(engine: str) -> str:
+    """Map "auto" to the numpy engine when numpy is installed, else to ffmpeg."""
+    if engine == "auto":
+        return "numpy" if np is not None else "ffmpeg"
+    return engine
+
+def _mixed_output_path(voice_file: str, background_file: str, output_dir: str) -> str:
+    """Build the merged output path from the voice and background file names."""
+    voice_name = os.path.splitext(os.path.basename(voice_file))[0]
+    background_name = os.path.splitext(os.path.basename(background_file))[0]
+    return os.path.join(output_dir, f"{voice_name}_with_{background_name}.mp3")
+
+def _file_identity(path: str) -> str:
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+def _mix_cache_key(
+    voice_file: str,
+    background_file: str,
+    background_volume: float,
+    create_sample: bool,
+    engine: str,
+    seed: Optional[int]
+) -> str:
+    """
+    Hash the inputs of a mix by file identity, without reading the audio.
+    
+    Args:
+        voice_file: Path to voice meditation audio file
+        background_file: Path to background soundscape file
+        background_volume: Volume of background (0.0 to 1.0)
+        create_sample: Whether a sample preview is created
+        engine: The resolved mixing engine
+        seed: Seed for the background offset and sample start, if any
+        
+    Returns:
+        Hex BLAKE2b digest of the mix inputs
+    """
+    key = (
+        f"{_file_identity(voice_file)}|{_file_identity(background_file)}|"
+        f"{background_volume:.4f}|{create_sample}|{engine}|{seed}"
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+def _mix_cache_enabled() -> bool:
+    return os.environ.get("MIX_CACHE", "on").lower() not in ("off", "0", "false")
+
+def _read_mix_cache(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, MIX_CACHE_FILE)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+def _lookup_mix(output_dir: str, key: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Get the outputs of an earlier identical mix if they are unchanged on disk.
+    
+    Args:
+        output_dir: Directory the outputs were written to
+        key: Key from _mix_cache_key
+        
+    Returns:
+        Tuple of (path to full merged audio, path to sample), or None on a miss,
+            including when the index entry is malformed
+    """
+    with _mix_cache_lock:
+        entry = _read_mix_cache(output_dir).get(key)
+    if not entry:
+        return None
+    
+    try:
+        # Output names only depend on the input names, so a later mix with other
+        # settings may have overwritten the files
+        for path, identity in entry["files"]:
+            if not os.path.exists(path) or _file_identity(path) != identity:
+                return None
+        return entry["full_audio"], entry["sample_audio"]
+    except Exception as e:
+        logger.warning(f"Ignoring unusable mix cache entry in {output_dir}: {str(e)}")
+        return None
+
+def _store_mix(output_dir: str, key: str, full_audio: str, sample_audio: Optional[str]) -> None:
+    """
+    Record the outputs of a mix in the output directory's mix index.
+    
+    Failures only log a warning, since the mix itself has succeeded.
+    
+    Args:
+        output_dir: Directory the outputs were written to
+        key: Key from _mix_cache_key
+        full_audio: Path to full merged audio
+        sample_audio: Path to the sample, if any
+    """
+    tmp_path = None
+    try:
+        files = [full_audio] + ([sample_audio] if sample_audio else [])
+        entry = {
+            "full_audio": full_audio,
+            "sample_audio": sample_audio,
+            "files": [[path, _file_identity(path)] for path in files]
+        }
+        with _mix_cache_lock:
+            index = _read_mix_cache(output_dir)
+            index[key] = entry
+            
+            # Write to a temporary file first so a crash never leaves a partial index
+            fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, os.path.join(output_dir, MIX_CACHE_FILE))
+    except Exception as e:
+        logger.warning(f"Could not update mix cache in {output_dir}: {str(e)}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def process_meditation_audio(
     voice_file: str,
     background_file: str,
     output_dir: str = "output",
     background_volume: float = 0.3,
-    create_sample: bool = True
+    create_sample: bool = True,
+    engine: str = "ffmpeg",
+    seed: Optional[int] = None
 ) -> Tuple[Optional[str], Optional[str]]:
     """
     Process a meditation audio file by merging it with a soundscape.
     
+    A mix whose voice file, soundscape and settings are unchanged since an
+    earlier run returns that run's output files instead of mixing again.
+    
     Args:
         voice_file: Path to voice meditation audio file
         background_file: Path to background soundscape file
         output_dir: Directory to save output files
         background_volume: Volume of background (0.0 to 1.0)
         create_sample: Whether to create a sample preview
+        engine: "ffmpeg" to mix in an ffmpeg filter graph, "numpy" to mix decoded PCM in-process,
+            "auto" for numpy when it is installed (no ffprobe runs, cached background PCM)
+        seed: Optional seed for the background offset and sample start
         
     Returns:
         Tuple of (path to full merged audio, path to sample) or (None, None) on error
@@ -220,26 +991,99 @@ def process_meditation_audio(
         if not create_output_dir(output_dir):
             return None, None
             
-        # Generate output filename based on input
-        voice_basename = os.path.basename(voice_file)
-        voice_name = os.path.splitext(voice_basename)[0]
-        background_name = os.path.splitext(os.path.basename(background_file))[0]
-        output_filename = f"{voice_name}_with_{background_name}.mp3"
-        output_file = os.path.join(output_dir, output_filename)
+        output_file = _mixed_output_path(voice_file, background_file, output_dir)
+        engine = _resolve_engine(engine)
+        
+        cache_key = None
+        if _mix_cache_enabled() and os.path.exists(voice_file) and os.path.exists(background_file):
+            try:
+                cache_key = _mix_cache_key(voice_file, background_file, background_volume, create_sample, engine, seed)
+            except OSError as e:
+                logger.warning(f"Not caching this mix: {str(e)}")
+        if cache_key is not None:
+            cached = _lookup_mix(output_dir, cache_key)
+            if cached is not None:
+                logger.info(f"Reusing earlier mix of {voice_file}: {cached[0]}")
+                return cached
         
         # Merge the audio files
-        return merge_audio_with_ffmpeg(
+        merge = merge_audio_with_numpy if engine == "numpy" else merge_audio_with_ffmpeg
+        full_audio, sample_audio = merge(
             voice_file=voice_file,
             background_file=background_file,
             output_file=output_file,
             background_volume=background_volume,
-            create_sample=create_sample
+            create_sample=create_sample,
+            seed=seed
         )
+        if full_audio and cache_key is not None:
+            _store_mix(output_dir, cache_key, full_audio, sample_audio)
+        return full_audio, sample_audio
         
     except Exception as e:
         logger.error(f"Error processing meditation audio: {str(e)}")
         return None, None
 
+async def process_meditation_audio_batch_async(
+    voice_files: List[str],
+    background_file: str,
+    output_dir: str = "output",
+    background_volume: float = 0.3,
+    create_sample: bool = True,
+    sample_duration: int = 30,
+    engine: str = "ffmpeg",
+    io_concurrency: int = 2,
+    cpu_concurrency: Optional[int] = None,
+    seed: Optional[int] = None
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Merge several voice files with the same soundscape concurrently.
+    
+    Probing/decoding and mixing/encoding are gated by separate semaphores so the
+    I/O phase of one file overlaps the CPU phase of another without
+    oversubscribing the disk (I/O) or the cores (CPU).
+    
+    Args:
+        voice_files: Paths to voice meditation audio files
+        background_file: Path to background soundscape file
+        output_dir: Directory to save output files
+        background_volume: Volume of background (0.0 to 1.0)
+        create_sample: Whether to create sample previews
+        sample_duration: Duration of each sample in seconds
+        engine: "ffmpeg", "numpy" or "auto", see process_meditation_audio
+        io_concurrency: Maximum number of files probed/decoded at once
+        cpu_concurrency: Maximum number of files mixed/encoded at once (defaults to the CPU count)
+        seed: Optional seed; file i uses seed + i
+        
+    Returns:
+        List of (path to full merged audio, path to sample) tuples, in input order;
+        (None, None) for files that failed
+    """
+    if not create_output_dir(output_dir):
+        return [(None, None)] * len(voice_files)
+    
+    io_sem = asyncio.Semaphore(io_concurrency)
+    cpu_sem = asyncio.Semaphore(cpu_concurrency or os.cpu_count() or 1)
+    prepare = _prepare_numpy_merge if _resolve_engine(engine) == "numpy" else _prepare_ffmpeg_merge
+    
+    async def process(index: int, voice_file: str) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            output_file = _mixed_output_path(voice_file, background_file, output_dir)
+            async with io_sem:
+                finish = await asyncio.to_thread(
+                    prepare, voice_file, background_file, output_file, background_volume, create_sample, sample_duration,
+                    _get_rng(None if seed is None else seed + index)
+                )
+            if finish is None:
+                return None, None
+            async with cpu_sem:
+                return await asyncio.to_thread(finish)
+        except Exception as e:
+            logger.error(f"Error processing meditation audio {voice_file}: {str(e)}")
+            return None, None
+    
+    return await asyncio.gather(*(process(i, voice_file) for i, voice_file in enumerate(voice_files)))
+
 if __name__ == "__main__":
     import argparse
     
@@ -249,6 +1093,8 @@ if __name__ == "__main__":
     parser.add_argument("--output_dir", "-o", default="./output", help="Directory to save output files")
     parser.add_argument("--volume", "-vol", type=float, default=0.3, help="Background volume (0.0 to 1.0)")
     parser.add_argument("--no_sample", action="store_true", help="Don't create a sample preview")
+    parser.add_argument("--engine", choices=["ffmpeg", "numpy", "auto"], default="ffmpeg", help="Mixing engine to use")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible background offset and sample start")
     
     args = parser.parse_args()
     
@@ -267,7 +1113,9 @@ if __name__ == "__main__":
         background_file=args.background,
         output_dir=args.output_dir,
         background_volume=args.volume,
-        create_sample=not args.no_sample
+        create_sample=not args.no_sample,
+        engine=args.engine,
+        seed=args.seed
     )
     
     if full_path:
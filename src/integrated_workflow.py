@@ -8,24 +8,25 @@ import json
 import logging
 import re
 from datetime import datetime
-from typing import Dict, Optional, Any, TypedDict, List, Union
+from typing import TYPE_CHECKING, Dict, Optional, Any, TypedDict, List, Union
 from pathlib import Path
 import random
-import glob
+import functools
 from enum import Enum
 from pydantic import BaseModel, Field
 
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import SystemMessage, HumanMessage
-from langchain.output_parsers import PydanticOutputParser
 
 # Fix import paths
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from audio_generator import AudioGenerator
-from src.ffmpeg_mixer import process_meditation_audio
+
+# langgraph, langchain_openai, boto3 (via audio_generator) and the ffmpeg mixer
+# are imported by the functions that use them, so running a single step only
+# pays for the libraries that step needs
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from audio_generator import AudioGenerator
 
 # Setup logging
 logging.basicConfig(
@@ -44,6 +45,48 @@ JSON_OUTPUT_DIR = "output/json"
 SOUNDSCAPE_DIR = "soundscapes"
 STATE_DIR = "output/state"
 
+# Patterns for pulling JSON out of LLM responses
+_JSON_BRACKET_RE = re.compile(r'({.*}|\[.*\])', re.DOTALL)
+_JSON_BRACE_RE = re.compile(r'({.+})', re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r'(\[{.+}\])', re.DOTALL)
+
+@functools.lru_cache(maxsize=8)
+def get_llm(temperature: float, model: str = "gpt-4o") -> "ChatOpenAI":
+    """
+    Get a shared chat model client, creating it on first use.
+    
+    Reusing the client keeps its HTTP connection pool warm across workflow steps.
+    
+    Args:
+        temperature: Sampling temperature
+        model: OpenAI model name
+        
+    Returns:
+        ChatOpenAI: The shared client for these settings
+    """
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI(temperature=temperature, model=model)
+
+@functools.lru_cache(maxsize=8)
+def get_audio_generator(aws_profile: Optional[str], aws_region: str) -> "AudioGenerator":
+    """
+    Get a shared AudioGenerator, creating it on first use.
+    
+    Reusing the generator keeps its Polly client's HTTP connections open, so
+    later runs skip the TCP and TLS handshakes.
+    
+    Args:
+        aws_profile: AWS profile name, or None for the default credentials
+        aws_region: AWS region name
+        
+    Returns:
+        AudioGenerator: The shared generator for these settings
+    """
+    from audio_generator import AudioGenerator
+    
+    return AudioGenerator(aws_profile=aws_profile, aws_region=aws_region, output_dir=AUDIO_OUTPUT_DIR)
+
 # ============ Data Models ============
 
 class EmotionalState(str, Enum):
@@ -348,7 +391,8 @@ def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
         logger.info(f"Looking for latest state file{f' for step {step}' if step else ''}")
         
         # List all state files
-        all_files = [f for f in os.listdir(STATE_DIR) if f.startswith("state_")]
+        with os.scandir(STATE_DIR) as entries:
+            all_files = [entry.name for entry in entries if entry.name.startswith("state_")]
         logger.info(f"Found {len(all_files)} total state files")
         
         if not all_files:
@@ -366,7 +410,7 @@ def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
             logger.info(f"Found {len(matching_files)} state files for step {step}")
             
             # Sort by timestamp in filename (most recent last)
-            latest_file = sorted(matching_files)[-1]
+            latest_file = max(matching_files)
             logger.info(f"Latest state file for step {step}: {latest_file}")
             return os.path.join(STATE_DIR, latest_file)
         else:
@@ -378,15 +422,14 @@ def get_latest_state_file(step: Optional[str] = None) -> Optional[str]:
             for prefix in step_prefixes:
                 matching_files = [f for f in all_files if f.startswith(prefix)]
                 if matching_files:
-                    latest_step_files.append(sorted(matching_files)[-1])
+                    latest_step_files.append(max(matching_files))
             
             if not latest_step_files:
                 logger.warning("No matching state files found")
                 return None
                 
-            # Sort by step order in workflow
-            latest_file = sorted(latest_step_files, 
-                                key=lambda f: WORKFLOW_STEPS.index(f.split('_')[1]))[-1]
+            # Files were collected in workflow order, so the last one is from the furthest step
+            latest_file = latest_step_files[-1]
             
             logger.info(f"Latest overall state file: {latest_file}")
             return os.path.join(STATE_DIR, latest_file)
@@ -466,7 +509,7 @@ def generate_meditation_script(state: GraphState) -> GraphState:
             return state
 
         # Initialize LLM with higher temperature for more creative script generation
-        llm = ChatOpenAI(temperature=0.7, model="gpt-4o")
+        llm = get_llm(0.7)
         
         # Create a detailed system prompt with meditation expertise
         system_prompt = """You are an expert meditation script writer with a background in mindfulness, psychology, and therapeutic communication.
@@ -565,16 +608,15 @@ Return the analysis as a JSON structure with each section containing the section
         try:
             # Try to parse JSON from the section analysis
             import json
-            import re
             
             # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', section_analysis_response.content, re.DOTALL)
+            json_match = _JSON_BRACKET_RE.search(section_analysis_response.content)
             
             if json_match:
                 json_str = json_match.group(0).strip()
             else:
                 # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', section_analysis_response.content, re.DOTALL)
+                json_match = _JSON_BRACE_RE.search(section_analysis_response.content)
                 if json_match:
                     json_str = json_match.group(1).strip()
                 else:
@@ -600,15 +642,15 @@ Original response:
 
 Just return the valid JSON with no explanation."""
                     
-                    fix_response = llm.invoke([HumanMessage(content=fix_prompt)])
+                    fix_response = get_llm(0.0, "gpt-4o-mini").invoke([HumanMessage(content=fix_prompt)])
                     fix_content = fix_response.content
                     
                     # Try to extract JSON again
-                    json_match = re.search(r'({.*}|\[.*\])', fix_content, re.DOTALL)
+                    json_match = _JSON_BRACKET_RE.search(fix_content)
                     if json_match:
                         json_str = json_match.group(0).strip()
                     else:
-                        json_match = re.search(r'(\[{.+}\])', fix_content, re.DOTALL)
+                        json_match = _JSON_ARRAY_RE.search(fix_content)
                         if json_match:
                             json_str = json_match.group(1).strip()
                         else:
@@ -680,13 +722,11 @@ Just return the valid JSON with no explanation."""
             
             state["section_parsing_error"] = f"Used fallback section parsing: {str(parsing_error)}"
         
-        # Create and return the updated state
-        meditation_script = MeditationScript(
-            content=script_content,
-            sections=script_sections
-        )
-        
-        state["meditation_script"] = meditation_script.dict()
+        # Create and return the updated state (a plain dict, as the state stores)
+        state["meditation_script"] = {
+            "content": script_content,
+            "sections": script_sections
+        }
         logger.info(f"Completed script generation with {len(script_sections)} sections")
         log_state_transition("generate_meditation_script_complete", state)
         return state
@@ -707,7 +747,7 @@ def analyze_prosody_needs(state: GraphState) -> GraphState:
             return state
             
         # Initialize LLM with higher temperature for more creative analysis
-        llm = ChatOpenAI(temperature=0.3, model="gpt-4o")
+        llm = get_llm(0.3)
         
         # Create a comprehensive prompt that leverages the LLM's capabilities
         system_prompt = """You are a prosody analysis expert for meditation narration with deep expertise in SSML for AWS Polly. 
@@ -849,18 +889,17 @@ Your analysis should be detailed enough to guide SSML generation with appropriat
         try:
             # Try to parse JSON from the response
             import json
-            import re
             
             # Extract JSON content from the response
             content = response.content
             # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', content, re.DOTALL)
+            json_match = _JSON_BRACKET_RE.search(content)
             
             if json_match:
                 json_str = json_match.group(0).strip()
             else:
                 # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', content, re.DOTALL)
+                json_match = _JSON_BRACE_RE.search(content)
                 if json_match:
                     json_str = json_match.group(1).strip()
                 else:
@@ -884,15 +923,15 @@ Your analysis should be detailed enough to guide SSML generation with appropriat
             Just return the properly formatted JSON with no explanation."""
             
             try:
-                fallback_response = llm.invoke([HumanMessage(content=fallback_prompt)])
+                fallback_response = get_llm(0.0, "gpt-4o-mini").invoke([HumanMessage(content=fallback_prompt)])
                 fallback_content = fallback_response.content
                 
                 # Try to extract and parse JSON again
-                json_match = re.search(r'({.*}|\[.*\])', fallback_content, re.DOTALL)
+                json_match = _JSON_BRACKET_RE.search(fallback_content)
                 if json_match:
                     json_str = json_match.group(0).strip()
                 else:
-                    json_match = re.search(r'({.+})', fallback_content, re.DOTALL)
+                    json_match = _JSON_BRACE_RE.search(fallback_content)
                     if json_match:
                         json_str = json_match.group(1).strip()
                     else:
@@ -990,7 +1029,7 @@ def generate_prosody_profile(state: GraphState) -> GraphState:
         import json  # Add json import here
         
         # First approach: Use LLM to generate the complete prosody profile
-        llm = ChatOpenAI(temperature=0.3, model="gpt-4o")
+        llm = get_llm(0.3)
         
         system_prompt = """You are an expert in speech prosody for meditation, with deep knowledge of AWS Polly's SSML capabilities and Neural voices.
 
@@ -1092,18 +1131,17 @@ Your response should be a JSON object representing a complete ProsodyProfile. He
         try:
             # Try to parse JSON from the response
             import json
-            import re
             
             # Extract JSON content from the response
             content = response.content
             # Look for JSON content in the response
-            json_match = re.search(r'({.*}|\[.*\])', content, re.DOTALL)
+            json_match = _JSON_BRACKET_RE.search(content)
             
             if json_match:
                 json_str = json_match.group(0).strip()
             else:
                 # Try to find a JSON object directly
-                json_match = re.search(r'({.+})', content, re.DOTALL)
+                json_match = _JSON_BRACE_RE.search(content)
                 if json_match:
                     json_str = json_match.group(1).strip()
                 else:
@@ -1133,15 +1171,15 @@ Your response should be a JSON object representing a complete ProsodyProfile. He
 
 Just return the valid JSON."""
                 
-                fix_response = llm.invoke([HumanMessage(content=fix_prompt)])
+                fix_response = get_llm(0.0, "gpt-4o-mini").invoke([HumanMessage(content=fix_prompt)])
                 fix_content = fix_response.content
                 
                 # Try to extract and parse JSON again
-                json_match = re.search(r'({.*}|\[.*\])', fix_content, re.DOTALL)
+                json_match = _JSON_BRACKET_RE.search(fix_content)
                 if json_match:
                     json_str = json_match.group(0).strip()
                 else:
-                    json_match = re.search(r'({.+})', fix_content, re.DOTALL)
+                    json_match = _JSON_BRACE_RE.search(fix_content)
                     if json_match:
                         json_str = json_match.group(1).strip()
                     else:
@@ -1360,7 +1398,7 @@ def generate_ssml(state: GraphState) -> GraphState:
         analysis = state["prosody_analysis"]
         
         # Use a more powerful LLM for SSML generation
-        llm = ChatOpenAI(temperature=0.2, model="gpt-4o")
+        llm = get_llm(0.2)
         
         # Create a system prompt with detailed SSML knowledge
         system_prompt = """You are an expert SSML generator for AWS Polly Neural voices. Your task is to create optimized SSML markup for meditation narration that will be synthesized using AWS Polly.
@@ -1541,11 +1579,10 @@ def generate_meditation_audio(state: GraphState) -> GraphState:
             logger.error(f"Skipping due to previous error: {state['error']}")
             return state
             
-        # Initialize AudioGenerator
-        generator = AudioGenerator(
-            aws_profile=os.environ.get('AWS_PROFILE'),
-            aws_region=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
-            output_dir=AUDIO_OUTPUT_DIR
+        # Reuse the AudioGenerator (and its Polly client) across runs
+        generator = get_audio_generator(
+            os.environ.get('AWS_PROFILE'),
+            os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
         )
         
         # Get the voice type and language code from the request
@@ -1589,15 +1626,28 @@ def generate_meditation_audio(state: GraphState) -> GraphState:
         state["error"] = f"Error generating audio: {str(e)}"
         return state
 
+@functools.lru_cache(maxsize=8)
+def _list_soundscapes(soundscape_dir: str, dir_mtime_ns: int) -> tuple:
+    """List the mp3 files in a soundscape directory once per modification time."""
+    with os.scandir(soundscape_dir) as entries:
+        return tuple(sorted(
+            entry.path for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(".mp3")
+        ))
+
 def find_background_file(soundscape_dir: str, soundscape_type: str) -> Optional[str]:
     """Find a background soundscape file matching the type, or pick a random one."""
+    try:
+        all_files = _list_soundscapes(soundscape_dir, os.stat(soundscape_dir).st_mtime_ns)
+    except FileNotFoundError:
+        logger.warning(f"Soundscape directory not found: {soundscape_dir}")
+        return None
     # Try to find files matching the type
-    pattern = os.path.join(soundscape_dir, f"*{soundscape_type.lower()}*.mp3")
-    matches = glob.glob(pattern)
+    soundscape_type = soundscape_type.lower()
+    matches = [path for path in all_files if soundscape_type in os.path.basename(path).lower()]
     if matches:
         return random.choice(matches)
     # Fallback: pick any mp3 in the directory
-    all_files = glob.glob(os.path.join(soundscape_dir, "*.mp3"))
     if all_files:
         return random.choice(all_files)
     return None
@@ -1624,6 +1674,8 @@ def mix_with_soundscape(state: GraphState) -> GraphState:
             return state
         
         # Process audio with ffmpeg mixer
+        from src.ffmpeg_mixer import process_meditation_audio
+        
         full_audio, sample_audio = process_meditation_audio(
             voice_file=state["audio_output"]["voice_file"],
             background_file=background_file,
@@ -1671,6 +1723,37 @@ def mix_with_soundscape(state: GraphState) -> GraphState:
         state["error"] = f"Error mixing audio (ffmpeg): {str(e)}"
         return state
 
+@functools.lru_cache(maxsize=None)
+def get_compiled_workflow(entry_step: str):
+    """Build and compile the workflow graph for an entry step once, then reuse it"""
+    from langgraph.graph import StateGraph, END
+    
+    # Create workflow graph
+    workflow = StateGraph(GraphState)
+    
+    # Add all nodes
+    workflow.add_node("generate_script", generate_meditation_script)
+    workflow.add_node("analyze_prosody", analyze_prosody_needs)
+    workflow.add_node("create_profile", generate_prosody_profile)
+    workflow.add_node("generate_ssml", generate_ssml)
+    workflow.add_node("review_and_improve_ssml", review_and_improve_ssml)  # Add the new step
+    workflow.add_node("generate_audio", generate_meditation_audio)
+    workflow.add_node("mix_audio", mix_with_soundscape)
+    
+    # Configure the workflow edges
+    workflow.add_edge("generate_script", "analyze_prosody")
+    workflow.add_edge("analyze_prosody", "create_profile")
+    workflow.add_edge("create_profile", "generate_ssml")
+    workflow.add_edge("generate_ssml", "review_and_improve_ssml")  # Connect generate_ssml to review step
+    workflow.add_edge("review_and_improve_ssml", "generate_audio")  # Connect review step to generate_audio
+    workflow.add_edge("generate_audio", "mix_audio")
+    workflow.add_edge("mix_audio", END)
+    
+    # Set entry point
+    workflow.set_entry_point(entry_step)
+    
+    return workflow.compile()
+
 def run_workflow_step(step: str, state: Optional[GraphState] = None) -> GraphState:
     """Run a single step of the workflow"""
     logger.info(f"Running workflow step: {step}")
@@ -1713,32 +1796,8 @@ def run_workflow_step(step: str, state: Optional[GraphState] = None) -> GraphSta
     # Log the state before running
     logger.info(f"State before workflow step {step}: {json.dumps({k: 'Present' if v is not None else 'None' for k, v in state.items()})}")
     
-    # Create workflow graph
-    workflow = StateGraph(GraphState)
-    
-    # Add all nodes
-    workflow.add_node("generate_script", generate_meditation_script)
-    workflow.add_node("analyze_prosody", analyze_prosody_needs)
-    workflow.add_node("create_profile", generate_prosody_profile)
-    workflow.add_node("generate_ssml", generate_ssml)
-    workflow.add_node("review_and_improve_ssml", review_and_improve_ssml)  # Add the new step
-    workflow.add_node("generate_audio", generate_meditation_audio)
-    workflow.add_node("mix_audio", mix_with_soundscape)
-    
-    # Configure the workflow edges
-    workflow.add_edge("generate_script", "analyze_prosody")
-    workflow.add_edge("analyze_prosody", "create_profile")
-    workflow.add_edge("create_profile", "generate_ssml")
-    workflow.add_edge("generate_ssml", "review_and_improve_ssml")  # Connect generate_ssml to review step
-    workflow.add_edge("review_and_improve_ssml", "generate_audio")  # Connect review step to generate_audio
-    workflow.add_edge("generate_audio", "mix_audio")
-    workflow.add_edge("mix_audio", END)
-    
-    # Set entry point
-    workflow.set_entry_point(step)
-    
-    # Compile and run
-    compiled_workflow = workflow.compile()
+    # Get the compiled workflow starting at this step
+    compiled_workflow = get_compiled_workflow(step)
     logger.info(f"Invoking workflow at step: {step}")
     result = compiled_workflow.invoke(state)
     
@@ -1912,7 +1971,7 @@ def review_and_improve_ssml(state: GraphState) -> GraphState:
         ssml = state["ssml_output"]
         
         # Initialize LLM for review
-        llm = ChatOpenAI(temperature=0.2, model="gpt-4o")
+        llm = get_llm(0.2)
         
         # Create system prompt with SSML best practices knowledge
         system_prompt = """You are an expert SSML reviewer and fixer specializing in meditation audio. Your task is to analyze SSML markup, identify and fix any issues, particularly for AWS Polly Neural voices used in meditation applications.
@@ -0,0 +1,100 @@
+"""
+Unit tests for the mix cache and the numpy engine's mixing helpers.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.ffmpeg_mixer import MIX_CACHE_FILE, _lookup_mix, _mix_cache_key, _mix_gain, _mix_int16, _store_mix
+
+@pytest.fixture
+def inputs(tmp_path):
+    voice_file = tmp_path / "voice.mp3"
+    background_file = tmp_path / "nature.mp3"
+    voice_file.write_bytes(b"voice")
+    background_file.write_bytes(b"background")
+    return str(voice_file), str(background_file)
+
+@pytest.fixture
+def outputs(tmp_path):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    full_audio = output_dir / "voice_with_nature.mp3"
+    sample_audio = output_dir / "sample_voice_with_nature.mp3"
+    full_audio.write_bytes(b"full mix")
+    sample_audio.write_bytes(b"sample")
+    return str(output_dir), str(full_audio), str(sample_audio)
+
+def _key(voice_file, background_file, volume=0.3, create_sample=True, engine="ffmpeg", seed=None):
+    return _mix_cache_key(voice_file, background_file, volume, create_sample, engine, seed)
+
+def test_mix_cache_key_is_stable(inputs):
+    assert _key(*inputs) == _key(*inputs)
+
+@pytest.mark.parametrize("settings", [
+    {"volume": 0.4}, {"create_sample": False}, {"engine": "numpy"}, {"seed": 7}
+])
+def test_mix_cache_key_changes_with_settings(inputs, settings):
+    assert _key(*inputs, **settings) != _key(*inputs)
+
+def test_mix_cache_key_changes_with_input_file(inputs):
+    voice_file, _ = inputs
+    before = _key(*inputs)
+    stat = os.stat(voice_file)
+    os.utime(voice_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert _key(*inputs) != before
+
+def test_lookup_hits_stored_mix(inputs, outputs):
+    output_dir, full_audio, sample_audio = outputs
+    key = _key(*inputs)
+    assert _lookup_mix(output_dir, key) is None
+    _store_mix(output_dir, key, full_audio, sample_audio)
+    assert _lookup_mix(output_dir, key) == (full_audio, sample_audio)
+
+@pytest.mark.parametrize("change", ["rewrite", "touch", "delete"])
+def test_lookup_misses_when_output_changed(inputs, outputs, change):
+    output_dir, full_audio, sample_audio = outputs
+    key = _key(*inputs)
+    _store_mix(output_dir, key, full_audio, sample_audio)
+    if change == "rewrite":
+        with open(sample_audio, "wb") as f:
+            f.write(b"another mix's sample")
+    elif change == "touch":
+        stat = os.stat(full_audio)
+        os.utime(full_audio, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    else:
+        os.remove(full_audio)
+    assert _lookup_mix(output_dir, key) is None
+
+def test_lookup_treats_malformed_index_as_miss(inputs, outputs):
+    output_dir, full_audio, sample_audio = outputs
+    key = _key(*inputs)
+    with open(os.path.join(output_dir, MIX_CACHE_FILE), "w") as f:
+        f.write('{"%s": {"files": 3}}' % key)
+    assert _lookup_mix(output_dir, key) is None
+    _store_mix(output_dir, key, full_audio, sample_audio)
+    assert _lookup_mix(output_dir, key) == (full_audio, sample_audio)
+
+def _tone(frames, amplitude, period):
+    phase = np.arange(frames) * (2 * np.pi / period)
+    return np.round(amplitude * np.sin(phase)).astype(np.int16).reshape(-1, 1)
+
+def test_mix_gain_keeps_quiet_mix_at_unity():
+    voice = _tone(10_000, 12_000, 100)
+    background = _tone(10_000, 6_000, 37)
+    assert _mix_gain(voice, background) == 32768
+
+def test_mix_gain_avoids_clipping_loud_mix():
+    # In-phase tones whose sum peaks well past the int16 range
+    voice = _tone(200_000, 30_000, 400)
+    background = _tone(200_000, 20_000, 400)
+    gain = _mix_gain(voice, background)
+    assert gain < 32768
+    
+    mixed = _mix_int16(voice, background, gain)
+    # Equal to the unclipped scaled sum, so no sample was clipped
+    expected = (voice.astype(np.int64) + background) * gain >> 15
+    assert np.array_equal(mixed, expected)
+    assert 32000 <= np.abs(mixed.astype(np.int32)).max() <= 32767
@@ -0,0 +1,71 @@
+"""
+Unit tests for the workflow step ledger.
+"""
+
+import os
+
+import pytest
+
+from meditation_tts.utils import ledger
+from meditation_tts.utils.ledger import WorkflowLedger, ledgered
+
+@pytest.fixture(autouse=True)
+def workflow_ledger(tmp_path, monkeypatch):
+    shared = WorkflowLedger(str(tmp_path / "ledger.jsonl"))
+    monkeypatch.setattr(ledger, "get_ledger", lambda: shared)
+    monkeypatch.setattr(ledger, "_ledger_mode", "on")
+    return shared
+
+def _mix_node(tmp_path, calls):
+    @ledgered("mix_audio")
+    def mix_audio(state):
+        calls.append(state["request"])
+        full_audio = tmp_path / "full.mp3"
+        sample_audio = tmp_path / "sample.mp3"
+        full_audio.write_bytes(b"full")
+        sample_audio.write_bytes(b"sample")
+        state["audio_output"] = dict(
+            state["audio_output"], full_audio=str(full_audio), sample_audio=str(sample_audio)
+        )
+        return state
+    return mix_audio
+
+def _state(tmp_path, request=None):
+    voice_file = tmp_path / "voice.mp3"
+    voice_file.write_bytes(b"voice")
+    return {"request": request or {"duration_minutes": 5}, "audio_output": {"voice_file": str(voice_file)}}
+
+def test_ledger_hit_skips_step(tmp_path):
+    calls = []
+    mix_audio = _mix_node(tmp_path, calls)
+    first = mix_audio(_state(tmp_path))
+    second = mix_audio(_state(tmp_path))
+    assert len(calls) == 1
+    assert second["audio_output"] == first["audio_output"]
+
+def test_ledger_miss_runs_step(tmp_path):
+    calls = []
+    mix_audio = _mix_node(tmp_path, calls)
+    mix_audio(_state(tmp_path))
+    mix_audio(_state(tmp_path, {"duration_minutes": 10}))
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("path_key", ["full_audio", "sample_audio"])
+def test_ledger_reruns_step_when_output_file_is_gone(tmp_path, path_key):
+    calls = []
+    mix_audio = _mix_node(tmp_path, calls)
+    first = mix_audio(_state(tmp_path))
+    os.remove(first["audio_output"][path_key])
+
+    second = mix_audio(_state(tmp_path))
+    assert len(calls) == 2
+    assert (tmp_path / "full.mp3").exists() and (tmp_path / "sample.mp3").exists()
+    assert second["audio_output"] == first["audio_output"]
+
+def test_outputs_still_valid_checks_every_path(tmp_path):
+    existing = tmp_path / "voice.mp3"
+    existing.write_bytes(b"voice")
+    for name in ("voice_file", "full_audio", "sample_audio", "json_file"):
+        audio_output = {"voice_file": str(existing), name: str(tmp_path / "missing")}
+        assert not ledger._outputs_still_valid({"audio_output": audio_output})
+    assert ledger._outputs_still_valid({"audio_output": {"voice_file": str(existing), "full_audio": None}})
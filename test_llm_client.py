@@ -0,0 +1,27 @@
+"""
+Unit tests for the shared LLM client configuration.
+"""
+
+import pytest
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+
+from meditation_tts.services.llm_client import configure_llm_cache
+
+@pytest.fixture
+def host_cache():
+    previous = get_llm_cache()
+    cache = InMemoryCache()
+    set_llm_cache(cache)
+    yield cache
+    set_llm_cache(previous)
+
+@pytest.mark.parametrize("mode", ["off", "bogus"])
+def test_off_keeps_host_cache(host_cache, mode):
+    assert configure_llm_cache(mode) == "off"
+    assert get_llm_cache() is host_cache
+
+def test_memory_installs_cache(host_cache):
+    assert configure_llm_cache("memory") == "memory"
+    assert isinstance(get_llm_cache(), InMemoryCache)
+    assert get_llm_cache() is not host_cache
@@ -0,0 +1,26 @@
+"""
+Unit tests for parsing the prosody profile response.
+"""
+
+import pytest
+
+from meditation_tts.workflow.nodes.profile_generation import _parse_profile_response
+
+def _state():
+    request = {"emotional_state": "anxious", "meditation_style": "mindfulness", "theme": "stress_relief",
+               "duration_minutes": 5, "voice_type": "female_calm", "soundscape": "nature", "language_code": "en-US"}
+    return {"request": request, "prosody_analysis": {"key_terms": ["breathe"]}}
+
+def test_parses_profile_object():
+    state = _state()
+    assert _parse_profile_response(state, '{"pitch": {"base_pitch": "-5%"}, "rate": {"base_rate": "90%"}}')
+    assert state["prosody_profile"]["rate"]["base_rate"] == "90%"
+    assert "emotional_contours" in state["prosody_profile"]["pitch"]
+    assert "profile_generation_error" not in state
+
+@pytest.mark.parametrize("content", ['[{"pitch": {}}]', '"calm"', "42", "null", '{"pitch": '])
+def test_falls_back_to_template_for_non_object_reply(content):
+    state = _state()
+    assert not _parse_profile_response(state, content)
+    assert isinstance(state["prosody_profile"], dict)
+    assert state["profile_generation_error"].startswith("Used template profile")
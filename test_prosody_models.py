@@ -0,0 +1,41 @@
+"""
+Unit tests for the prosody profile models.
+"""
+
+import json
+
+import pytest
+
+from meditation_tts.models.prosody import (
+    DEFAULT_BREATHING_PATTERNS,
+    DEFAULT_EMOTIONAL_CONTOURS,
+    PauseProfile,
+    PitchProfile
+)
+
+def _pitch_profile(**fields):
+    return PitchProfile(base_pitch="-10%", range="+20%", contour_pattern="gentle", **fields)
+
+def _pause_profile():
+    return PauseProfile(short_pause="500ms", medium_pause="1s", long_pause="3s",
+                        breath_pause="4s", sentence_pattern="even")
+
+def test_default_tables_are_read_only():
+    profile = _pitch_profile()
+    with pytest.raises(TypeError):
+        profile.emotional_contours["calm"] = "flat"
+    with pytest.raises(TypeError):
+        _pause_profile().breathing_patterns["4-7-8"]["hold"] = "1s"
+    assert _pitch_profile().emotional_contours["calm"] == DEFAULT_EMOTIONAL_CONTOURS["calm"]
+
+def test_given_tables_are_per_instance():
+    profile = _pitch_profile(emotional_contours={"calm": "flat"})
+    profile.emotional_contours["calm"] = "rising"
+    assert DEFAULT_EMOTIONAL_CONTOURS["calm"] == "gradual downward drift with gentle rises"
+
+def test_default_tables_serialize_as_dicts():
+    dumped = _pause_profile().model_dump()
+    assert type(dumped["breathing_patterns"]) is dict
+    assert type(dumped["breathing_patterns"]["4-7-8"]) is dict
+    assert dumped["breathing_patterns"] == {name: dict(pattern) for name, pattern in DEFAULT_BREATHING_PATTERNS.items()}
+    assert json.loads(_pitch_profile().model_dump_json())["emotional_contours"] == dict(DEFAULT_EMOTIONAL_CONTOURS)
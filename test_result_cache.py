@@ -0,0 +1,71 @@
+"""
+Unit tests for the persistent cache of parsed LLM results.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from meditation_tts.config.constants import RESULT_CACHE_MAX_TEMPERATURE
+from meditation_tts.services import result_cache
+from meditation_tts.services.result_cache import (
+    ResultCache,
+    get_cached_result,
+    result_cache_key,
+    store_result
+)
+
+def _llm(temperature=0.0, model_name="gpt-4o"):
+    return SimpleNamespace(temperature=temperature, model_name=model_name)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    shared = ResultCache(str(tmp_path / "results.db"), ttl_seconds=60)
+    monkeypatch.setattr(result_cache, "get_result_cache", lambda: shared)
+    return shared
+
+def test_key_is_stable_across_input_order():
+    first = result_cache_key("Prosody Analysis", _llm(), script="Breathe.", request={"a": 1, "b": 2})
+    second = result_cache_key("Prosody Analysis", _llm(), request={"b": 2, "a": 1}, script="Breathe.")
+    assert first == second
+    assert len(first) == 64
+
+@pytest.mark.parametrize("purpose, llm, inputs", [
+    ("Prosody Profile", _llm(), {"script": "Breathe."}),
+    ("Prosody Analysis", _llm(model_name="gpt-4o-mini"), {"script": "Breathe."}),
+    ("Prosody Analysis", _llm(temperature=0.2), {"script": "Breathe."}),
+    ("Prosody Analysis", _llm(), {"script": "Breathe out."}),
+])
+def test_key_changes_with_every_input(purpose, llm, inputs):
+    base = result_cache_key("Prosody Analysis", _llm(), script="Breathe.")
+    assert result_cache_key(purpose, llm, **inputs) != base
+
+def test_key_temperature_cutoff():
+    assert result_cache_key("Prosody Analysis", _llm(RESULT_CACHE_MAX_TEMPERATURE), script="x") is not None
+    assert result_cache_key("Prosody Analysis", _llm(None), script="x") is not None
+    assert result_cache_key("Prosody Analysis", _llm(RESULT_CACHE_MAX_TEMPERATURE + 0.01), script="x") is None
+
+def test_results_expire_after_ttl(cache, clock):
+    store_result("key", {"overall_tone": "calm"})
+    clock[0] += 60
+    assert get_cached_result("key") == {"overall_tone": "calm"}
+    clock[0] += 1
+    assert get_cached_result("key") is None
+
+def test_store_replaces_and_restarts_ttl(cache, clock):
+    store_result("key", {"overall_tone": "calm"})
+    clock[0] += 50
+    store_result("key", {"overall_tone": "warm"})
+    clock[0] += 50
+    assert get_cached_result("key") == {"overall_tone": "warm"}
+
+def test_none_key_is_never_cached(cache):
+    store_result(None, {"overall_tone": "calm"})
+    assert get_cached_result(None) is None
+    assert cache._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
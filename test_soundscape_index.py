@@ -0,0 +1,34 @@
+"""
+Unit tests for the soundscape directory index.
+"""
+
+import random
+
+import pytest
+
+from meditation_tts.services.soundscape_index import find_background_file, list_available_soundscapes
+
+@pytest.fixture
+def soundscape_dir(tmp_path):
+    for name in ("river.mp3", "Nature_Morning.mp3", "waves.mp3", "ocean_calm.mp3", "notes.txt", ".hidden.mp3"):
+        (tmp_path / name).write_bytes(b"")
+    return tmp_path
+
+def test_find_background_file_matches_type_name_only(soundscape_dir):
+    rng = random.Random(0)
+    picks = {find_background_file(str(soundscape_dir), "nature", rng) for _ in range(20)}
+    assert picks == {str(soundscape_dir / "Nature_Morning.mp3")}
+    picks = {find_background_file(str(soundscape_dir), "Ocean", rng) for _ in range(20)}
+    assert picks == {str(soundscape_dir / "ocean_calm.mp3")}
+
+def test_find_background_file_falls_back_to_any_soundscape(soundscape_dir):
+    pick = find_background_file(str(soundscape_dir), "forest", random.Random(0))
+    assert pick in {str(soundscape_dir / name) for name in ("river.mp3", "Nature_Morning.mp3", "waves.mp3", "ocean_calm.mp3")}
+    assert find_background_file(str(soundscape_dir / "missing"), "forest") is None
+
+def test_list_available_soundscapes_groups_by_keyword(soundscape_dir):
+    listed = {soundscape_type: sorted(paths) for soundscape_type, paths in list_available_soundscapes(str(soundscape_dir)).items()}
+    assert listed == {
+        "nature": sorted([str(soundscape_dir / "river.mp3"), str(soundscape_dir / "Nature_Morning.mp3")]),
+        "ocean": sorted([str(soundscape_dir / "waves.mp3"), str(soundscape_dir / "ocean_calm.mp3")]),
+    }
@@ -0,0 +1,67 @@
+"""
+Unit tests for the SSML validation and repair utilities.
+"""
+
+import pytest
+
+from meditation_tts.utils.ssml_utils import autofix_ssml, validate_ssml
+
+def _prosody(attributes: str) -> str:
+    return f"<speak><prosody {attributes}>Breathe in.</prosody></speak>"
+
+@pytest.mark.parametrize("rate, expected", [
+    ("+10%", "110%"),
+    ("-10%", "90%"),
+    ("+150%", "200%"),
+    ("-90%", "20%"),
+    ("+10", "110%"),
+    ("1.2", "120%"),
+    ("0.8", "80%"),
+    ("90", "90%"),
+    ("250%", "200%"),
+    ("10%", "20%"),
+])
+def test_autofix_rate(rate, expected):
+    fixed = autofix_ssml(_prosody(f'rate="{rate}"'))
+    assert fixed == _prosody(f'rate="{expected}"')
+    assert validate_ssml(fixed) == (True, [])
+
+def test_autofix_keeps_valid_rate():
+    ssml = _prosody('rate="85%"')
+    assert autofix_ssml(ssml) == ssml
+
+@pytest.mark.parametrize("pitch, expected", [
+    ("+80%", "+50%"),
+    ("-50%", "-33.3%"),
+    ("-5%", "-5%"),
+    ("+5", "+5%"),
+])
+def test_autofix_pitch(pitch, expected):
+    fixed = autofix_ssml(_prosody(f'pitch="{pitch}"'))
+    assert fixed == _prosody(f'pitch="{expected}"')
+    assert validate_ssml(fixed) == (True, [])
+
+def test_validate_rejects_signed_rate():
+    valid, issues = validate_ssml(_prosody('rate="+10%"'))
+    assert not valid
+    assert issues == ['<prosody> rate "+10%" must not be signed']
+
+def test_validate_rejects_out_of_range_values():
+    valid, issues = validate_ssml('<speak>Rest.<break time="12s"/><prosody pitch="+60%">Now.</prosody></speak>')
+    assert not valid
+    assert len(issues) == 2
+
+def test_validate_rejects_unsupported_tags():
+    valid, issues = validate_ssml("<speak><emphasis>Now.</emphasis></speak>")
+    assert not valid
+    assert issues == ["<emphasis> is not supported by Neural voices"]
+
+def test_autofix_break_units_and_limit():
+    fixed = autofix_ssml('<speak>Rest.<break time="2"/>Again.<break time="15000ms"/></speak>')
+    assert fixed == '<speak>Rest.<break time="2s"/>Again.<break time="10s"/></speak>'
+    assert validate_ssml(fixed) == (True, [])
+
+def test_autofix_replaces_emphasis_and_balances_tags():
+    fixed = autofix_ssml("<p><emphasis>Relax</emphasis> & let go.</s>")
+    assert fixed == '<speak><p><prosody rate="95%">Relax</prosody> &amp; let go.</p></speak>'
+    assert validate_ssml(fixed) == (True, [])
@@ -0,0 +1,55 @@
+"""
+Unit tests for saving and loading workflow state files.
+"""
+
+import pytest
+
+from meditation_tts.utils import state_utils
+from meditation_tts.utils.state_utils import load_state, save_state, _read_state_file
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_utils, "STATE_DIR", str(tmp_path))
+    state_utils._scan_latest_state_files.cache_clear()
+    return tmp_path
+
+def _is_delta(path: str) -> bool:
+    return "delta_step" in _read_state_file(path)
+
+def test_deltas_round_trip():
+    state = {"request": {"duration_minutes": 5}, "current_step": "generate_script",
+             "meditation_script": {"title": "Calm"}}
+    first = save_state(state, "generate_script")
+    assert not _is_delta(first)
+
+    state.update(current_step="analyze_prosody", prosody_analysis={"pace": "slow"})
+    second = save_state(state, "analyze_prosody")
+    state.update(current_step="create_profile", prosody_profile={"rate": "90%"})
+    third = save_state(state, "create_profile")
+    assert _is_delta(second) and _is_delta(third)
+
+    assert load_state(third) == state
+    assert load_state(second)["prosody_analysis"] == {"pace": "slow"}
+    assert "prosody_profile" not in load_state(second)
+
+def test_run_started_mid_workflow_saves_full_state():
+    state = {"request": {"duration_minutes": 5}, "current_step": "create_profile",
+             "meditation_script": {"title": "Calm"}, "prosody_profile": {"rate": "90%"}}
+    path = save_state(state, "create_profile")
+    assert not _is_delta(path)
+    assert load_state(path) == state
+
+    state.update(current_step="generate_ssml", ssml_output="<speak>Breathe.</speak>")
+    next_path = save_state(state, "generate_ssml")
+    assert _is_delta(next_path)
+    assert load_state(next_path) == state
+
+def test_new_run_id_saves_full_state():
+    state = {"request": {}, "current_step": "generate_script", "meditation_script": {}}
+    save_state(state, "generate_script")
+
+    resumed = dict(state, run_id=None, current_step="analyze_prosody", prosody_analysis={})
+    path = save_state(resumed, "analyze_prosody")
+    assert resumed["run_id"] != state["run_id"]
+    assert not _is_delta(path)
+    assert load_state(path) == resumed
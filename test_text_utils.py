@@ -0,0 +1,45 @@
+"""
+Unit tests for the text analysis utilities.
+"""
+
+import itertools
+
+import pytest
+
+from meditation_tts.utils.text_utils import BREATHING_PHRASES, detect_breathing_pattern
+
+def _if_elif_breathing_pattern(sentence):
+    # The original chain of checks that detect_breathing_pattern replaced
+    sentence_lower = sentence.lower()
+    if any(phrase in sentence_lower for phrase in ["inhala por 4", "inhale for 4", "breathe in for 4"]):
+        return {"type": "4-7-8", "phase": "inhale"}
+    elif any(phrase in sentence_lower for phrase in ["mantén por 7", "hold for 7", "hold your breath for 7"]):
+        return {"type": "4-7-8", "phase": "hold"}
+    elif any(phrase in sentence_lower for phrase in ["exhala por 8", "exhale for 8", "breathe out for 8"]):
+        return {"type": "4-7-8", "phase": "exhale"}
+    elif any(phrase in sentence_lower for phrase in ["mantén por 4", "hold for 4", "hold your breath for 4"]):
+        return {"type": "box_breathing", "phase": "hold_in"}
+    elif any(phrase in sentence_lower for phrase in ["exhala por 4", "exhale for 4", "breathe out for 4"]):
+        return {"type": "box_breathing", "phase": "exhale"}
+    elif any(phrase in sentence_lower for phrase in ["respiración profunda", "deep breath", "deep breathing"]):
+        return {"type": "deep_breathing", "phase": "inhale"}
+    return None
+
+@pytest.mark.parametrize("sentence, expected", [
+    ("Now take a deep breathe in for 4 counts", {"type": "4-7-8", "phase": "inhale"}),
+    ("Take a deep breath and hold your breath for 7", {"type": "4-7-8", "phase": "hold"}),
+    ("Mantén por 4 y exhala por 8", {"type": "4-7-8", "phase": "exhale"}),
+    ("Breathe out for 4.", {"type": "box_breathing", "phase": "exhale"}),
+    ("Respiración profunda.", {"type": "deep_breathing", "phase": "inhale"}),
+    ("Let your shoulders relax.", None),
+])
+def test_detect_breathing_pattern(sentence, expected):
+    assert detect_breathing_pattern(sentence) == expected
+
+def test_detect_breathing_pattern_matches_if_elif_chain():
+    phrases = [phrase for rule_phrases, _, _ in BREATHING_PHRASES for phrase in rule_phrases]
+    phrases += ["deep breathe in for 4", "hold your breath for 7"]
+    for first, second in itertools.permutations(phrases, 2):
+        # Joined with a space, directly, and overlapping by two characters
+        for sentence in (f"{first} {second}", f"{first}{second}", f"{first[:-2]}{second}"):
+            assert detect_breathing_pattern(sentence) == _if_elif_breathing_pattern(sentence), sentence